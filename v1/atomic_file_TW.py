@@ -0,0 +1,73 @@
+import os
+
+
+class AtomicFile:
+    """A file which is written next to its final place and moved there when it is complete.
+
+    A reader never sees a partial file, and an interrupted write leaves nothing behind. The temporary file is named
+    after the final one and the process, so concurrent writers do not disturb each other.
+
+    It can be used as a context manager, which yields the opened file, commits it at the end and discards it
+    if an exception is raised. A long write (e.g. a zip file built slide by slide) calls commit or discard itself.
+
+    Attributes
+    ----------
+    fileName : str
+        The final name of the file.
+    tmpName : str
+        The name of the temporary file.
+    file : file object
+        The opened temporary file.
+    """
+
+    def __init__(self, fileName, mode='wb'):
+        """Initialization.
+
+        Parameters
+        ----------
+        fileName : str
+            The final name of the file.
+        mode : str
+            The mode of open, 'wb' or 'w'.
+
+        Raises
+        ----------
+        OSError
+            If the temporary file can not be created.
+        """
+        self.fileName = fileName
+        self.tmpName = '{0}.tmp{1}'.format(fileName, os.getpid())
+        self.file = open(self.tmpName, mode)
+
+    def commit(self):
+        """Close the file and move it to its final place.
+
+        Raises
+        ----------
+        OSError
+            If the file can not be written or moved. The temporary file is removed.
+        """
+        try:
+            self.file.close()
+            os.replace(self.tmpName, self.fileName)
+        except OSError:
+            self.discard()
+            raise
+
+    def discard(self):
+        """Close and remove the temporary file."""
+        try:
+            self.file.close()
+        except OSError:
+            pass
+        if os.path.exists(self.tmpName):
+            os.remove(self.tmpName)
+
+    def __enter__(self):
+        return self.file
+
+    def __exit__(self, excType, excValue, traceback):
+        if excType is None:
+            self.commit()
+        else:
+            self.discard()
@@ -0,0 +1,192 @@
+import argparse
+import glob
+import json
+import logging
+import os
+
+from pptx import Presentation as PptxPresentation
+
+from presentation_environment_TW import BuildOptions, Presentation
+
+
+class BatchBuilder:
+    """Build many presentations from the same template.
+
+    The template file is parsed only once. Every job gets an in-memory copy of the parsed template,
+    so the per-deck startup cost does not include reading and parsing the template file.
+    """
+
+    def __init__(self, templateFileName, plotCache=None, plotWorkers=None, imagePipeline=None):
+        """Initialization.
+
+        Set up the logger. Parse the template file.
+
+        Parameters
+        ----------
+        templateFileName : str
+            The name of the template file.
+        plotCache : PlotCache
+            The cache of the rendered plot images, shared by all jobs (see plot_cache_TW).
+        plotWorkers : int
+            The number of worker processes rendering the plots of a presentation.
+        imagePipeline : ImagePipeline
+            The downscaling and re-encoding of the pictures, shared by all jobs (see image_pipeline_TW).
+
+        Raises
+        ----------
+        TypeError
+            If the templateFileName is not a string.
+
+        ValueError
+            If the templateFileName has not .template extension.
+
+        IOError
+            If the template file can not be read.
+        """
+        self._logger = logging.getLogger(self.__class__.__name__)
+        if not type(templateFileName) is str:
+            self._logger.error('Name of the template file must be string.')
+            raise TypeError
+        if not templateFileName.endswith('.template'):
+            self._logger.error('The file extension is wrong.')
+            raise ValueError
+        try:
+            self._template = PptxPresentation(templateFileName)
+        except Exception:
+            self._logger.error('The template file can not be read.')
+            raise IOError
+        self._templateFileName = templateFileName
+        self._plotCache = plotCache
+        self._plotWorkers = plotWorkers
+        self._imagePipeline = imagePipeline
+
+    def build(self, configFileName, outputFileName):
+        """Build one presentation.
+
+        Parameters
+        ----------
+        configFileName : str
+            The name of the configuration (JSON) file.
+        outputFileName : str
+            The name of the output pptx file.
+
+        Returns
+        -------
+        bool
+            True if the pptx generation is successful, False otherwise.
+        """
+        try:
+            return self.generate(configFileName, outputFileName)
+        except Exception:
+            self._logger.exception('The presentation can not be built ({0}).'.format(configFileName))
+            return False
+
+    def generate(self, configFileName, outputFileName):
+        """Build one presentation like build, but the errors are raised (see Presentation.generate).
+
+        Returns
+        -------
+        bool
+            True if the pptx generation is successful, False if the pptx file can not be written.
+        """
+        options = BuildOptions(self._plotCache, self._plotWorkers, self._template, imagePipeline=self._imagePipeline)
+        presentation = Presentation(outputFileName, self._templateFileName, options)
+        return presentation.generate(configFileName)
+
+    def buildAll(self, jobs):
+        """Build the presentations one after another.
+
+        A failing job does not stop the others.
+
+        Parameters
+        ----------
+        jobs : list
+            The (configFileName, outputFileName) pairs.
+
+        Returns
+        -------
+        dict
+            The result of the jobs (True or False) by the name of the output file.
+        """
+        results = {}
+        for configFileName, outputFileName in jobs:
+            results[outputFileName] = self.build(configFileName, outputFileName)
+        self._logger.info('{0} of {1} presentations are built.'.format(sum(results.values()), len(results)))
+        return results
+
+
+def collectJobs(configs, outputDir=None):
+    """Collect the jobs from configuration files and directories.
+
+    Every directory is expanded to the JSON files it contains. The output name of a configuration file is its name
+    with .pptx extension, in the outputDir if it is given, next to the configuration file otherwise.
+
+    Parameters
+    ----------
+    configs : list
+        The names of the configuration files and directories.
+    outputDir : str
+        The directory of the output files.
+
+    Returns
+    -------
+    list
+        The (configFileName, outputFileName) pairs.
+    """
+    jobs = []
+    for config in configs:
+        if os.path.isdir(config):
+            configFileNames = sorted(glob.glob(os.path.join(config, '*.json')))
+        else:
+            configFileNames = [config]
+        for configFileName in configFileNames:
+            outputFileName = os.path.splitext(configFileName)[0] + '.pptx'
+            if outputDir is not None:
+                outputFileName = os.path.join(outputDir, os.path.basename(outputFileName))
+            jobs.append((configFileName, outputFileName))
+    return jobs
+
+
+def readJobs(jobsFileName):
+    """Read the jobs from a JSON file.
+
+    The file contains a list of {"config": ..., "output": ...} objects.
+
+    Parameters
+    ----------
+    jobsFileName : str
+        The name of the jobs file.
+
+    Returns
+    -------
+    list
+        The (configFileName, outputFileName) pairs.
+
+    Raises
+    ----------
+    ValueError
+        If the file contains wrong data.
+    """
+    with open(jobsFileName) as inpf:
+        try:
+            return [(job['config'], job['output']) for job in json.load(inpf)]
+        except (ValueError, KeyError, TypeError):
+            logging.getLogger('BatchBuilder').error('The jobs file contains bad data.')
+            raise ValueError
+
+
+if __name__ == "__main__":
+    logging.basicConfig(format="%(asctime)s %(levelname)s %(message)s", level = logging.INFO)
+    parser = argparse.ArgumentParser(description='Build many presentations from the same template.')
+    parser.add_argument('configs', nargs='*', help='configuration (JSON) files or directories of them')
+    parser.add_argument('--template', default='PYTHON-Course.template', help='the template file')
+    parser.add_argument('--output-dir', help='the directory of the output files')
+    parser.add_argument('--jobs', help='JSON file with a list of {"config": ..., "output": ...} objects')
+    args = parser.parse_args()
+    jobs = collectJobs(args.configs, args.output_dir)
+    if args.jobs:
+        jobs += readJobs(args.jobs)
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    results = BatchBuilder(args.template).buildAll(jobs)
+    raise SystemExit(0 if all(results.values()) else 1)
@@ -0,0 +1,537 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+_UNITS = {'B': 1, 'KB': 1 << 10, 'MB': 1 << 20, 'GB': 1 << 30}
+
+SLIDE_TYPES = ('title', 'text', 'list', 'picture', 'plot')
+
+# the modules which should not be imported by a deck without plots
+HEAVY_MODULES = ('numpy', 'matplotlib')
+
+
+def parseSize(size):
+    """Convert a size like '10MB' to the number of bytes.
+
+    Parameters
+    ----------
+    size : str
+        The number with an optional B, KB, MB or GB unit.
+
+    Returns
+    -------
+    int
+        The number of bytes.
+
+    Raises
+    ----------
+    ValueError
+        If the size is not appropriate.
+    """
+    size = size.strip().upper()
+    for unit in ('KB', 'MB', 'GB', 'B'):
+        if size.endswith(unit):
+            return int(float(size[:-len(unit)]) * _UNITS[unit])
+    return int(size)
+
+
+def peakRss():
+    """Return the peak resident set size of the process in bytes, None if it is not available."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def writeXYData(fileName, size, layout='pairs', seed=0):
+    """Write a synthetic x,y data file of about the given size.
+
+    The file is written in blocks, so GB sized files do not need GB of memory.
+
+    Parameters
+    ----------
+    fileName : str
+        The name of the data file.
+    size : int
+        The approximate size of the file in bytes.
+    layout : str
+        'pairs' for one pair per line, 'oneline' for the (x,y)(x,y)... layout.
+    seed : int
+        The seed of the random numbers.
+
+    Returns
+    -------
+    int
+        The number of points written.
+    """
+    rng = np.random.default_rng(seed)
+    pattern = '({0:.6f},{1:.6f})' if layout == 'oneline' else '{0:.6f} {1:.6f}\n'
+    bytesPerPoint = len(pattern.format(1000.0, 1.0))
+    points = max(2, size // bytesPerPoint)
+    block = 1 << 16
+    level = 0.0
+    with open(fileName, 'w') as outf:
+        for start in range(0, points, block):
+            count = min(block, points - start)
+            x = np.arange(start, start + count) * 1e-3
+            y = level + rng.standard_normal(count).cumsum() * 1e-2
+            level = y[-1]
+            outf.write(''.join(pattern.format(a, b) for a, b in zip(x.tolist(), y.tolist())))
+    return points
+
+
+def writeImage(fileName, width, height, seed=0):
+    """Write a synthetic PNG image of the given size (noise, so it does not compress well)."""
+    from PIL import Image
+    rng = np.random.default_rng(seed)
+    Image.fromarray(rng.integers(0, 256, (height, width, 3), dtype=np.uint8)).save(fileName)
+
+
+def writeConfig(fileName, slidesPerType, pictureFile, dataFile, listLines=5):
+    """Write a synthetic configuration file with the given number of slides of every type.
+
+    Parameters
+    ----------
+    fileName : str
+        The name of the configuration (JSON) file.
+    slidesPerType : int
+        The number of slides of every type.
+    pictureFile : str
+        The picture of the picture slides.
+    dataFile : str
+        The data file of the plot slides.
+    listLines : int
+        The number of lines on a list slide.
+
+    Returns
+    -------
+    int
+        The number of slides.
+    """
+    slides = []
+    for n in range(slidesPerType):
+        slides.append({'type': 'title', 'title': 'Title {0}'.format(n), 'content': 'Subtitle {0}'.format(n)})
+        slides.append({'type': 'text', 'title': 'Text {0}'.format(n), 'content': 'Lorem ipsum dolor sit amet. ' * 10})
+        slides.append({'type': 'list', 'title': 'List {0}'.format(n),
+                       'content': [{'level': 1 + i % 2, 'text': 'Line {0}'.format(i)} for i in range(listLines)]})
+        slides.append({'type': 'picture', 'title': 'Picture {0}'.format(n), 'content': pictureFile})
+        slides.append({'type': 'plot', 'title': 'Plot {0}'.format(n), 'content': dataFile,
+                       'configuration': {'x-label': 'x {0}'.format(n), 'y-label': 'y'}})
+    with open(fileName, 'w') as outf:
+        json.dump({'presentation': slides}, outf)
+    return len(slides)
+
+
+def benchParse(workDir, size, layout):
+    """Measure Plotter.readXYData on a synthetic data file."""
+    from plotter_TW import Plotter
+    dataFile = os.path.join(workDir, 'parse_{0}_{1}.dat'.format(layout, size))
+    points = writeXYData(dataFile, size, layout)
+    start = time.perf_counter()
+    x, y = Plotter(dataFile).readXYData(dataFile)
+    elapsed = time.perf_counter() - start
+    return {'layout': layout, 'bytes': os.path.getsize(dataFile), 'points': int(len(x)), 'seconds': elapsed,
+            'pointsPerSecond': len(x) / elapsed if elapsed else None, 'expectedPoints': points}
+
+
+def _compress(data, compression):
+    """Compress the content of a data file, None if the compression is not available."""
+    import gzip
+    import lzma
+    if compression == 'gzip':
+        return gzip.compress(data)
+    if compression == 'xz':
+        # the preset does not change the speed of the decompression much, the lowest one keeps the setup short
+        return lzma.compress(data, preset=1)
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard.ZstdCompressor().compress(data)
+
+
+def benchCompressed(workDir, size, compression):
+    """Measure XYReader.read on a compressed data file against decompressing it into a temporary file first."""
+    import compressed_TW
+    from xy_reader_TW import XYReader
+    dataFile = os.path.join(workDir, 'compressed_{0}.dat'.format(size))
+    writeXYData(dataFile, size)
+    with open(dataFile, 'rb') as inpf:
+        data = inpf.read()
+    compressed = _compress(data, compression)
+    if compressed is None:
+        return {'compression': compression, 'bytes': len(data), 'available': False}
+    compressedFile = '{0}.{1}'.format(dataFile, compression)
+    with open(compressedFile, 'wb') as outf:
+        outf.write(compressed)
+    start = time.perf_counter()
+    XYReader().read(dataFile)
+    plain = time.perf_counter() - start
+    start = time.perf_counter()
+    tmpName = os.path.join(workDir, 'decompressed.dat')
+    with open(compressedFile, 'rb') as inpf, compressed_TW.decompressingStream(inpf) as stream, open(tmpName, 'wb') as outf:
+        shutil.copyfileobj(stream, outf, XYReader.CHUNK_SIZE)
+    XYReader().read(tmpName)
+    os.remove(tmpName)
+    tempFile = time.perf_counter() - start
+    start = time.perf_counter()
+    x, y = XYReader().read(compressedFile)
+    streamed = time.perf_counter() - start
+    return {'compression': compression, 'bytes': len(data), 'compressedBytes': len(compressed), 'available': True,
+            'points': int(len(x)), 'plainSeconds': plain, 'tempFileSeconds': tempFile, 'streamedSeconds': streamed,
+            'streamedMBPerSecond': len(data) / streamed / (1 << 20) if streamed else None}
+
+
+def benchRender(workDir, size, repeat):
+    """Measure Plotter.generatePlot (read and render) on a synthetic data file."""
+    from plotter_TW import Plotter
+    dataFile = os.path.join(workDir, 'render_{0}.dat'.format(size))
+    writeXYData(dataFile, size)
+    start = time.perf_counter()
+    for n in range(repeat):
+        image = Plotter(dataFile).generatePlot(dataFile, 'x', 'y')
+    elapsed = time.perf_counter() - start
+    return {'bytes': os.path.getsize(dataFile), 'charts': repeat, 'seconds': elapsed,
+            'secondsPerChart': elapsed / repeat, 'imageBytes': len(image.getvalue())}
+
+
+def _renderWithPyplot(series, xLabel, yLabel, legend):
+    """The chart rendered on a new pyplot figure (the baseline of benchCharts)."""
+    import io
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots()
+    try:
+        for name, x, y in series:
+            ax.plot(x, y, label=name)
+        if legend:
+            ax.legend()
+        ax.set_xlabel(xLabel)
+        ax.set_ylabel(yLabel)
+        image = io.BytesIO()
+        fig.savefig(image, format='png')
+    finally:
+        plt.close(fig)
+    return image
+
+
+def benchCharts(workDir, points, charts):
+    """Measure the charts per second of ChartRenderer against a new pyplot figure per chart (rendering only)."""
+    from plotter_TW import ChartRenderer
+    rng = np.random.default_rng(0)
+    x = np.arange(points, dtype=float)
+    data = [[(None, x, np.cumsum(rng.standard_normal(points)))] for n in range(charts)]
+    start = time.perf_counter()
+    for series in data:
+        baselineImage = _renderWithPyplot(series, 'x', 'y', False)
+    baseline = time.perf_counter() - start
+    renderer = ChartRenderer()
+    start = time.perf_counter()
+    for series in data:
+        image = renderer.render(series, 'x', 'y')
+    fast = time.perf_counter() - start
+    return {'points': points, 'charts': charts, 'pyplotChartsPerSecond': charts / baseline,
+            'rendererChartsPerSecond': charts / fast, 'speedup': baseline / fast,
+            'sameImage': image.getvalue() == baselineImage.getvalue()}
+
+
+def benchNativeCharts(workDir, templateFileName, count, dpi):
+    """Measure the plot slides built as rendered images (at the given dpi) against native charts: build time and output size."""
+    import matplotlib
+    matplotlib.rcParams['figure.dpi'] = dpi
+    from presentation_generator_TW import PresentationGenerator
+    from plotter_TW import NATIVE_CHART_POINTS, Plotter
+    dataFile = os.path.join(workDir, 'native.dat')
+    writeXYData(dataFile, 1 << 20)
+    plotter = Plotter(dataFile)
+    result = {'slides': count, 'dpi': dpi, 'chartPoints': NATIVE_CHART_POINTS}
+    for kind in ('image', 'native'):
+        outputFileName = os.path.join(workDir, 'native_{0}.pptx'.format(kind))
+        generator = PresentationGenerator(outputFileName, templateFileName)
+        start = time.perf_counter()
+        for n in range(count):
+            # every slide has its own label, so the images are not shared between the slides
+            yLabel = 'y{0}'.format(n)
+            if kind == 'image':
+                generator.addPlot(5, 'Plot', plotter.generatePlot(dataFile, 'x', yLabel, 'lttb'))
+            else:
+                generator.addChart(5, 'Plot', plotter.chartSeries(dataFile), 'x', yLabel)
+        generator.finalize()
+        result[kind + 'Seconds'] = time.perf_counter() - start
+        result[kind + 'Bytes'] = os.path.getsize(outputFileName)
+    return result
+
+
+def benchSlides(workDir, templateFileName, stype, count, imageSize):
+    """Measure the PresentationGenerator.add* call of a slide type and the final save."""
+    import io
+    from presentation_generator_TW import PresentationGenerator
+    from plotter_TW import Plotter
+    outputFileName = os.path.join(workDir, 'slides_{0}.pptx'.format(stype))
+    generator = PresentationGenerator(outputFileName, templateFileName)
+    pictureFile = os.path.join(workDir, 'slides_{0}x{1}.png'.format(*imageSize))
+    if stype == 'picture':
+        writeImage(pictureFile, *imageSize)
+    if stype == 'plot':
+        dataFile = os.path.join(workDir, 'slides.dat')
+        writeXYData(dataFile, 1 << 16)
+        plotImage = Plotter(dataFile).generatePlot(dataFile, 'x', 'y').getvalue()
+    start = time.perf_counter()
+    for n in range(count):
+        if stype == 'title':
+            generator.addTitle(0, 'Title', 'Subtitle')
+        elif stype == 'text':
+            generator.addText(5, 'Text', 'Lorem ipsum dolor sit amet. ' * 10)
+        elif stype == 'list':
+            generator.addList(1, 'List', [1, 2, 2, 1, 1], ['Line'] * 5)
+        elif stype == 'picture':
+            generator.addImage(5, 'Picture', pictureFile)
+        elif stype == 'plot':
+            generator.addPlot(5, 'Plot', io.BytesIO(plotImage))
+    added = time.perf_counter()
+    generator.finalize()
+    saved = time.perf_counter()
+    return {'slideType': stype, 'imageSize': list(imageSize) if stype == 'picture' else None,
+            'slides': count, 'secondsPerSlide': (added - start) / count, 'saveSeconds': saved - added,
+            'outputBytes': os.path.getsize(outputFileName)}
+
+
+def _addListPerParagraph(generator, layout, title, levels, text):
+    """The list slide built paragraph by paragraph through the python-pptx objects (the baseline of benchList)."""
+    slide = generator._presentation.slides.add_slide(generator._presentation.slide_layouts[layout])
+    slide.shapes.title.text = title
+    textFrame = slide.shapes.placeholders[1].text_frame
+    for level, line in zip(levels, text):
+        paragraph = textFrame.add_paragraph()
+        paragraph.level = level
+        paragraph.text = line
+
+
+def benchList(workDir, templateFileName, lines):
+    """Measure PresentationGenerator.addList on a long list against the paragraph by paragraph construction."""
+    from presentation_generator_TW import PresentationGenerator
+    levels = [1 + n % 2 for n in range(lines)]
+    text = ['Inventory item {0}'.format(n) for n in range(lines)]
+    outputFileName = os.path.join(workDir, 'list.pptx')
+    generator = PresentationGenerator(outputFileName, templateFileName)
+    start = time.perf_counter()
+    _addListPerParagraph(generator, 1, 'List', levels, text)
+    baseline = time.perf_counter() - start
+    generator = PresentationGenerator(outputFileName, templateFileName)
+    start = time.perf_counter()
+    generator.addList(1, 'List', levels, text, 0)
+    bulk = time.perf_counter() - start
+    generator = PresentationGenerator(outputFileName, templateFileName)
+    start = time.perf_counter()
+    generator.addList(1, 'List', levels, text)
+    continued = time.perf_counter() - start
+    return {'lines': lines, 'perParagraphSeconds': baseline, 'bulkSeconds': bulk,
+            'speedup': baseline / bulk if bulk else None, 'continuedSeconds': continued, 'continuedSlides': generator.slideCount()}
+
+
+def benchPipeline(workDir, templateFileName, slidesPerType, dataSize, imageSize):
+    """Measure Presentation.generate on a synthetic configuration."""
+    from presentation_environment_TW import Presentation
+    dataFile = os.path.join(workDir, 'pipeline.dat')
+    pictureFile = os.path.join(workDir, 'pipeline.png')
+    configFileName = os.path.join(workDir, 'pipeline.json')
+    outputFileName = os.path.join(workDir, 'pipeline.pptx')
+    writeXYData(dataFile, dataSize)
+    writeImage(pictureFile, *imageSize)
+    slides = writeConfig(configFileName, slidesPerType, pictureFile, dataFile)
+    start = time.perf_counter()
+    Presentation(outputFileName, templateFileName).generate(configFileName)
+    elapsed = time.perf_counter() - start
+    return {'slides': slides, 'seconds': elapsed, 'secondsPerSlide': elapsed / slides,
+            'outputBytes': os.path.getsize(outputFileName)}
+
+
+def benchShards(workDir, templateFileName, slidesPerType, shards, dataSize, imageSize):
+    """Measure Presentation.generate building the deck in shards (1 means the build in one process)."""
+    from presentation_environment_TW import BuildOptions, Presentation
+    dataFile = os.path.join(workDir, 'shards.dat')
+    pictureFile = os.path.join(workDir, 'shards.png')
+    configFileName = os.path.join(workDir, 'shards.json')
+    outputFileName = os.path.join(workDir, 'shards.pptx')
+    writeXYData(dataFile, dataSize)
+    writeImage(pictureFile, *imageSize)
+    slides = writeConfig(configFileName, slidesPerType, pictureFile, dataFile)
+    start = time.perf_counter()
+    Presentation(outputFileName, templateFileName, BuildOptions(shards=shards)).generate(configFileName)
+    elapsed = time.perf_counter() - start
+    return {'slides': slides, 'shards': shards, 'cpus': os.cpu_count(), 'seconds': elapsed, 'slidesPerSecond': slides / elapsed,
+            'outputBytes': os.path.getsize(outputFileName)}
+
+
+def benchOptimize(workDir, templateFileName, count, imageSize, imageFormat):
+    """Measure the optimizing save against the python-pptx save: save time, output size and the time of reading every part back."""
+    import zipfile
+    from presentation_generator_TW import PresentationGenerator
+    pictureFiles = []
+    for n in range(count):
+        # every slide has its own picture, so they are not shared
+        pictureFiles.append(os.path.join(workDir, 'optimize{0}.{1}'.format(n, imageFormat)))
+        writeImage(pictureFiles[-1], *imageSize, seed=n)
+    result = {'slides': count, 'imageSize': list(imageSize), 'imageFormat': imageFormat}
+    for kind, optimize in (('default', False), ('optimized', True)):
+        outputFileName = os.path.join(workDir, 'optimize_{0}.pptx'.format(kind))
+        generator = PresentationGenerator(outputFileName, templateFileName, optimize=optimize)
+        for n, pictureFile in enumerate(pictureFiles):
+            generator.addImage(5, 'Picture', pictureFile)
+            generator.addList(1, 'List', [1, 2, 2], ['Line {0}'.format(n)] * 3)
+        start = time.perf_counter()
+        generator.finalize()
+        result[kind + 'SaveSeconds'] = time.perf_counter() - start
+        result[kind + 'Bytes'] = os.path.getsize(outputFileName)
+        start = time.perf_counter()
+        with zipfile.ZipFile(outputFileName) as package:
+            for name in package.namelist():
+                package.read(name)
+        result[kind + 'ReadSeconds'] = time.perf_counter() - start
+    result['savedBytes'] = result['defaultBytes'] - result['optimizedBytes']
+    return result
+
+
+def benchStartup(workDir, templateFileName, repeat):
+    """Measure the startup of a fresh interpreter: the import of the entry point and a small deck without plots."""
+    sourceDir = os.path.dirname(os.path.abspath(__file__))
+    configFileName = os.path.join(workDir, 'startup.json')
+    outputFileName = os.path.join(workDir, 'startup.pptx')
+    with open(configFileName, 'w') as outf:
+        json.dump({'presentation': [{'type': 'title', 'title': 'Title', 'content': 'Subtitle'},
+                                    {'type': 'list', 'title': 'List', 'content': [{'level': 1, 'text': 'Line'}]}]}, outf)
+    probe = ('import json, sys, presentation_environment_TW; '
+             'print(json.dumps([m for m in {0!r} if m in sys.modules]))'.format(HEAVY_MODULES))
+    commands = {
+        'python': [sys.executable, '-c', 'pass'],
+        'import': [sys.executable, '-c', 'import presentation_environment_TW'],
+        'deck': [sys.executable, os.path.join(sourceDir, 'presentation_environment_TW.py'), configFileName, outputFileName,
+                 '--template', os.path.abspath(templateFileName)],
+    }
+    result = {'runs': repeat}
+    for name, command in commands.items():
+        times = []
+        for n in range(repeat):
+            start = time.perf_counter()
+            subprocess.run(command, cwd=sourceDir, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            times.append(time.perf_counter() - start)
+        result[name + 'Seconds'] = min(times)
+    heavy = subprocess.run([sys.executable, '-c', probe], cwd=sourceDir, check=True, stdout=subprocess.PIPE).stdout
+    result['heavyModules'] = json.loads(heavy)
+    return result
+
+
+def _runCase(name, func, args):
+    """Run a benchmark case and add the peak RSS of the process."""
+    logging.getLogger().setLevel(logging.WARNING)
+    result = func(*args)
+    result['benchmark'] = name
+    result['peakRssBytes'] = peakRss()
+    return result
+
+
+def cases(args, workDir):
+    """Yield the (name, function, arguments) of the selected benchmark cases."""
+    sizes = [parseSize(size) for size in args.data_sizes.split(',')]
+    imageSizes = [tuple(int(v) for v in size.lower().split('x')) for size in args.image_sizes.split(',')]
+    if 'parse' in args.only:
+        for size in sizes:
+            for layout in ('pairs', 'oneline'):
+                yield ('parse', benchParse, (workDir, size, layout))
+    if 'compressed' in args.only:
+        for size in sizes:
+            for compression in ('gzip', 'xz', 'zstd'):
+                yield ('compressed', benchCompressed, (workDir, size, compression))
+    if 'render' in args.only:
+        for size in sizes:
+            yield ('render', benchRender, (workDir, size, args.repeat))
+    if 'charts' in args.only:
+        for points in args.chart_points.split(','):
+            yield ('charts', benchCharts, (workDir, int(points), args.charts))
+    if 'native' in args.only:
+        for dpi in args.chart_dpi.split(','):
+            yield ('native', benchNativeCharts, (workDir, args.template, args.slides, int(dpi)))
+    if 'slides' in args.only:
+        for stype in SLIDE_TYPES:
+            for imageSize in imageSizes if stype == 'picture' else imageSizes[:1]:
+                yield ('slides', benchSlides, (workDir, args.template, stype, args.slides, imageSize))
+    if 'list' in args.only:
+        for lines in args.list_lines.split(','):
+            yield ('list', benchList, (workDir, args.template, int(lines)))
+    if 'pipeline' in args.only:
+        yield ('pipeline', benchPipeline, (workDir, args.template, args.slides, sizes[0], imageSizes[0]))
+    if 'shards' in args.only:
+        for shards in args.shards.split(','):
+            yield ('shards', benchShards, (workDir, args.template, args.slides, int(shards), sizes[0], imageSizes[0]))
+    if 'optimize' in args.only:
+        for imageSize in imageSizes:
+            for imageFormat in ('png', 'jpeg'):
+                yield ('optimize', benchOptimize, (workDir, args.template, args.slides, imageSize, imageFormat))
+    if 'startup' in args.only:
+        yield ('startup', benchStartup, (workDir, args.template, args.repeat))
+
+
+def run(args):
+    """Run every selected case in a fresh process, so the peak RSS belongs to the case only.
+
+    Returns
+    -------
+    dict
+        The environment and the results of the cases.
+    """
+    workDir = tempfile.mkdtemp(prefix='benchmark', dir=args.work_dir)
+    results = []
+    try:
+        for name, func, caseArgs in cases(args, workDir):
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                result = executor.submit(_runCase, name, func, caseArgs).result()
+            logging.info('{0}: {1}'.format(name, result))
+            results.append(result)
+    finally:
+        shutil.rmtree(workDir, ignore_errors=True)
+    return {'python': platform.python_version(), 'platform': platform.platform(), 'numpy': np.__version__,
+            'results': results}
+
+
+BENCHMARKS = ('parse', 'compressed', 'render', 'charts', 'native', 'slides', 'list', 'pipeline', 'shards', 'optimize', 'startup')
+
+
+if __name__ == "__main__":
+    logging.basicConfig(format="%(asctime)s %(levelname)s %(message)s", level = logging.INFO)
+    parser = argparse.ArgumentParser(description='Benchmark the deck generation pipeline and report the results as JSON.')
+    parser.add_argument('--only', default=','.join(BENCHMARKS), help='comma separated benchmarks: ' + ', '.join(BENCHMARKS))
+    parser.add_argument('--data-sizes', default='10KB,1MB,50MB', help='comma separated sizes of the data files (B, KB, MB, GB)')
+    parser.add_argument('--image-sizes', default='640x480,4000x3000', help='comma separated sizes of the pictures (WIDTHxHEIGHT)')
+    parser.add_argument('--list-lines', default='100,1000,10000', help='comma separated numbers of lines of the list benchmark')
+    parser.add_argument('--shards', default='1,2,4', help='comma separated numbers of shards of the shards benchmark (for 2000 slides use --slides 400)')
+    parser.add_argument('--chart-points', default='100,2000', help='comma separated numbers of points of the charts benchmark')
+    parser.add_argument('--charts', type=int, default=50, help='number of charts rendered in the charts benchmark')
+    parser.add_argument('--chart-dpi', default='100,200', help='comma separated resolutions of the plot images compared with the native charts')
+    parser.add_argument('--slides', type=int, default=20, help='number of slides of every type')
+    parser.add_argument('--repeat', type=int, default=5, help='number of charts rendered in the render benchmark, number of runs in the startup benchmark')
+    parser.add_argument('--template', default='PYTHON-Course.template', help='the template file')
+    parser.add_argument('--work-dir', help='directory of the temporary files (default: the system temp directory)')
+    parser.add_argument('--output', help='the JSON report (default: standard output)')
+    args = parser.parse_args()
+    args.only = args.only.split(',')
+    report = json.dumps(run(args), indent=2)
+    if args.output:
+        with open(args.output, 'w') as outf:
+            outf.write(report)
+    else:
+        print(report)
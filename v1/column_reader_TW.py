@@ -0,0 +1,318 @@
+import collections
+import io
+import logging
+import os
+import warnings
+
+import numpy as np
+
+import compressed_TW
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DELIMITERS = (b'\t', b',', b';')
+HEADER_CHUNK_SIZE = 1 << 16
+
+
+def _firstLine(data):
+    """Return the offset and the first line of the data which is not blank and not a comment (b'' if there is none)."""
+    offset = 0
+    while offset < len(data):
+        end = data.find(b'\n', offset)
+        end = len(data) if end < 0 else end + 1
+        first = data[offset:end]
+        if first.strip() and not first.lstrip().startswith(b'#'):
+            return (offset, first)
+        offset = end
+    return (offset, b'')
+
+
+def _header(first):
+    """Detect the delimiter and the header of the first line.
+
+    Returns
+    -------
+    delimiter, names, isHeader
+        The delimiter (None for whitespace), the names of the columns, and True if the line is a header.
+    """
+    delimiter = next((d for d in DELIMITERS if d in first), None)
+    fields = [field.strip() for field in (first.split(delimiter) if delimiter else first.split())]
+    for field in fields:
+        try:
+            float(field)
+        except ValueError:
+            return (delimiter, [field.decode('utf-8', 'replace').strip('"\'') for field in fields], True)
+    return (delimiter, [str(n) for n in range(len(fields))], False)
+
+
+def columnNames(inputFile):
+    """Read the names of the columns of a data file from its first lines, without parsing the body.
+
+    Parameters
+    ----------
+    inputFile : str
+        The name of the data file. It can be compressed (see compressed_TW).
+
+    Returns
+    -------
+    list
+        The names of the columns (from the header, or '0', '1'... if the file has no header).
+
+    Raises
+    ----------
+    IOError
+        If the file can not be read, or its compression is not supported or broken.
+
+    ValueError
+        If the file is empty.
+    """
+    data = b''
+    try:
+        with open(inputFile, 'rb') as inpf, compressed_TW.decompressingStream(inpf) as stream:
+            while True:
+                chunk = stream.read(HEADER_CHUNK_SIZE)
+                data += chunk
+                offset, first = _firstLine(data)
+                if not chunk or first.endswith(b'\n'):
+                    break
+    except OSError:
+        raise IOError
+    if not first:
+        raise ValueError
+    return _header(first)[1]
+
+
+class ColumnTable:
+    """The parsed columns of a data file.
+
+    Attributes
+    ----------
+    names : list
+        The names of the columns (from the header, or '0', '1'... if the file has no header).
+    values : numpy array
+        The data as a (columns, rows) float64 array, so every column is contiguous.
+    """
+
+    def __init__(self, names, values):
+        self.names = names
+        self.values = values
+        self._index = {name: n for n, name in enumerate(names)}
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes
+
+    def column(self, key):
+        """Return a column by its name or by its index.
+
+        Parameters
+        ----------
+        key : str or int
+            The name or the index of the column.
+
+        Returns
+        -------
+        numpy array
+            The values of the column.
+
+        Raises
+        ----------
+        KeyError
+            If there is no such column.
+        """
+        if type(key) is int:
+            if not -len(self.names) <= key < len(self.names):
+                raise KeyError(key)
+            return self.values[key]
+        return self.values[self._index[key]]
+
+
+class ColumnReader:
+    """Reader of the CSV-like data files with a header and many columns.
+
+    The delimiter (tab, comma, semicolon or whitespace) and the header are detected from the first lines.
+    The body is parsed in one vectorized pass; if it has missing values or comment lines, numpy's slower
+    genfromtxt is used instead (the missing values become NaN).
+    The parsed tables are kept in memory by the name, size and modification time of the file, so the plots
+    of the same file read it only once. The least recently used tables are dropped when their size exceeds the limit.
+    """
+
+    def __init__(self, maxBytes=DEFAULT_MAX_BYTES):
+        """Initialization.
+
+        Parameters
+        ----------
+        maxBytes : int
+            The maximal total size of the tables kept in memory.
+        """
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self._maxBytes = maxBytes
+        self._tables = collections.OrderedDict()
+        self._bytes = 0
+
+    def read(self, inputFile, data=None):
+        """Read a data file, or return it from the memory if it is already read.
+
+        Parameters
+        ----------
+        inputFile : str
+            The name of the data file. It can be compressed (see compressed_TW).
+        data : bytes
+            The content of the data file, if it is already in memory (see prefetch_TW).
+
+        Returns
+        -------
+        ColumnTable
+            The parsed columns.
+
+        Raises
+        ----------
+        IOError
+            If the file can not be read, or its compression is not supported or broken.
+
+        ValueError
+            If the file contains wrong data.
+        """
+        try:
+            info = os.stat(inputFile)
+        except OSError:
+            self._logger.error('Input file can not be read.')
+            raise IOError
+        key = (os.path.abspath(inputFile), info.st_size, info.st_mtime_ns)
+        table = self._tables.get(key)
+        if table is not None:
+            self._tables.move_to_end(key)
+            return table
+        try:
+            if data is None:
+                with open(inputFile, 'rb') as inpf, compressed_TW.decompressingStream(inpf) as stream:
+                    data = stream.read()
+            else:
+                data = compressed_TW.decompress(data)
+        except OSError:
+            self._logger.error('Input file can not be read.')
+            raise IOError
+        table = self.parse(data)
+        self._tables[key] = table
+        self._bytes += table.nbytes
+        while self._bytes > self._maxBytes and len(self._tables) > 1:
+            key, dropped = self._tables.popitem(last=False)
+            self._bytes -= dropped.nbytes
+        self._logger.info('{0} is read ({1} columns, {2} rows).'.format(inputFile, len(table.names), table.values.shape[1]))
+        return table
+
+    def select(self, inputFile, xColumn, yColumns, data=None):
+        """Select the columns of a plot.
+
+        Parameters
+        ----------
+        inputFile : str
+            The name of the data file.
+        xColumn : str or int
+            The name or the index of the x column. None means the first column.
+        yColumns : str, int or list
+            The names or the indices of the y columns.
+        data : bytes
+            The content of the data file, if it is already in memory.
+
+        Returns
+        -------
+        x, series
+            The x column, and the list of (name, y column) pairs.
+
+        Raises
+        ----------
+        ValueError
+            If a column does not exist.
+        """
+        table = self.read(inputFile, data)
+        if not type(yColumns) is list:
+            yColumns = [yColumns]
+        try:
+            x = table.column(0 if xColumn is None else xColumn)
+            series = [(key if type(key) is str else table.names[key], table.column(key)) for key in yColumns]
+        except (KeyError, IndexError, TypeError):
+            self._logger.error('There is no such column in {0}.'.format(inputFile))
+            raise ValueError
+        return (x, series)
+
+    def clear(self):
+        """Drop the tables kept in memory."""
+        self._tables.clear()
+        self._bytes = 0
+
+    def parse(self, data):
+        """Parse the content of a data file.
+
+        Parameters
+        ----------
+        data : bytes
+            The content of the data file.
+
+        Returns
+        -------
+        ColumnTable
+            The parsed columns.
+
+        Raises
+        ----------
+        ValueError
+            If the data is empty or the rows have different number of values.
+        """
+        # blank and comment lines before the header
+        offset, first = _firstLine(data)
+        if not first:
+            self._logger.error('The data file is empty.')
+            raise ValueError
+        delimiter, names, isHeader = _header(first)
+        if isHeader:
+            offset += len(first)
+        body = data[offset:]
+        values = self._parseFast(body, delimiter, len(names))
+        if values is None:
+            values = self._parseSlow(body, delimiter, len(names))
+        return ColumnTable(names, np.ascontiguousarray(values.T))
+
+    @staticmethod
+    def _parseFast(body, delimiter, columns):
+        """Parse the body in one pass. Return None if the result can not be trusted (missing values, ragged rows, comments)."""
+        if b'#' in body:
+            return None
+        text = body.replace(b'\r', b' ')
+        if delimiter is not None:
+            text = text.replace(delimiter, b' ')
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', DeprecationWarning)
+            try:
+                values = np.fromstring(text, dtype=np.float64, sep=' ')
+            except (DeprecationWarning, ValueError):
+                return None
+        if values.size % columns:
+            return None
+        rows = values.size // columns
+        newlines = np.flatnonzero(np.frombuffer(body, dtype=np.uint8) == 10)
+        if body and not body.endswith(b'\n'):
+            newlines = np.append(newlines, len(body))
+        if newlines.size != rows:
+            # blank lines or rows broken into several lines
+            return None
+        if delimiter is not None and columns > 1:
+            delimiters = np.flatnonzero(np.frombuffer(body, dtype=np.uint8) == delimiter[0])
+            perRow = np.diff(np.searchsorted(delimiters, newlines), prepend=0)
+            if np.any(perRow != columns - 1):
+                return None
+        return values.reshape(rows, columns)
+
+    def _parseSlow(self, body, delimiter, columns):
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                values = np.genfromtxt(io.BytesIO(body), dtype=np.float64, delimiter=delimiter, comments='#', ndmin=2)
+        except ValueError:
+            self._logger.error('The rows of the data file have different number of values.')
+            raise ValueError
+        if values.size == 0:
+            return np.empty((0, columns))
+        if values.shape[1] != columns:
+            self._logger.error('The number of values differs from the number of columns.')
+            raise ValueError
+        return values
@@ -0,0 +1,140 @@
+import gzip
+import io
+import logging
+import lzma
+import zlib
+
+# magic bytes -> name of the compression
+MAGICS = (
+    (b'\x1f\x8b', 'gzip'),
+    (b'\xfd7zXZ\x00', 'xz'),
+    (b'\x28\xb5\x2f\xfd', 'zstd'),
+)
+MAGIC_SIZE = max(len(magic) for magic, compression in MAGICS)
+
+_logger = logging.getLogger('Compressed')
+
+
+def detectCompression(head):
+    """Detect the compression of a content by its magic bytes.
+
+    Parameters
+    ----------
+    head : bytes
+        The first bytes of the content (at least MAGIC_SIZE, if the content is not shorter).
+
+    Returns
+    -------
+    str
+        'gzip', 'xz' or 'zstd', None if the content is not compressed.
+    """
+    for magic, compression in MAGICS:
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+class DecompressingReader:
+    """Binary stream of the decompressed content of a compressed stream.
+
+    The content is decompressed while it is read, read(size) never returns more than size bytes, so a large file
+    is parsed in bounded chunks without a temporary file. The errors of the decompression (broken or truncated data)
+    are raised as IOError. Closing the reader does not close the compressed stream.
+    """
+
+    def __init__(self, stream, compression):
+        """Initialization.
+
+        Parameters
+        ----------
+        stream : file object
+            The compressed stream opened in binary mode.
+        compression : str
+            'gzip', 'xz' or 'zstd' (see detectCompression).
+
+        Raises
+        ----------
+        IOError
+            If the compression is not supported (the zstd format needs the zstandard package).
+        """
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self.compression = compression
+        self._errors = (EOFError, zlib.error, lzma.LZMAError)
+        if compression == 'gzip':
+            self._reader = gzip.GzipFile(fileobj=stream, mode='rb')
+        elif compression == 'xz':
+            self._reader = lzma.LZMAFile(stream)
+        elif compression == 'zstd':
+            try:
+                import zstandard
+            except ImportError:
+                self._logger.error('The zstandard package is needed to read zstd compressed files.')
+                raise IOError
+            self._errors += (zstandard.ZstdError,)
+            self._reader = zstandard.ZstdDecompressor().stream_reader(stream, read_across_frames=True, closefd=False)
+        else:
+            self._logger.error('Unknown compression: {0}.'.format(compression))
+            raise IOError
+
+    def read(self, size=-1):
+        """Read and decompress at most size bytes, the whole remaining content if size is negative."""
+        try:
+            return self._reader.read(size)
+        except self._errors:
+            self._logger.error('The {0} compressed data is broken.'.format(self.compression))
+            raise IOError
+
+    def close(self):
+        self._reader.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def decompressingStream(stream):
+    """Return a stream of the decompressed content if the stream is compressed, the stream itself otherwise.
+
+    Parameters
+    ----------
+    stream : file object
+        The stream opened in binary mode. It must support peek (e.g. a file opened with open) or seek (e.g. io.BytesIO).
+
+    Returns
+    -------
+    file object
+        A DecompressingReader, or the stream if it is not compressed.
+
+    Raises
+    ----------
+    IOError
+        If the compression is not supported.
+    """
+    if hasattr(stream, 'peek'):
+        head = stream.peek(MAGIC_SIZE)[:MAGIC_SIZE]
+    else:
+        position = stream.tell()
+        head = stream.read(MAGIC_SIZE)
+        stream.seek(position)
+    compression = detectCompression(head)
+    if compression is None:
+        return stream
+    _logger.info('The data is {0} compressed.'.format(compression))
+    return DecompressingReader(stream, compression)
+
+
+def decompress(data):
+    """Return the decompressed content of an in-memory file, the content itself if it is not compressed.
+
+    Raises
+    ----------
+    IOError
+        If the compression is not supported or the data is broken.
+    """
+    compression = detectCompression(data[:MAGIC_SIZE])
+    if compression is None:
+        return data
+    with DecompressingReader(io.BytesIO(data), compression) as stream:
+        return stream.read()
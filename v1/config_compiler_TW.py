@@ -0,0 +1,355 @@
+import json
+import logging
+import os
+
+# the methods of decimation_TW; it is not imported here, because it needs numpy
+DOWNSAMPLE_METHODS = ('lttb', 'minmax')
+# the kinds of the plot slides: a rendered image or a native chart object
+CHART_KINDS = ('image', 'native')
+# the levels of a list line in a presentation
+MAX_LIST_LEVEL = 8
+
+
+class SlidePlan:
+    """The compiled form of a slide entry of the configuration.
+
+    The plans are checked and resolved once before the first slide is built: the layout is looked up in the template
+    and the file names are made absolute. Every slide type has its own record with only the fields it needs.
+
+    Attributes
+    ----------
+    index : int
+        The position of the entry in the configuration.
+    stype : str
+        The type of the slide.
+    layout : int
+        The number of the resolved layout.
+    path : str
+        The absolute name of the file of the slide (picture or data file), None if the slide has no file.
+    """
+
+    __slots__ = ('index', 'stype', 'layout', 'path')
+
+    def __init__(self, index, stype, layout, path=None):
+        self.index = index
+        self.stype = stype
+        self.layout = layout
+        self.path = path
+
+    def values(self):
+        """Return the fields the content of the slide depends on, as a JSON serializable list."""
+        return [getattr(self, name) for name in type(self).__slots__]
+
+
+class TitlePlan(SlidePlan):
+    __slots__ = ('title', 'subtitle')
+
+
+class TextPlan(SlidePlan):
+    __slots__ = ('title', 'text')
+
+
+class ListPlan(SlidePlan):
+    __slots__ = ('title', 'levels', 'texts', 'linesPerSlide')
+
+
+class PicturePlan(SlidePlan):
+    __slots__ = ('title',)
+
+
+class PlotPlan(SlidePlan):
+    __slots__ = ('title', 'xLabel', 'yLabel', 'downsample', 'columns', 'chart')
+
+
+class CustomPlan(SlidePlan):
+    """A slide of a registered type; its handler gets the entry of the configuration as it is."""
+    __slots__ = ('entry',)
+
+
+class ConfigCompiler:
+    """Checker and compiler of the configuration.
+
+    Every entry is checked against the schema of its slide type (the required keys and their types, the existence of the
+    files), and all the errors of the configuration are collected, so a bad configuration is refused before any slide is built.
+    The valid entries are compiled into SlidePlan records, which are consumed by the slide builders.
+    """
+
+    # slide type -> name of the method compiling its entries
+    COMPILERS = {
+        'title': '_compileTitle',
+        'text': '_compileText',
+        'list': '_compileList',
+        'picture': '_compilePicture',
+        'plot': '_compilePlot',
+    }
+
+    def __init__(self, slideTypes, resolveLayout, typedTypes=None):
+        """Initialization.
+
+        Parameters
+        ----------
+        slideTypes : dict
+            The registered slide types (slide type -> (handler, name of the layout)).
+        resolveLayout : callable
+            It returns the number of the layout of a slide type.
+        typedTypes : set
+            The slide types built by their own plan records; the other registered types give CustomPlan records.
+            None means every type of COMPILERS.
+        """
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self._slideTypes = slideTypes
+        self._resolveLayout = resolveLayout
+        self._typedTypes = set(self.COMPILERS) if typedTypes is None else typedTypes
+        self._files = {}
+        self._columnNames = {}
+
+    def compile(self, entries):
+        """Check and compile the whole configuration.
+
+        Parameters
+        ----------
+        entries : iterable
+            The slide entries of the configuration (see config_stream_TW).
+
+        Returns
+        -------
+        list
+            The SlidePlan records in the order of the entries.
+
+        Raises
+        ----------
+        ValueError
+            If any entry is wrong. Every error is logged before, and the messages are the text of the exception.
+        """
+        plans, errors = self._compile(entries, True)
+        if errors:
+            self.raiseErrors(errors)
+        return plans
+
+    def iterCompile(self, entries):
+        """Compile the configuration entry by entry, while its slides are built.
+
+        Only the current entry is held in memory. The configuration should be checked before (see check): an error
+        raises ValueError only when its entry is reached, after the slides of the previous entries are built.
+
+        Parameters
+        ----------
+        entries : iterable
+            The slide entries of the configuration.
+
+        Returns
+        -------
+        generator
+            The SlidePlan records in the order of the entries.
+
+        Raises
+        ----------
+        ValueError
+            If an entry is wrong. The error is logged before.
+        """
+        self._files.clear()
+        self._columnNames.clear()
+        iterator = iter(entries)
+        index = 0
+        while True:
+            try:
+                dat = next(iterator)
+            except StopIteration:
+                return
+            except ValueError:
+                self.raiseErrors(['Entry {0}: the configuration is not valid JSON.'.format(index)])
+            try:
+                plan = self._compileEntry(index, dat)
+            except ValueError as error:
+                self.raiseErrors(['Entry {0}: {1}'.format(index, error)])
+            yield plan
+            index += 1
+
+    def raiseErrors(self, errors):
+        """Log the error messages of a configuration and raise them.
+
+        Raises
+        ----------
+        ValueError
+            Always; the messages are the text of the exception.
+        """
+        for error in errors:
+            self._logger.error(error)
+        self._logger.error('The configuration contains {0} wrong entries.'.format(len(errors)))
+        raise ValueError(' '.join(errors))
+
+    def check(self, entries):
+        """Check the whole configuration without keeping the plans.
+
+        Parameters
+        ----------
+        entries : iterable
+            The slide entries of the configuration.
+
+        Returns
+        -------
+        list
+            The error messages, empty if the configuration is correct.
+        """
+        return self._compile(entries, False)[1]
+
+    def _compile(self, entries, keep):
+        plans = []
+        errors = []
+        self._files.clear()
+        self._columnNames.clear()
+        index = -1
+        try:
+            for index, dat in enumerate(entries):
+                try:
+                    plan = self._compileEntry(index, dat)
+                except ValueError as error:
+                    errors.append('Entry {0}: {1}'.format(index, error))
+                    continue
+                if keep:
+                    plans.append(plan)
+        except ValueError:
+            # the configuration stream itself is broken, the entries after it can not be read
+            errors.append('Entry {0}: the configuration is not valid JSON.'.format(index + 1))
+        return (plans, errors)
+
+    def _compileEntry(self, index, dat):
+        if not type(dat) is dict:
+            raise ValueError('the entry must be an object.')
+        stype = dat.get('type')
+        if not type(stype) is str:
+            raise ValueError("the 'type' must be a string.")
+        if stype not in self._slideTypes:
+            raise ValueError("unknown slide type '{0}'.".format(stype))
+        head = (index, stype, self._resolveLayout(stype))
+        if stype in self._typedTypes and stype in self.COMPILERS:
+            return getattr(self, self.COMPILERS[stype])(head, dat)
+        plan = CustomPlan(*head)
+        plan.entry = dat
+        return plan
+
+    def _compileTitle(self, head, dat):
+        plan = TitlePlan(*head)
+        plan.title = self._string(dat, 'title')
+        plan.subtitle = self._string(dat, 'content')
+        return plan
+
+    def _compileText(self, head, dat):
+        plan = TextPlan(*head)
+        plan.title = self._string(dat, 'title')
+        plan.text = self._string(dat, 'content')
+        return plan
+
+    def _compileList(self, head, dat):
+        plan = ListPlan(*head)
+        plan.title = self._string(dat, 'title')
+        content = dat.get('content')
+        if not type(content) is list:
+            raise ValueError("the 'content' of a list must be an array.")
+        levels = []
+        texts = []
+        for item in content:
+            if not type(item) is dict or not type(item.get('level')) is int or not type(item.get('text')) is str:
+                raise ValueError("every line of a list must have an integer 'level' and a string 'text'.")
+            if not 0 <= item['level'] <= MAX_LIST_LEVEL:
+                raise ValueError("the 'level' of a list line must be between 0 and {0}.".format(MAX_LIST_LEVEL))
+            levels.append(item['level'])
+            texts.append(item['text'])
+        plan.levels = levels
+        plan.texts = texts
+        plan.linesPerSlide = dat.get('lines-per-slide')
+        if plan.linesPerSlide is not None and (not type(plan.linesPerSlide) is int or plan.linesPerSlide < 0):
+            raise ValueError("the 'lines-per-slide' must be a non-negative integer.")
+        return plan
+
+    def _compilePicture(self, head, dat):
+        plan = PicturePlan(*head, path=self._file(dat))
+        plan.title = self._string(dat, 'title')
+        return plan
+
+    def _compilePlot(self, head, dat):
+        plan = PlotPlan(*head, path=self._file(dat))
+        plan.title = self._string(dat, 'title')
+        configuration = dat.get('configuration')
+        if not type(configuration) is dict:
+            raise ValueError("a plot must have a 'configuration' object.")
+        plan.xLabel = self._string(configuration, 'x-label')
+        plan.yLabel = self._string(configuration, 'y-label')
+        plan.downsample = self._downsample(configuration.get('downsample'))
+        plan.columns = self._columns(configuration)
+        if plan.columns is not None:
+            self._checkColumns(dat['content'], plan.path, plan.columns)
+        plan.chart = configuration.get('chart')
+        if plan.chart is not None and plan.chart not in CHART_KINDS:
+            raise ValueError("the 'chart' must be one of {0}.".format(', '.join(CHART_KINDS)))
+        return plan
+
+    @staticmethod
+    def _string(dat, key):
+        value = dat.get(key)
+        if not type(value) is str:
+            raise ValueError("the '{0}' must be a string.".format(key))
+        return value
+
+    def _file(self, dat):
+        """Resolve the file of the entry and check that it exists. Every file is looked up once per configuration."""
+        fileName = self._string(dat, 'content')
+        try:
+            path, exists = self._files[fileName]
+        except KeyError:
+            path = os.path.abspath(fileName)
+            exists = os.path.isfile(path)
+            self._files[fileName] = (path, exists)
+        if not exists:
+            raise ValueError("the file '{0}' does not exist.".format(fileName))
+        return path
+
+    @staticmethod
+    def _downsample(settings):
+        if not settings:
+            return None
+        method = None
+        points = 1
+        if type(settings) is str:
+            method = settings
+        elif type(settings) is dict:
+            method = settings.get('method', 'lttb')
+            points = settings.get('points', 1)
+        if method not in DOWNSAMPLE_METHODS or not type(points) is int or points < 1:
+            raise ValueError("the 'downsample' must be one of {0}, or an object with a 'method' and a positive 'points'.".format(', '.join(DOWNSAMPLE_METHODS)))
+        return settings
+
+    def _checkColumns(self, fileName, path, columns):
+        """Check the selected columns against the header of the data file. Every header is read once per configuration."""
+        try:
+            names = self._columnNames[path]
+        except KeyError:
+            # numpy is imported only if the configuration has a multi-column plot
+            from column_reader_TW import columnNames
+            try:
+                names = columnNames(path)
+            except (IOError, ValueError):
+                names = None
+            self._columnNames[path] = names
+        if names is None:
+            raise ValueError("the columns of the file '{0}' can not be read.".format(fileName))
+        keys = columns['y'] if type(columns['y']) is list else [columns['y']]
+        if columns['x'] is not None:
+            keys = [columns['x']] + keys
+        for key in keys:
+            if (type(key) is int and not -len(names) <= key < len(names)) or (type(key) is str and key not in names):
+                raise ValueError("the file '{0}' has no column {1}.".format(fileName, json.dumps(key)))
+
+    @staticmethod
+    def _columns(configuration):
+        """Return the column selection of a multi-column file, None for an x,y data file."""
+        if not 'y' in configuration:
+            if 'x' in configuration:
+                raise ValueError("the 'x' column is given without 'y' columns.")
+            return None
+        x = configuration.get('x')
+        y = configuration['y']
+        keys = y if type(y) is list else [y]
+        if not keys or any(not type(key) in (str, int) for key in keys) or not type(x) in (str, int, type(None)):
+            raise ValueError("the 'x' and 'y' columns must be given by their names or indices.")
+        return {'x': x, 'y': y}
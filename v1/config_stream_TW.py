@@ -0,0 +1,166 @@
+import json
+import logging
+import sys
+
+CHUNK_SIZE = 1 << 16
+
+_WHITESPACE = ' \t\n\r'
+
+
+class ConfigStream:
+    """Incremental reader of the configuration.
+
+    The configuration is read in chunks and the slide entries are returned one by one, so the whole document is never
+    held in memory. The stream is a sequence of JSON objects:
+    an object with a 'presentation' key is the usual configuration file, its array is returned item by item;
+    any other object with a 'type' key is a single slide entry (JSON Lines).
+    Both forms can be mixed, and the objects can be separated by whitespace or newlines.
+    """
+
+    def __init__(self, stream, chunkSize=CHUNK_SIZE):
+        """Initialization.
+
+        Set up the logger and the JSON decoder.
+
+        Parameters
+        ----------
+        stream : file object
+            The configuration opened in text mode (a file, a pipe or sys.stdin).
+        chunkSize : int
+            The number of characters read at once.
+        """
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self._stream = stream
+        self._chunkSize = chunkSize
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def __iter__(self):
+        """Return the slide entries one by one.
+
+        Raises
+        ----------
+        ValueError
+            If the stream contains bad data.
+        """
+        while self._skipWhitespace():
+            self._expect('{')
+            entry = {}
+            presentation = False
+            if self._peek() == '}':
+                self._pos += 1
+            else:
+                while True:
+                    key = self._decodeValue()
+                    if not type(key) is str:
+                        self._fail()
+                    self._expect(':')
+                    if key == 'presentation':
+                        presentation = True
+                        for slide in self._iterArray():
+                            yield slide
+                    else:
+                        entry[key] = self._decodeValue()
+                    separator = self._next()
+                    if separator == '}':
+                        break
+                    if separator != ',':
+                        self._fail()
+            if not presentation:
+                if 'type' not in entry:
+                    self._fail()
+                yield entry
+
+    def _iterArray(self):
+        self._expect('[')
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self._decodeValue()
+            separator = self._next()
+            if separator == ']':
+                return
+            if separator != ',':
+                self._fail()
+
+    def _decodeValue(self):
+        """Decode the next JSON value. More data is read until the value is complete."""
+        self._skipWhitespace()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+                # a number at the end of the buffer may continue in the next chunk
+                if end < len(self._buffer) or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    self._fail()
+            self._read(max(self._chunkSize, len(self._buffer) - self._pos))
+
+    def _read(self, size):
+        if self._pos:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        chunk = self._stream.read(size)
+        if chunk:
+            self._buffer += chunk
+        else:
+            self._eof = True
+
+    def _skipWhitespace(self):
+        """Skip the whitespace. Return False at the end of the stream."""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return True
+            if self._eof:
+                return False
+            self._read(self._chunkSize)
+
+    def _peek(self):
+        if not self._skipWhitespace():
+            self._fail()
+        return self._buffer[self._pos]
+
+    def _next(self):
+        char = self._peek()
+        self._pos += 1
+        return char
+
+    def _expect(self, char):
+        if self._next() != char:
+            self._fail()
+
+    def _fail(self):
+        self._logger.error('The configuration contains bad data.')
+        raise ValueError
+
+
+def openConfig(configFileName):
+    """Open the configuration for streaming.
+
+    Parameters
+    ----------
+    configFileName : str or file object
+        The name of the configuration file, '-' for the standard input, or an already opened text stream (e.g. a pipe).
+
+    Returns
+    -------
+    file object
+        The text stream. The caller should close it unless it is sys.stdin or it was given as a stream.
+
+    Raises
+    ----------
+    IOError
+        If the file can not be opened.
+    """
+    if configFileName == '-':
+        return sys.stdin
+    if hasattr(configFileName, 'read'):
+        return configFileName
+    return open(configFileName)
@@ -0,0 +1,138 @@
+import logging
+
+import numpy as np
+
+_logger = logging.getLogger('Decimation')
+
+METHODS = ('lttb', 'minmax')
+
+
+def lttb(x, y, threshold):
+    """Downsample a series with the Largest-Triangle-Three-Buckets algorithm.
+
+    The first and the last point are kept. The other points are divided into threshold-2 buckets, and from every bucket
+    the point forming the largest triangle with the previously selected point and the average of the next bucket is kept.
+
+    Parameters
+    ----------
+    x : numpy array
+        The x data. It should be sorted.
+    y : numpy array
+        The y data.
+    threshold : int
+        The number of points to be kept.
+
+    Returns
+    -------
+    x,y
+        A tuple contains the downsampled x,y data.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return (x, y)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # bucket i covers [edges[i], edges[i + 1]), the first and last point are not part of any bucket
+    edges = (np.arange(threshold - 1) * ((n - 2) / (threshold - 2))).astype(np.int64) + 1
+    edges[-1] = n - 1
+    sizes = np.diff(edges)
+    avgX = np.add.reduceat(x[:n - 1], edges[:-1]) / sizes
+    avgY = np.add.reduceat(y[:n - 1], edges[:-1]) / sizes
+    avgX = np.append(avgX[1:], x[n - 1])
+    avgY = np.append(avgY[1:], y[n - 1])
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start = edges[i]
+        end = edges[i + 1]
+        ax = x[a]
+        ay = y[a]
+        area = np.abs((ax - avgX[i]) * (y[start:end] - ay) - (ax - x[start:end]) * (avgY[i] - ay))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return (x[selected], y[selected])
+
+
+def minMax(x, y, bins):
+    """Downsample a series by keeping the minimum and the maximum of every bin.
+
+    The points are divided into bins of equal count (one bin per horizontal pixel is a good choice).
+    The first and the last point and the extremes of every bin are kept in their original order,
+    so the drawn envelope of the series does not change.
+
+    Parameters
+    ----------
+    x : numpy array
+        The x data. It should be sorted.
+    y : numpy array
+        The y data.
+    bins : int
+        The number of bins.
+
+    Returns
+    -------
+    x,y
+        A tuple contains the downsampled x,y data.
+    """
+    n = len(x)
+    if bins < 1 or n <= 2 * bins + 2:
+        return (x, y)
+    y = np.asarray(y)
+    size = n // bins
+    full = size * bins
+    blocks = y[:full].reshape(bins, size)
+    offsets = np.arange(bins) * size
+    parts = [[0, n - 1], offsets + blocks.argmin(axis=1), offsets + blocks.argmax(axis=1)]
+    if full < n:
+        tail = y[full:]
+        parts.append([full + int(np.argmin(tail)), full + int(np.argmax(tail))])
+    selected = np.unique(np.concatenate(parts))
+    return (np.asarray(x)[selected], y[selected])
+
+
+def decimate(x, y, settings, defaultPoints):
+    """Downsample a series according to the plot configuration.
+
+    Parameters
+    ----------
+    x : numpy array
+        The x data.
+    y : numpy array
+        The y data.
+    settings : str or dict
+        The downsample entry of the plot configuration. Either the name of the method ('lttb' or 'minmax'),
+        or a dict with a 'method' and an optional 'points' key. The points is the number of kept points for 'lttb'
+        and the number of bins for 'minmax'. None or False means no downsampling.
+    defaultPoints : int
+        The number of points used if the settings does not contain it (e.g. the width of the image in pixels).
+
+    Returns
+    -------
+    x,y
+        A tuple contains the downsampled x,y data.
+
+    Raises
+    ----------
+    ValueError
+        If the settings is not appropriate.
+    """
+    if not settings:
+        return (x, y)
+    if type(settings) is str:
+        settings = {'method': settings}
+    if not type(settings) is dict:
+        _logger.error('The downsample setting must be a string or a dict.')
+        raise ValueError
+    method = settings.get('method', 'lttb')
+    points = settings.get('points', defaultPoints)
+    if method not in METHODS or not type(points) is int or points < 1:
+        _logger.error('There is an inappropriate downsample setting.')
+        raise ValueError
+    if method == 'lttb':
+        result = lttb(x, y, points)
+    else:
+        result = minMax(x, y, points)
+    _logger.info('The series is downsampled ({0}, {1} -> {2} points).'.format(method, len(x), len(result[0])))
+    return result
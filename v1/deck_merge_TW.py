@@ -0,0 +1,341 @@
+import collections
+import hashlib
+import logging
+import re
+import zipfile
+
+from lxml import etree
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.opc.oxml import serialize_part_xml
+from pptx.opc.packuri import CONTENT_TYPES_URI, PACKAGE_URI, PackURI
+from pptx.opc.serialized import _ContentTypesItem
+
+from atomic_file_TW import AtomicFile
+
+_NAMESPACES = {
+    'ct': 'http://schemas.openxmlformats.org/package/2006/content-types',
+    'pr': 'http://schemas.openxmlformats.org/package/2006/relationships',
+    'p': 'http://schemas.openxmlformats.org/presentationml/2006/main',
+    'r': 'http://schemas.openxmlformats.org/officeDocument/2006/relationships',
+}
+_MEDIA_PREFIX = '/ppt/media/'
+_NUMBERED = re.compile(r'^(.*?)(\d+)(\.[^./]*)$')
+
+# the (part name, content type) pairs of the merged package, as python-pptx needs them to write the content types
+_PartInfo = collections.namedtuple('_PartInfo', ('partname', 'content_type'))
+
+
+def _relsName(partname):
+    """Return the name of the relationships of a part."""
+    return PackURI(partname).rels_uri
+
+
+class DeckMerger:
+    """Merger of presentations built from the same template into one pptx file.
+
+    The first deck is copied as it is. The slides of the following decks are appended in their order: every part
+    belonging only to a slide (the slide, its notes, charts, media...) gets the next free name of its kind, and the
+    relationships pointing to it are rewritten; the parts of the template (layouts, masters, themes) are shared.
+    A media file whose content is already in the merged package is not written again, the slides refer to the existing one.
+    The parts are copied between the zip files, the slides are never parsed; only the presentation part and the
+    relationships are. The result is written next to the output file and renamed at the end.
+    """
+
+    def __init__(self, outputFileName):
+        """Initialization.
+
+        Parameters
+        ----------
+        outputFileName : str
+            The name of the merged pptx file.
+
+        Raises
+        ----------
+        IOError
+            If the output file can not be created.
+        """
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self._outputFileName = outputFileName
+        try:
+            self._output = AtomicFile(outputFileName)
+            self._zipFile = zipfile.ZipFile(self._output.file, 'w', compression=zipfile.ZIP_DEFLATED)
+        except OSError:
+            self._logger.error('The output file can not be created.')
+            raise IOError
+        self._parts = {}
+        self._shared = None
+        self._media = {}
+        self._numbers = {}
+        self._presentationName = None
+        self._presentation = None
+        self._presentationRels = None
+        self._slideId = None
+        self.slides = 0
+
+    def add(self, fileName):
+        """Append the slides of a deck.
+
+        Parameters
+        ----------
+        fileName : str
+            The name of the pptx file. It must be built from the same template as the first deck.
+
+        Raises
+        ----------
+        IOError
+            If the file can not be read.
+
+        ValueError
+            If the file is not a presentation, or its template parts differ from the first deck.
+        """
+        try:
+            with zipfile.ZipFile(fileName) as inputZip:
+                deck = _Deck(inputZip)
+                if self._shared is None:
+                    self._addFirst(deck)
+                else:
+                    self._addSlides(deck)
+        except (OSError, zipfile.BadZipFile):
+            self._logger.error('The deck {0} can not be read.'.format(fileName))
+            raise IOError
+        except (KeyError, etree.XMLSyntaxError):
+            self._logger.error('The deck {0} is not a presentation of the same template.'.format(fileName))
+            raise ValueError
+
+    def close(self):
+        """Write the presentation part, its relationships and the content types, and move the file to its place.
+
+        Raises
+        ----------
+        IOError
+            If the file can not be written.
+        """
+        try:
+            relationships = sorted(self._presentationRels, key=lambda rel: _rIdNumber(rel.get('Id')))
+            self._presentationRels[:] = relationships
+            self._write(self._presentationName, serialize_part_xml(self._presentation), self._parts[self._presentationName])
+            self._zipFile.writestr(_relsName(self._presentationName).membername, _serializeRels(self._presentationRels))
+            parts = [_PartInfo(PackURI(name), contentType) for name, contentType in self._parts.items()]
+            self._zipFile.writestr(CONTENT_TYPES_URI.membername, serialize_part_xml(_ContentTypesItem.xml_for(parts)))
+            self._zipFile.close()
+            self._output.commit()
+        except OSError:
+            self.abort()
+            self._logger.error('The output file can not be written.')
+            raise IOError
+        self._logger.info('{0} slides are merged into {1}.'.format(self.slides, self._outputFileName))
+
+    def abort(self):
+        """Close and remove the partially written file."""
+        self._zipFile.close()
+        self._output.discard()
+
+    def _addFirst(self, deck):
+        self._presentationName = deck.presentationName
+        self._shared = deck.templateParts()
+        for name in deck.partNames():
+            if name == self._presentationName:
+                continue
+            self._write(name, deck.read(name), deck.contentType(name))
+            if name.startswith(_MEDIA_PREFIX):
+                self._media.setdefault(hashlib.sha1(deck.read(name)).hexdigest(), name)
+            if name in deck.relsNames:
+                self._zipFile.writestr(_relsName(name).membername, deck.read(_relsName(name)))
+        self._parts[self._presentationName] = deck.contentType(self._presentationName)
+        self._presentation = deck.xml(self._presentationName)
+        self._presentationRels = deck.xml(_relsName(self._presentationName))
+        self.slides = len(deck.slides())
+        self._zipFile.writestr(PACKAGE_URI.rels_uri.membername, deck.read(PACKAGE_URI.rels_uri))
+
+    def _addSlides(self, deck):
+        if deck.presentationName != self._presentationName:
+            raise KeyError(deck.presentationName)
+        renamed = {}
+        sldIdLst = self._presentation.find('p:sldIdLst', _NAMESPACES)
+        if sldIdLst is None:
+            sldIdLst = etree.SubElement(self._presentation, '{%s}sldIdLst' % _NAMESPACES['p'])
+        for slideName in deck.slides():
+            parts = []
+            # every part is named first, so the relationships between them can be rewritten
+            for name in deck.closure(slideName, self._shared):
+                if name in renamed:
+                    continue
+                data = deck.read(name)
+                if name.startswith(_MEDIA_PREFIX):
+                    digest = hashlib.sha1(data).hexdigest()
+                    if digest in self._media:
+                        renamed[name] = self._media[digest]
+                        continue
+                    renamed[name] = self._nextName(name)
+                    self._media[digest] = renamed[name]
+                else:
+                    renamed[name] = self._nextName(name)
+                parts.append((name, data))
+            for name, data in parts:
+                self._write(renamed[name], data, deck.contentType(name))
+                if name in deck.relsNames:
+                    self._zipFile.writestr(_relsName(renamed[name]).membername, _serializeRels(deck.rels(name, renamed, renamed[name])))
+            rId = self._nextRId()
+            etree.SubElement(self._presentationRels, '{%s}Relationship' % _NAMESPACES['pr'],
+                             {'Id': rId, 'Type': RT.SLIDE, 'Target': PackURI(renamed[slideName]).relative_ref(PackURI(self._presentationName).baseURI)})
+            if self._slideId is None:
+                self._slideId = max([255] + [int(sldId.get('id')) for sldId in sldIdLst])
+            self._slideId += 1
+            sldId = etree.SubElement(sldIdLst, '{%s}sldId' % _NAMESPACES['p'])
+            sldId.set('id', str(self._slideId))
+            sldId.set('{%s}id' % _NAMESPACES['r'], rId)
+            self.slides += 1
+
+    def _nextName(self, name):
+        """Return the next free name of the kind of a part (e.g. /ppt/slides/slide8.xml), numbered as python-pptx numbers them."""
+        match = _NUMBERED.match(name)
+        if match is None:
+            raise KeyError(name)
+        # python-pptx numbers the images through every extension
+        kind = match.group(1) if name.startswith(_MEDIA_PREFIX) else (match.group(1), match.group(3))
+        number = self._numbers.get(kind)
+        if number is None:
+            number = max([0] + [int(other.group(2)) for other in map(_NUMBERED.match, self._parts) if other is not None
+                                and (other.group(1) if name.startswith(_MEDIA_PREFIX) else (other.group(1), other.group(3))) == kind])
+        number += 1
+        self._numbers[kind] = number
+        return '{0}{1}{2}'.format(match.group(1), number, match.group(3))
+
+    def _nextRId(self):
+        # the same rule as python-pptx: the first unused rId counting down from the number of relationships + 1
+        used = set(rel.get('Id') for rel in self._presentationRels)
+        for n in range(len(used) + 1, 0, -1):
+            if 'rId{0}'.format(n) not in used:
+                return 'rId{0}'.format(n)
+
+    def _write(self, name, data, contentType=None):
+        self._zipFile.writestr(PackURI(name).membername, data)
+        if contentType is not None:
+            self._parts[name] = contentType
+
+
+class _Deck:
+    """The parts and relationships of an opened pptx (zip) file."""
+
+    def __init__(self, inputZip):
+        self._zip = inputZip
+        members = set(inputZip.namelist())
+        self.relsNames = set()
+        self._names = []
+        for member in members:
+            name = '/' + member
+            if name == CONTENT_TYPES_URI or member.endswith('.rels'):
+                continue
+            self._names.append(name)
+            if _relsName(name).membername in members:
+                self.relsNames.add(name)
+        types = self.xml(CONTENT_TYPES_URI)
+        self._defaults = {element.get('Extension').lower(): element.get('ContentType') for element in types.findall('ct:Default', _NAMESPACES)}
+        self._overrides = {element.get('PartName'): element.get('ContentType') for element in types.findall('ct:Override', _NAMESPACES)}
+        self.presentationName = next(target for reltype, target in self._targets(PACKAGE_URI) if reltype == RT.OFFICE_DOCUMENT)
+
+    def partNames(self):
+        return sorted(self._names)
+
+    def read(self, name):
+        return self._zip.read(PackURI(name).membername)
+
+    def xml(self, name):
+        return etree.fromstring(self.read(name))
+
+    def contentType(self, name):
+        return self._overrides.get(name) or self._defaults[PackURI(name).ext.lower()]
+
+    def slides(self):
+        """Return the names of the slide parts in the order of the presentation."""
+        targets = {rel.get('Id'): PackURI.from_rel_ref(PackURI(self.presentationName).baseURI, rel.get('Target'))
+                   for rel in self.xml(_relsName(self.presentationName)) if rel.get('TargetMode') != 'External'}
+        presentation = self.xml(self.presentationName)
+        return [targets[sldId.get('{%s}id' % _NAMESPACES['r'])] for sldId in presentation.iterfind('p:sldIdLst/p:sldId', _NAMESPACES)]
+
+    def templateParts(self):
+        """Return the names of the parts which do not belong to a slide (reachable without going through a slide)."""
+        shared = set()
+        pending = [PACKAGE_URI]
+        while pending:
+            source = pending.pop()
+            for reltype, target in self._targets(source):
+                if reltype in (RT.SLIDE, RT.NOTES_SLIDE) or target in shared:
+                    continue
+                shared.add(target)
+                pending.append(target)
+        return shared
+
+    def closure(self, name, shared):
+        """Return the parts reachable from a part without going through the shared parts, in breadth-first order starting with the part."""
+        result = [name]
+        seen = {name}
+        queue = collections.deque([name])
+        while queue:
+            for reltype, target in self._targets(queue.popleft()):
+                if target not in seen and target not in shared:
+                    seen.add(target)
+                    result.append(target)
+                    queue.append(target)
+        return result
+
+    def rels(self, name, renamed, newName):
+        """Return the relationships of a part renamed to newName, with the targets renamed too."""
+        rels = self.xml(_relsName(name))
+        baseURI = PackURI(name).baseURI
+        newBaseURI = PackURI(newName).baseURI
+        for rel in rels:
+            if rel.get('TargetMode') == 'External':
+                continue
+            target = PackURI.from_rel_ref(baseURI, rel.get('Target'))
+            rel.set('Target', PackURI(renamed.get(target, target)).relative_ref(newBaseURI))
+        return rels
+
+    def _targets(self, name):
+        if name != PACKAGE_URI and name not in self.relsNames:
+            return []
+        baseURI = PackURI(name).baseURI
+        return [(rel.get('Type'), PackURI.from_rel_ref(baseURI, rel.get('Target')))
+                for rel in self.xml(_relsName(name)) if rel.get('TargetMode') != 'External']
+
+
+def _rIdNumber(rId):
+    return int(rId[3:]) if rId.startswith('rId') and rId[3:].isdigit() else 0
+
+
+def _serializeRels(rels):
+    return etree.tostring(rels, encoding='UTF-8', standalone=True)
+
+
+def mergeDecks(inputFileNames, outputFileName):
+    """Merge presentations built from the same template into one pptx file (see DeckMerger).
+
+    Parameters
+    ----------
+    inputFileNames : list
+        The names of the pptx files in the order of their slides.
+    outputFileName : str
+        The name of the merged pptx file.
+
+    Returns
+    -------
+    int
+        The number of slides of the merged presentation.
+
+    Raises
+    ----------
+    IOError
+        If a file can not be read or the output can not be written.
+
+    ValueError
+        If the decks are not built from the same template.
+    """
+    merger = DeckMerger(outputFileName)
+    try:
+        for fileName in inputFileNames:
+            merger.add(fileName)
+    except:
+        merger.abort()
+        raise
+    merger.close()
+    return merger.slides
@@ -0,0 +1,399 @@
+import argparse
+import asyncio
+import io
+import json
+import logging
+import multiprocessing
+import os
+import re
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from batch_builder_TW import BatchBuilder
+from image_pipeline_TW import ImagePipeline, DEFAULT_QUALITY
+from plot_cache_TW import PlotCache
+
+DEFAULT_CONCURRENCY = 2
+DEFAULT_QUEUE_SIZE = 100
+MAX_BODY_SIZE = 64 * 1024 * 1024
+# the number of seconds a finished job and its pptx file are kept
+DEFAULT_RESULT_TTL = 3600
+# the name of a result file: the id of the job (a uuid, so the ids of the previous runs are not reused)
+_RESULT_NAME = re.compile(r'^[0-9a-f]{32}\.pptx$')
+
+REASONS = {200: 'OK', 202: 'Accepted', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           409: 'Conflict', 413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+# the builder of the worker process, it keeps the parsed template between the jobs
+_builder = None
+
+
+def _initWorker(templateFileName, plotCacheDir, imagePipeline):
+    global _builder
+    logging.basicConfig(format="%(asctime)s %(levelname)s %(message)s", level = logging.WARNING)
+    plotCache = None if plotCacheDir is None else PlotCache(plotCacheDir)
+    _builder = BatchBuilder(templateFileName, plotCache, imagePipeline=imagePipeline)
+
+
+def _ready():
+    return True
+
+
+def _buildDeck(config, outputFileName):
+    """Build a presentation in a worker process. The config is the text of the configuration.
+
+    Returns
+    -------
+    result, error
+        True and None if the presentation is built, False and the text of the error otherwise.
+    """
+    try:
+        if _builder.generate(io.StringIO(config), outputFileName):
+            return (True, None)
+        return (False, 'The presentation can not be written.')
+    except Exception as error:
+        logging.getLogger('DeckService').exception('The presentation can not be built.')
+        return (False, _errorText(error))
+
+
+def _errorText(error):
+    """Return the text of an exception for the job record (its type if it has no message)."""
+    message = str(error)
+    return '{0}: {1}'.format(type(error).__name__, message) if message else type(error).__name__
+
+
+class DeckService:
+    """Local deck-generation service.
+
+    The configurations are accepted over HTTP (TCP or Unix socket), they are queued and built with bounded concurrency.
+    The presentations are built by a pool of worker processes, every worker imports the modules and parses the template
+    once (see batch_builder_TW), so the startup cost is not paid per request.
+
+    The HTTP interface:
+        POST /jobs                  the body is the configuration (JSON or JSON Lines), the answer is the job ({"id": ..., "status": "queued"})
+        GET /jobs/<id>              the status of the job: queued, running, done or failed (with the error)
+        GET /jobs/<id>/result       the pptx file of a done job
+        DELETE /jobs/<id>           forget a finished job and remove its pptx file
+        GET /health                 the number of the jobs by status
+    The file names in the configurations are relative to the working directory of the service.
+    The finished jobs and their pptx files are forgotten after resultTtl seconds. If a worker process dies, its job fails
+    and the workers are restarted.
+    """
+
+    def __init__(self, templateFileName, outputDir, concurrency=DEFAULT_CONCURRENCY, queueSize=DEFAULT_QUEUE_SIZE,
+                 plotCacheDir=None, imagePipeline=None, resultTtl=DEFAULT_RESULT_TTL):
+        """Initialization.
+
+        Parameters
+        ----------
+        templateFileName : str
+            The name of the template file.
+        outputDir : str
+            The directory of the built presentations.
+        concurrency : int
+            The number of presentations built at the same time (the number of worker processes).
+        queueSize : int
+            The maximal number of waiting jobs; further jobs are refused until the queue has room.
+        plotCacheDir : str
+            The directory of the plot cache shared by the workers (see plot_cache_TW). None means no caching.
+        imagePipeline : ImagePipeline
+            The downscaling and re-encoding of the pictures (see image_pipeline_TW).
+        resultTtl : float
+            The number of seconds a finished job and its pptx file are kept. The pptx files left by a previous run
+            are removed after the same time.
+
+        Raises
+        ----------
+        ValueError
+            If the concurrency or the queueSize is not positive.
+
+        IOError
+            If the output directory can not be created.
+        """
+        self._logger = logging.getLogger(self.__class__.__name__)
+        if concurrency < 1 or queueSize < 1:
+            self._logger.error('The concurrency and the size of the queue must be positive.')
+            raise ValueError
+        try:
+            os.makedirs(outputDir, exist_ok=True)
+        except OSError:
+            self._logger.error('The output directory can not be created.')
+            raise IOError
+        self._templateFileName = templateFileName
+        self._outputDir = outputDir
+        self._concurrency = concurrency
+        self._queueSize = queueSize
+        self._plotCacheDir = plotCacheDir
+        self._imagePipeline = imagePipeline
+        self._resultTtl = resultTtl
+        self._jobs = {}
+        self._queue = None
+        self._executor = None
+        self._consumers = []
+
+    async def start(self):
+        """Start the worker processes and the consumers of the queue.
+
+        The workers are started before the first request, so the imports and the parsing of the template are done here.
+        They are spawned, not forked, so they do not inherit the sockets of the open connections.
+        """
+        self._queue = asyncio.Queue(self._queueSize)
+        self._removeExpiredFiles()
+        await self._startWorkers()
+        self._consumers = [asyncio.ensure_future(self._consume()) for n in range(self._concurrency)]
+
+    async def _startWorkers(self):
+        self._executor = ProcessPoolExecutor(max_workers=self._concurrency, mp_context=multiprocessing.get_context('spawn'),
+                                             initializer=_initWorker,
+                                             initargs=(self._templateFileName, self._plotCacheDir, self._imagePipeline))
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[loop.run_in_executor(self._executor, _ready) for n in range(self._concurrency)])
+
+    async def _restartWorkers(self, broken):
+        """Replace a broken pool of worker processes (unless another consumer has replaced it already)."""
+        if self._executor is not broken:
+            return
+        broken.shutdown(wait=False, cancel_futures=True)
+        self._logger.warning('The worker processes are restarted.')
+        await self._startWorkers()
+
+    async def stop(self):
+        """Stop the consumers and the worker processes. The queued jobs are dropped."""
+        for consumer in self._consumers:
+            consumer.cancel()
+        await asyncio.gather(*self._consumers, return_exceptions=True)
+        self._consumers = []
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def submit(self, config):
+        """Queue a configuration.
+
+        Parameters
+        ----------
+        config : str
+            The text of the configuration.
+
+        Returns
+        -------
+        dict or None
+            The job, None if the queue is full.
+        """
+        self._expire()
+        jobId = uuid.uuid4().hex
+        job = {'id': jobId, 'status': 'queued', 'submitted': time.time(), 'finished': None, 'seconds': None, 'error': None}
+        try:
+            self._queue.put_nowait((job, config))
+        except asyncio.QueueFull:
+            return None
+        self._jobs[jobId] = job
+        return job
+
+    def job(self, jobId):
+        """Return the job by its id, None if there is no such job."""
+        return self._jobs.get(jobId)
+
+    def resultName(self, jobId):
+        """Return the name of the pptx file of a job."""
+        return os.path.join(self._outputDir, '{0}.pptx'.format(jobId))
+
+    def _forget(self, job):
+        """Forget a finished job and remove its pptx file."""
+        del self._jobs[job['id']]
+        try:
+            if os.path.exists(self.resultName(job['id'])):
+                os.remove(self.resultName(job['id']))
+        except OSError:
+            self._logger.warning('The result of the job {0} can not be removed.'.format(job['id']))
+
+    def _expire(self):
+        """Forget the jobs finished more than resultTtl seconds ago."""
+        limit = time.time() - self._resultTtl
+        for job in [job for job in self._jobs.values() if job['finished'] is not None and job['finished'] < limit]:
+            self._forget(job)
+
+    def _removeExpiredFiles(self):
+        """Remove the pptx files of the previous runs which are older than resultTtl seconds."""
+        limit = time.time() - self._resultTtl
+        try:
+            for entry in os.scandir(self._outputDir):
+                if _RESULT_NAME.match(entry.name) and entry.stat().st_mtime < limit:
+                    os.remove(entry.path)
+        except OSError:
+            self._logger.warning('The old results can not be removed.')
+
+    def status(self):
+        """Return the number of the jobs by status."""
+        counts = {'queued': 0, 'running': 0, 'done': 0, 'failed': 0}
+        for job in self._jobs.values():
+            counts[job['status']] += 1
+        return counts
+
+    async def _consume(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job, config = await self._queue.get()
+            try:
+                job['status'] = 'running'
+                start = time.perf_counter()
+                executor = self._executor
+                broken = False
+                try:
+                    result, error = await loop.run_in_executor(executor, _buildDeck, config, self.resultName(job['id']))
+                except BrokenProcessPool:
+                    self._logger.error('A worker process died while building the job {0}.'.format(job['id']))
+                    result, error, broken = False, 'The worker process died.', True
+                except Exception as exception:
+                    self._logger.exception('The job {0} is failed.'.format(job['id']))
+                    result, error = False, _errorText(exception)
+                job['seconds'] = time.perf_counter() - start
+                job['finished'] = time.time()
+                job['status'] = 'done' if result else 'failed'
+                job['error'] = error
+                self._logger.info('The job {0} is {1} ({2:.3f} s).'.format(job['id'], job['status'], job['seconds']))
+                if broken:
+                    await self._restartWorkers(executor)
+                self._expire()
+            finally:
+                self._queue.task_done()
+
+    async def handle(self, reader, writer):
+        """Serve one HTTP request of a connection."""
+        try:
+            status, body, contentType = await self._request(reader)
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+            status, body, contentType = self._json(400, {'error': 'bad request'})
+        except Exception:
+            self._logger.exception('The request can not be served.')
+            status, body, contentType = self._json(500, {'error': 'internal error'})
+        try:
+            writer.write('HTTP/1.1 {0} {1}\r\nContent-Type: {2}\r\nContent-Length: {3}\r\nConnection: close\r\n\r\n'
+                         .format(status, REASONS[status], contentType, len(body)).encode('ascii'))
+            writer.write(body)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _request(self, reader):
+        requestLine = (await reader.readline()).decode('latin-1').split()
+        if len(requestLine) != 3:
+            raise ValueError
+        method, path = requestLine[0], requestLine[1].split('?')[0]
+        length = 0
+        while True:
+            line = (await reader.readline()).decode('latin-1').strip()
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            if name.strip().lower() == 'content-length':
+                length = int(value)
+        if length > MAX_BODY_SIZE:
+            return self._json(413, {'error': 'the configuration is too large'})
+        body = await reader.readexactly(length) if length else b''
+
+        parts = [part for part in path.split('/') if part]
+        if parts == ['health']:
+            return self._json(200, self.status())
+        if not parts or parts[0] != 'jobs' or len(parts) > 3:
+            return self._json(404, {'error': 'not found'})
+        if len(parts) == 1:
+            if method != 'POST':
+                return self._json(405, {'error': 'method not allowed'})
+            return self._post(body)
+        job = self.job(parts[1])
+        if job is None:
+            return self._json(404, {'error': 'unknown job'})
+        if len(parts) == 3:
+            if parts[2] != 'result' or method != 'GET':
+                return self._json(404, {'error': 'not found'})
+            if job['status'] != 'done':
+                return self._json(409, job)
+            try:
+                with open(self.resultName(job['id']), 'rb') as inpf:
+                    return (200, inpf.read(), 'application/vnd.openxmlformats-officedocument.presentationml.presentation')
+            except FileNotFoundError:
+                self._logger.error('The result of the job {0} is missing.'.format(job['id']))
+                return self._json(404, {'error': 'the result is missing'})
+            except OSError:
+                self._logger.error('The result of the job {0} can not be read.'.format(job['id']))
+                return self._json(500, {'error': 'the result can not be read'})
+        if method == 'GET':
+            return self._json(200, job)
+        if method == 'DELETE':
+            if job['status'] in ('queued', 'running'):
+                return self._json(409, job)
+            self._forget(job)
+            return self._json(200, job)
+        return self._json(405, {'error': 'method not allowed'})
+
+    def _post(self, body):
+        try:
+            config = body.decode('utf-8')
+        except UnicodeDecodeError:
+            return self._json(400, {'error': 'the configuration must be UTF-8 text'})
+        if not config.strip():
+            return self._json(400, {'error': 'the configuration is empty'})
+        job = self.submit(config)
+        if job is None:
+            return self._json(503, {'error': 'the queue is full'})
+        return self._json(202, job)
+
+    @staticmethod
+    def _json(status, data):
+        return (status, json.dumps(data).encode('utf-8'), 'application/json')
+
+
+async def serve(service, host='127.0.0.1', port=8080, socketName=None):
+    """Run the service until it is cancelled.
+
+    Parameters
+    ----------
+    service : DeckService
+        The service.
+    host : str
+        The address of the TCP server.
+    port : int
+        The port of the TCP server.
+    socketName : str
+        The name of the Unix socket. If it is given, the service listens on it instead of TCP.
+    """
+    await service.start()
+    try:
+        if socketName is not None:
+            server = await asyncio.start_unix_server(service.handle, socketName)
+        else:
+            server = await asyncio.start_server(service.handle, host, port)
+        logging.getLogger('DeckService').info('The service is listening on {0}.'.format(
+            socketName or ', '.join(str(sock.getsockname()) for sock in server.sockets)))
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(format="%(asctime)s %(levelname)s %(message)s", level = logging.INFO)
+    parser = argparse.ArgumentParser(description='Run the deck-generation service.')
+    parser.add_argument('--template', default='PYTHON-Course.template', help='the template file')
+    parser.add_argument('--output-dir', default='decks', help='the directory of the built presentations')
+    parser.add_argument('--host', default='127.0.0.1', help='the address to listen on')
+    parser.add_argument('--port', type=int, default=8080, help='the port to listen on')
+    parser.add_argument('--socket', help='listen on this Unix socket instead of TCP')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='the number of presentations built at the same time')
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE, help='the maximal number of waiting jobs')
+    parser.add_argument('--result-ttl', type=float, default=DEFAULT_RESULT_TTL, help='the number of seconds the finished jobs and their pptx files are kept')
+    parser.add_argument('--plot-cache', help='the directory of the plot cache')
+    parser.add_argument('--image-dpi', type=int, help='downscale the pictures to this resolution and re-encode them')
+    parser.add_argument('--image-quality', type=int, default=DEFAULT_QUALITY, help='the JPEG quality of the re-encoded pictures')
+    args = parser.parse_args()
+    imagePipeline = ImagePipeline(args.image_dpi, args.image_quality) if args.image_dpi else None
+    service = DeckService(args.template, args.output_dir, args.concurrency, args.queue_size, args.plot_cache, imagePipeline, args.result_ttl)
+    try:
+        asyncio.run(serve(service, args.host, args.port, args.socket))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,150 @@
+import collections
+import hashlib
+import io
+import logging
+
+from PIL import Image
+
+EMU_PER_INCH = 914400
+DEFAULT_DPI = 150
+DEFAULT_QUALITY = 85
+FORMATS = ('auto', 'jpeg', 'png')
+# the total size of the processed images kept in memory
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+
+class ImagePipeline:
+    """Downscale and re-encode the pictures before they are embedded.
+
+    The picture is shown at its native size (as python-pptx would show it), but not larger than the free area of the slide.
+    The pixels beyond the given resolution of the shown size are dropped, and the image is re-encoded
+    (JPEG with the given quality for opaque images, optimized PNG otherwise).
+    The processed images are kept by the hash of their content, so a picture used on many slides is processed once,
+    and the identical bytes let python-pptx share one image part between the slides. The kept images are limited by their
+    total size, the least recently used ones are dropped first, so a pipeline shared by many decks does not grow without bound.
+    """
+
+    def __init__(self, dpi=DEFAULT_DPI, quality=DEFAULT_QUALITY, imageFormat='auto', cacheBytes=DEFAULT_CACHE_BYTES):
+        """Initialization.
+
+        Parameters
+        ----------
+        dpi : int
+            The resolution of the embedded image, in pixels per inch of the shown size.
+        quality : int
+            The JPEG quality (1-95).
+        imageFormat : str
+            'auto' (JPEG for opaque images, PNG for images with transparency), 'jpeg' or 'png'.
+        cacheBytes : int
+            The maximal total size of the processed images kept for reuse. 0 means nothing is kept.
+
+        Raises
+        ----------
+        ValueError
+            If a parameter is not appropriate.
+        """
+        self._logger = logging.getLogger(self.__class__.__name__)
+        if dpi <= 0 or not 1 <= quality <= 95 or imageFormat not in FORMATS or cacheBytes < 0:
+            self._logger.error('There is an inappropriate image pipeline setting.')
+            raise ValueError
+        self._dpi = dpi
+        self._quality = quality
+        self._format = imageFormat
+        self._cacheBytes = cacheBytes
+        self._images = collections.OrderedDict()
+        self._imageBytes = 0
+
+    def settings(self):
+        """Return the settings of the pipeline as a dict (the processed images depend only on them and on the input)."""
+        return {'dpi': self._dpi, 'quality': self._quality, 'format': self._format}
+
+    def prepare(self, image, maxWidth, maxHeight):
+        """Process a picture for a placement area.
+
+        Parameters
+        ----------
+        image : str or file-like object
+            The name of the picture file, or a buffer contains it.
+        maxWidth : int
+            The width of the free area of the slide in EMU.
+        maxHeight : int
+            The height of the free area of the slide in EMU.
+
+        Returns
+        -------
+        image, width, height
+            The buffer contains the processed picture, and the size it should be shown at in EMU.
+
+        Raises
+        ----------
+        IOError
+            If the picture can not be read.
+        """
+        try:
+            if hasattr(image, 'read'):
+                data = image.read()
+            else:
+                with open(image, 'rb') as inpf:
+                    data = inpf.read()
+        except OSError:
+            self._logger.error('The picture can not be read.')
+            raise IOError
+        key = (hashlib.sha1(data).hexdigest(), maxWidth, maxHeight)
+        try:
+            result, width, height = self._images[key]
+            self._images.move_to_end(key)
+        except KeyError:
+            result, width, height = self._process(data, maxWidth, maxHeight)
+            self._keep(key, (result, width, height))
+        return (io.BytesIO(result), width, height)
+
+    def _keep(self, key, image):
+        """Keep a processed image, and drop the least recently used ones over the size limit."""
+        size = len(image[0])
+        if size > self._cacheBytes:
+            return
+        self._images[key] = image
+        self._imageBytes += size
+        while self._imageBytes > self._cacheBytes:
+            key, (result, width, height) = self._images.popitem(last=False)
+            self._imageBytes -= len(result)
+
+    def _process(self, data, maxWidth, maxHeight):
+        with Image.open(io.BytesIO(data)) as picture:
+            # only the header is read here, the pixels are decoded when the picture is resized or encoded
+            dpi = picture.info.get('dpi', (72, 72))
+            dpiX = float(dpi[0]) or 72.0
+            dpiY = float(dpi[1]) or 72.0
+            width = int(picture.width / dpiX * EMU_PER_INCH)
+            height = int(picture.height / dpiY * EMU_PER_INCH)
+            scale = min(1.0, maxWidth / width, maxHeight / height)
+            width = int(width * scale)
+            height = int(height * scale)
+            pixelsX = max(1, round(width / EMU_PER_INCH * self._dpi))
+            pixelsY = max(1, round(height / EMU_PER_INCH * self._dpi))
+            resized = pixelsX < picture.width and pixelsY < picture.height
+            if resized:
+                if picture.format == 'JPEG':
+                    # the JPEG decoder scales by 1/2, 1/4 or 1/8 itself, the result is still at least the target size
+                    picture.draft(picture.mode, (pixelsX, pixelsY))
+                picture = picture.resize((pixelsX, pixelsY), Image.LANCZOS)
+            result = self._encode(picture)
+        if not resized and len(result) >= len(data):
+            # nothing is gained, the original is embedded
+            result = data
+        self._logger.info('The picture is processed ({0} -> {1} bytes).'.format(len(data), len(result)))
+        return (result, width, height)
+
+    def _encode(self, picture):
+        transparent = picture.mode in ('RGBA', 'LA', 'PA') or 'transparency' in picture.info
+        imageFormat = self._format
+        if imageFormat == 'auto':
+            imageFormat = 'png' if transparent else 'jpeg'
+        output = io.BytesIO()
+        if imageFormat == 'jpeg':
+            if picture.mode != 'RGB' and picture.mode != 'L':
+                picture = picture.convert('RGB')
+            picture.save(output, format='JPEG', quality=self._quality, optimize=True, dpi=(self._dpi, self._dpi))
+        else:
+            picture.save(output, format='PNG', optimize=True, dpi=(self._dpi, self._dpi))
+        return output.getvalue()
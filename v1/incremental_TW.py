@@ -0,0 +1,236 @@
+import collections
+import hashlib
+import json
+import logging
+import os
+
+from pptx import Presentation as PptxPresentation
+
+from atomic_file_TW import AtomicFile
+
+MANIFEST_VERSION = 2
+MANIFEST_EXTENSION = '.manifest.json'
+
+# slide type -> the keys of the entry which name files the slide is built from
+FILE_KEYS = {
+    'picture': ('content',),
+    'plot': ('content',),
+}
+
+
+def manifestName(outputFileName):
+    """Return the name of the manifest file belonging to an output pptx file."""
+    return outputFileName + MANIFEST_EXTENSION
+
+
+def _stat(fileName):
+    info = os.stat(fileName)
+    return [info.st_size, info.st_mtime_ns]
+
+
+class IncrementalBuild:
+    """Incremental rebuild of a presentation.
+
+    A manifest is kept next to the output file. It contains a key for every slide, which is the hash of the
+    configuration entry and of the content of the files it refers to (pictures, data files), and the hash of the
+    template and of the build settings. When the presentation is generated again, the previous output is opened instead
+    of the template, and the slides whose key is unchanged are kept with their XML and media parts as they are;
+    only the new or changed slides are built. The previous output is used only if it is not modified since it was written.
+
+    The content of the referenced files is hashed only if their size or modification time differs from the manifest.
+    The slide handlers are not part of the key, so after changing a handler the manifest should be removed (or the
+    incremental build turned off) to rebuild every slide.
+    """
+
+    def __init__(self, outputFileName, templateFileName, settings=None):
+        """Initialization.
+
+        Set up the logger. Load the manifest of the previous build if it matches the template, the settings
+        and the previous output file.
+
+        Parameters
+        ----------
+        outputFileName : str
+            The name of the output pptx file.
+        templateFileName : str
+            The name of the template file.
+        settings : dict
+            Everything else the slides depend on (e.g. the image pipeline settings). It must be JSON serializable.
+
+        Raises
+        ----------
+        IOError
+            If the template file can not be read.
+        """
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self._outputFileName = outputFileName
+        self._manifestFileName = manifestName(outputFileName)
+        self._settings = settings
+        self._files = {}
+        try:
+            self._template = self._digest(templateFileName)
+        except OSError:
+            self._logger.error('The template file can not be read.')
+            raise IOError
+        self._keys = []
+        self._previous = collections.defaultdict(collections.deque)
+        self._previousCount = 0
+        manifest = self._loadManifest()
+        if manifest is not None:
+            self._previousFiles = manifest['files']
+            self._previousCount = len(manifest['slides'])
+            for index, key in enumerate(manifest['slides']):
+                self._previous[key].append(index)
+            self._logger.info('The previous build is used ({0} slides).'.format(len(manifest['slides'])))
+        else:
+            self._previousFiles = {}
+
+    def previousPresentation(self):
+        """Open the previous output.
+
+        Returns
+        -------
+        pptx.presentation.Presentation or None
+            The parsed previous output, None if it can not be reused.
+        """
+        if not self._previous:
+            return None
+        try:
+            previous = PptxPresentation(self._outputFileName)
+        except Exception:
+            previous = None
+        if previous is None or len(previous.slides) != self._previousCount:
+            self._logger.warning('The previous output can not be used, every slide is built.')
+            self._previous.clear()
+            return None
+        return previous
+
+    def claim(self, dat):
+        """Compute the key of a slide entry and look it up in the previous build.
+
+        Every previous slide can be claimed once, so repeated identical entries are reused as many times
+        as they occur in the previous build. An entry which was built into several slides (e.g. a long list)
+        claims all of them.
+
+        Parameters
+        ----------
+        dat : dict or SlidePlan
+            The entry of the configuration, or its compiled plan (see config_compiler_TW).
+
+        Returns
+        -------
+        key, indices
+            The key of the slide, and the indices of the same slides in the previous output (empty if the slide has to be built).
+        """
+        key = self.key(dat)
+        indices = []
+        while True:
+            previous = self._previous.get(self._slideKey(key, len(indices)))
+            if not previous:
+                return (key, indices)
+            indices.append(previous.popleft())
+
+    def record(self, key, count=1):
+        """Append the keys of the next slides of the output to the manifest.
+
+        Parameters
+        ----------
+        key : str
+            The key of the entry.
+        count : int
+            The number of slides the entry is built into.
+        """
+        for n in range(count):
+            self._keys.append(self._slideKey(key, n))
+
+    @staticmethod
+    def _slideKey(key, n):
+        # the continuation slides of an entry are marked by their number
+        return key if n == 0 else '{0}+{1}'.format(key, n)
+
+    def key(self, dat):
+        """Compute the key of a slide entry.
+
+        Parameters
+        ----------
+        dat : dict or SlidePlan
+            The entry of the configuration, or its compiled plan (see config_compiler_TW).
+
+        Returns
+        -------
+        str
+            The hex digest of the entry and of the files it refers to.
+        """
+        if type(dat) is dict:
+            fileNames = [dat.get(fileKey) for fileKey in FILE_KEYS.get(dat.get('type'), ())]
+        else:
+            # a compiled slide plan (see config_compiler_TW)
+            fileNames = [dat.path]
+            dat = [dat.stype, dat.path, dat.values()]
+        digest = hashlib.sha256()
+        digest.update(json.dumps([MANIFEST_VERSION, dat], sort_keys=True).encode('utf-8'))
+        for fileName in fileNames:
+            if type(fileName) is str:
+                digest.update(self._fileDigest(fileName).encode('utf-8'))
+        return digest.hexdigest()
+
+    def save(self):
+        """Write the manifest of the current build. It must be called after the output file is written."""
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'template': self._template,
+            'settings': self._settings,
+            'output': _stat(self._outputFileName),
+            'files': self._files,
+            'slides': self._keys,
+        }
+        try:
+            with AtomicFile(self._manifestFileName, 'w') as outf:
+                json.dump(manifest, outf)
+        except OSError:
+            self._logger.warning('The manifest can not be written, the next build is a full build.')
+
+    def _loadManifest(self):
+        try:
+            with open(self._manifestFileName) as inpf:
+                manifest = json.load(inpf)
+            output = _stat(self._outputFileName)
+        except (OSError, ValueError):
+            return None
+        if type(manifest) is not dict or manifest.get('version') != MANIFEST_VERSION:
+            return None
+        if manifest.get('template') != self._template or manifest.get('settings') != self._settings:
+            self._logger.info('The template or the settings are changed, every slide is built.')
+            return None
+        if manifest.get('output') != output:
+            self._logger.info('The previous output is modified, every slide is built.')
+            return None
+        if type(manifest.get('slides')) is not list or type(manifest.get('files')) is not dict:
+            return None
+        return manifest
+
+    def _fileDigest(self, fileName):
+        try:
+            return self._files[fileName][2]
+        except KeyError:
+            pass
+        try:
+            stat = _stat(fileName)
+        except OSError:
+            # the slide builder reports the missing file
+            return 'missing'
+        previous = self._previousFiles.get(fileName)
+        if previous is not None and previous[:2] == stat:
+            digest = previous[2]
+        else:
+            digest = self._digest(fileName)
+        self._files[fileName] = stat + [digest]
+        return digest
+
+    @staticmethod
+    def _digest(fileName):
+        digest = hashlib.sha256()
+        with open(fileName, 'rb') as inpf:
+            for block in iter(lambda: inpf.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
@@ -0,0 +1,149 @@
+import cProfile
+import contextlib
+import json
+import logging
+import time
+
+
+class Metrics:
+    """Per-stage timing of the presentation generation.
+
+    Every measured stage (e.g. 'config', 'data', 'render', 'embed', 'slide', 'finalize') produces a record with
+    the wall time, the CPU time and the number of processed bytes. The records are kept in memory,
+    and they are also passed to the callback as soon as the stage ends. Nested stages are recorded separately,
+    so the 'slide' stage contains the time of the 'data' and 'render' stages of the same slide.
+    """
+
+    enabled = True
+
+    def __init__(self, callback=None, profileFile=None):
+        """Initialization.
+
+        Parameters
+        ----------
+        callback : callable
+            It is called with every record (a dict with stage, slide, type, wall, cpu and bytes keys).
+        profileFile : str
+            If it is given, the whole generation runs under cProfile and the statistics are dumped into this file.
+        """
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self._callback = callback
+        self._profileFile = profileFile
+        self.records = []
+        self.slide = None
+        self.slideType = None
+
+    @contextlib.contextmanager
+    def stage(self, name, nbytes=0):
+        """Measure a stage.
+
+        Parameters
+        ----------
+        name : str
+            The name of the stage.
+        nbytes : int
+            The number of bytes processed by the stage, if it is known before the stage. It can be set later
+            through the 'bytes' key of the yielded record.
+
+        Yields
+        -------
+        dict
+            The record of the stage.
+        """
+        record = {'stage': name, 'slide': self.slide, 'type': self.slideType, 'wall': 0.0, 'cpu': 0.0, 'bytes': nbytes}
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield record
+        finally:
+            record['wall'] = time.perf_counter() - wall
+            record['cpu'] = time.process_time() - cpu
+            self.records.append(record)
+            if self._callback is not None:
+                self._callback(record)
+
+    @contextlib.contextmanager
+    def slideStage(self, index, stype):
+        """Measure the whole construction of a slide; the stages inside it are tagged with the slide."""
+        self.slide = index
+        self.slideType = stype
+        try:
+            with self.stage('slide') as record:
+                yield record
+        finally:
+            self.slide = None
+            self.slideType = None
+
+    @contextlib.contextmanager
+    def profile(self):
+        """Run the block under cProfile if a profile file is given."""
+        if self._profileFile is None:
+            yield
+            return
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(self._profileFile)
+            self._logger.info('The profile is written ({0}).'.format(self._profileFile))
+
+    def summary(self):
+        """Aggregate the records by stage.
+
+        Returns
+        -------
+        dict
+            The count, the total wall time, CPU time and bytes by the name of the stage.
+        """
+        result = {}
+        for record in self.records:
+            total = result.setdefault(record['stage'], {'count': 0, 'wall': 0.0, 'cpu': 0.0, 'bytes': 0})
+            total['count'] += 1
+            total['wall'] += record['wall']
+            total['cpu'] += record['cpu']
+            total['bytes'] += record['bytes'] or 0
+        return result
+
+    def write(self, fileName):
+        """Write the records and the summary as JSON."""
+        with open(fileName, 'w') as outf:
+            json.dump({'summary': self.summary(), 'records': self.records}, outf, indent=1)
+
+
+class _NullRecord(dict):
+    """Record of the disabled metrics. The values written into it are dropped."""
+
+    def __setitem__(self, key, value):
+        pass
+
+
+class _NullStage:
+    def __enter__(self):
+        return _NULL_RECORD
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_RECORD = _NullRecord()
+_NULL_STAGE = _NullStage()
+
+
+class NullMetrics:
+    """Disabled metrics. Every stage is the same no-op context manager, so the instrumentation costs only a method call."""
+
+    enabled = False
+
+    def stage(self, name, nbytes=0):
+        return _NULL_STAGE
+
+    def slideStage(self, index, stype):
+        return _NULL_STAGE
+
+    def profile(self):
+        return _NULL_STAGE
+
+
+NULL_METRICS = NullMetrics()
@@ -0,0 +1,203 @@
+import logging
+import os
+import zipfile
+import zlib
+
+from pptx.opc.constants import CONTENT_TYPE as CT
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.opc.oxml import serialize_part_xml
+from pptx.opc.packuri import CONTENT_TYPES_URI, PACKAGE_URI
+from pptx.opc.serialized import _ContentTypesItem
+
+from atomic_file_TW import AtomicFile
+
+# the content types always written without compression: they are compressed already, deflating them again costs time
+# when the file is written and opened, and saves (almost) nothing
+STORED_CONTENT_TYPES = frozenset((CT.JPEG, CT.SML_SHEET))
+STORED_PREFIXES = ('video/', 'audio/')
+# the other pictures are compressed by their encoder more or less well (e.g. a PNG of a plot can be deflated by 10%,
+# a PNG of a photo can not); they are stored if deflating a sample of them saves less than MIN_SAVING
+PROBED_PREFIX = 'image/'
+PROBE_SIZE = 1 << 16
+MIN_SAVING = 0.03
+# the compression level of the other parts (XML); the files are written once and opened many times
+DEFLATE_LEVEL = 9
+# the size of the local file header and the central directory record of a zip entry without the name
+ZIP_HEADER_SIZE = 30 + 46
+
+_logger = logging.getLogger('PackageOptimizer')
+
+
+def compressType(contentType, blob=b''):
+    """Return the zip compression of a part (zipfile.ZIP_STORED or zipfile.ZIP_DEFLATED).
+
+    Parameters
+    ----------
+    contentType : str
+        The content type of the part.
+    blob : bytes
+        The content of the part; a picture is probed by deflating its first PROBE_SIZE bytes.
+    """
+    if contentType in STORED_CONTENT_TYPES or contentType.startswith(STORED_PREFIXES):
+        return zipfile.ZIP_STORED
+    if contentType.startswith(PROBED_PREFIX) and blob:
+        sample = blob[:PROBE_SIZE]
+        if len(zlib.compress(sample, 1)) > len(sample) * (1 - MIN_SAVING):
+            return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def writePart(zipFile, partname, blob, contentType):
+    """Write a part into the zip file with its compression (see compressType).
+
+    Returns
+    -------
+    bool
+        True if the part is stored without compression.
+    """
+    compression = compressType(contentType, blob)
+    zipFile.writestr(partname.membername, blob, compress_type=compression,
+                     compresslevel=DEFLATE_LEVEL if compression == zipfile.ZIP_DEFLATED else None)
+    return compression == zipfile.ZIP_STORED
+
+
+def packedSize(partname, blob, contentType):
+    """Estimate the size a part takes in the pptx file written by writePart: its compressed content and its zip headers."""
+    if compressType(contentType, blob) == zipfile.ZIP_DEFLATED:
+        compressor = zlib.compressobj(DEFLATE_LEVEL, zlib.DEFLATED, -zlib.MAX_WBITS)
+        size = len(compressor.compress(blob)) + len(compressor.flush())
+    else:
+        size = len(blob)
+    # the local file header and the central directory record both contain the name
+    return size + ZIP_HEADER_SIZE + 2 * len(partname.membername.encode('utf-8'))
+
+
+def pruneTemplate(presentation):
+    """Remove the parts of the template which are not used by the slides.
+
+    The layouts no slide is based on are removed from their masters, and a master without used layouts is removed
+    from the presentation; a presentation without slides keeps its template as it is. The parts which are not reachable any more (the layouts,
+    the masters with their themes, and the media only they refer to) are not written. The slides are found through
+    their relationships, so the slides already written by the streaming mode are taken into account too.
+
+    Parameters
+    ----------
+    presentation : pptx.presentation.Presentation
+        The presentation being saved.
+
+    Returns
+    -------
+    dict
+        'layouts', 'masters': the number of the removed layouts and masters; 'parts', 'bytes': the number and the
+        (uncompressed) size of the parts which are not written any more; 'savedBytes': the estimated size these parts and
+        their relationships would take in the output file (see packedSize).
+    """
+    package = presentation.part.package
+    before = set(package.iter_parts())
+    used = set()
+    for rel in presentation.part.rels.values():
+        if rel.reltype == RT.SLIDE:
+            used.update(slideRel.target_part for slideRel in rel.target_part.rels.values() if slideRel.reltype == RT.SLIDE_LAYOUT)
+    result = {'layouts': 0, 'masters': 0}
+    masters = []
+    for sldMasterId in presentation.slide_masters._sldMasterIdLst:
+        masterPart = presentation.part.related_part(sldMasterId.rId)
+        sldLayoutIdLst = masterPart.slide_master.slide_layouts._sldLayoutIdLst
+        unused = [sldLayoutId for sldLayoutId in sldLayoutIdLst if masterPart.related_part(sldLayoutId.rId) not in used]
+        masters.append((sldMasterId, masterPart, sldLayoutIdLst, unused))
+    # a presentation without slides keeps its template as it is
+    anyUsed = any(len(unused) < len(sldLayoutIdLst) for sldMasterId, masterPart, sldLayoutIdLst, unused in masters)
+    for sldMasterId, masterPart, sldLayoutIdLst, unused in masters:
+        if len(unused) < len(sldLayoutIdLst):
+            for sldLayoutId in unused:
+                sldLayoutIdLst.remove(sldLayoutId)
+                masterPart.drop_rel(sldLayoutId.rId)
+        elif anyUsed:
+            presentation.slide_masters._sldMasterIdLst.remove(sldMasterId)
+            presentation.part.drop_rel(sldMasterId.rId)
+            result['masters'] += 1
+        else:
+            continue
+        result['layouts'] += len(unused)
+    pruned = before - set(package.iter_parts())
+    result['parts'] = len(pruned)
+    result['bytes'] = sum(len(part.blob) for part in pruned)
+    result['savedBytes'] = 0
+    for part in pruned:
+        result['savedBytes'] += packedSize(part.partname, part.blob, part.content_type)
+        if part._rels:
+            result['savedBytes'] += packedSize(part.partname.rels_uri, part.rels.xml, CT.OPC_RELATIONSHIPS)
+    return result
+
+
+def writePackage(presentation, outputFileName):
+    """Write the presentation into a pptx file, every part with its own compression (see compressType).
+
+    The file is written next to the output file and renamed at the end.
+
+    Parameters
+    ----------
+    presentation : pptx.presentation.Presentation
+        The presentation.
+    outputFileName : str
+        The name of the pptx file.
+
+    Returns
+    -------
+    dict
+        'stored': the number of the parts written without compression; 'bytes': the size of the file.
+
+    Raises
+    ----------
+    IOError
+        If the file can not be written.
+    """
+    package = presentation.part.package
+    parts = tuple(package.iter_parts())
+    try:
+        with AtomicFile(outputFileName) as outf, zipfile.ZipFile(outf, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=DEFLATE_LEVEL) as zipFile:
+            zipFile.writestr(CONTENT_TYPES_URI.membername, serialize_part_xml(_ContentTypesItem.xml_for(parts)))
+            zipFile.writestr(PACKAGE_URI.rels_uri.membername, package._rels.xml)
+            stored = 0
+            for part in parts:
+                stored += writePart(zipFile, part.partname, part.blob, part.content_type)
+                if part._rels:
+                    zipFile.writestr(part.partname.rels_uri.membername, part.rels.xml)
+    except OSError:
+        _logger.error('The output file can not be written.')
+        raise IOError
+    return {'stored': stored, 'bytes': os.path.getsize(outputFileName)}
+
+
+def optimizeFile(fileName, outputFileName=None):
+    """Prune the unused template parts of a pptx file and write it again with the compression of every part.
+
+    Parameters
+    ----------
+    fileName : str
+        The name of the pptx file.
+    outputFileName : str
+        The name of the optimized file. None means the file is replaced.
+
+    Returns
+    -------
+    dict
+        The result of pruneTemplate, 'stored' and 'bytes' of writePackage, and 'savedBytes': the size of the input file
+        minus the size of the optimized file (instead of the estimate of pruneTemplate).
+
+    Raises
+    ----------
+    IOError
+        If a file can not be read or written.
+    """
+    from pptx import Presentation
+    try:
+        inputBytes = os.path.getsize(fileName)
+        presentation = Presentation(fileName)
+    except (OSError, zipfile.BadZipFile, KeyError):
+        _logger.error('The pptx file can not be read.')
+        raise IOError
+    result = pruneTemplate(presentation)
+    result.update(writePackage(presentation, fileName if outputFileName is None else outputFileName))
+    result['savedBytes'] = inputBytes - result['bytes']
+    return result
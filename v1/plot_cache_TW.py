@@ -0,0 +1,171 @@
+import hashlib
+import json
+import logging
+import os
+
+from atomic_file_TW import AtomicFile
+
+CACHE_VERSION = 1
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+class PlotCache:
+    """Persistent, content-addressed cache of the rendered plot images.
+
+    The key of an image is the hash of the data file content and the render settings (labels, downsampling, figure size...),
+    so a changed data file or label never hits a stale image. The images are stored as <key>.png in the cache directory.
+    The modification time of an image is refreshed on every hit, and the least recently used images are removed
+    when the total size exceeds the limit.
+    """
+
+    def __init__(self, cacheDir, maxBytes=DEFAULT_MAX_BYTES):
+        """Initialization.
+
+        Set up the logger. Create the cache directory if it does not exist.
+
+        Parameters
+        ----------
+        cacheDir : str
+            The name of the cache directory.
+        maxBytes : int
+            The maximal total size of the cached images.
+
+        Raises
+        ----------
+        TypeError
+            If the cacheDir is not a string.
+
+        IOError
+            If the cache directory can not be created.
+        """
+        self._logger = logging.getLogger(self.__class__.__name__)
+        if not type(cacheDir) is str:
+            self._logger.error('Name of the cache directory must be string.')
+            raise TypeError
+        try:
+            os.makedirs(cacheDir, exist_ok=True)
+        except OSError:
+            self._logger.error('The cache directory can not be created.')
+            raise IOError
+        self.cacheDir = cacheDir
+        self.maxBytes = maxBytes
+
+    def key(self, inputFile, settings, data=None):
+        """Compute the cache key of a plot.
+
+        Parameters
+        ----------
+        inputFile : str
+            The name of the data file.
+        settings : dict
+            Everything else the image depends on (labels, downsampling, figure size...). It must be JSON serializable.
+        data : bytes
+            The content of the data file, if it is already in memory. Then the file is not read.
+
+        Returns
+        -------
+        str
+            The hexadecimal key.
+
+        Raises
+        ----------
+        IOError
+            If the data file can not be read.
+        """
+        digest = hashlib.sha256()
+        digest.update(json.dumps([CACHE_VERSION, settings], sort_keys=True).encode('utf-8'))
+        if data is not None:
+            digest.update(data)
+            return digest.hexdigest()
+        try:
+            with open(inputFile, 'rb') as inpf:
+                for block in iter(lambda: inpf.read(1 << 20), b''):
+                    digest.update(block)
+        except OSError:
+            self._logger.error('Input file can not be read.')
+            raise IOError
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Look up an image.
+
+        Parameters
+        ----------
+        key : str
+            The cache key.
+
+        Returns
+        -------
+        str or None
+            The name of the cached image file, None if it is not cached.
+        """
+        imageFile = self._imageName(key)
+        try:
+            os.utime(imageFile)
+        except OSError:
+            return None
+        self._logger.info('Cached plot is used ({0}).'.format(imageFile))
+        return imageFile
+
+    def put(self, key, imageData):
+        """Store an image and evict the least recently used ones if the cache is too large.
+
+        Parameters
+        ----------
+        key : str
+            The cache key.
+        imageData : bytes
+            The rendered PNG image.
+
+        Returns
+        -------
+        str
+            The name of the cached image file.
+
+        Raises
+        ----------
+        IOError
+            If the image can not be stored.
+        """
+        cachedFile = self._imageName(key)
+        try:
+            with AtomicFile(cachedFile) as outf:
+                outf.write(imageData)
+        except OSError:
+            self._logger.error('The image can not be stored in the cache.')
+            raise IOError
+        self.evict()
+        return cachedFile
+
+    def evict(self):
+        """Remove the least recently used images until the total size fits into the limit.
+
+        Returns
+        -------
+        int
+            The number of removed images.
+        """
+        entries = []
+        total = 0
+        for entry in os.scandir(self.cacheDir):
+            if entry.name.endswith('.png') and entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        removed = 0
+        entries.sort()
+        for mtime, size, path in entries:
+            if total <= self.maxBytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        if removed:
+            self._logger.info('{0} cached plots are evicted.'.format(removed))
+        return removed
+
+    def _imageName(self, key):
+        return os.path.join(self.cacheDir, key + '.png')
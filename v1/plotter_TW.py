@@ -1,12 +1,150 @@
+import io
 import logging
 import numpy as np
 import json
-import matplotlib.pyplot as plt
-import re
+import matplotlib
+# non-interactive backend, no GUI toolkit is probed or imported
+matplotlib.use('Agg')
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+import compressed_TW
+import decimation_TW
+import xy_binary_TW
+from column_reader_TW import ColumnReader
+from instrumentation_TW import NULL_METRICS
+from xy_reader_TW import XYReader
+
+# the maximal number of points of a series of a native chart; every point is written into the XML and the workbook of the chart
+NATIVE_CHART_POINTS = 500
+
+# the column reader of the process, used if the caller does not give one (e.g. in the worker processes)
+_columnReader = None
+# the chart renderer of the process
+_renderer = None
+
+
+def defaultColumnReader():
+    """Return the column reader of the process."""
+    global _columnReader
+    if _columnReader is None:
+        _columnReader = ColumnReader()
+    return _columnReader
+
+
+def defaultRenderer():
+    """Return the chart renderer of the process."""
+    global _renderer
+    if _renderer is None:
+        _renderer = ChartRenderer()
+    return _renderer
+
+
+def _rendererSettings():
+    """Return the figsize and the dpi of the chart renderer of the process without creating it."""
+    if _renderer is not None:
+        return (_renderer.figsize,_renderer.dpi)
+    return ([float(size) for size in matplotlib.rcParams['figure.figsize']],float(matplotlib.rcParams['figure.dpi']))
+
+
+class ChartRenderer:
+    """Renderer of line charts on a reusable figure.
+
+    The figure and its axes are created once directly on the Agg canvas, without pyplot and its figure manager.
+    For every chart only the data and the labels of the lines are replaced, the axes are rescaled and the figure is
+    rendered, so the charts do not pay the setup of a new figure. The lines keep the colors they got when they were
+    created, the same as the lines of a new figure. The renderer is not thread-safe; one renderer is used per process.
+    """
+
+    def __init__(self,figsize=None,dpi=None):
+        """Initialization.
+
+        Parameters
+        ----------
+        figsize : tuple
+            The size of the image in inches. None means the figure.figsize of the matplotlib settings.
+        dpi : float
+            The resolution of the image. None means the figure.dpi of the matplotlib settings.
+        """
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self._figure = Figure(figsize=figsize,dpi=dpi)
+        FigureCanvasAgg(self._figure)
+        self._axes = self._figure.add_subplot()
+        self._lines = []
+        self.figsize = [float(size) for size in self._figure.get_size_inches()]
+        self.dpi = float(self._figure.dpi)
+
+    @property
+    def width(self):
+        """The width of the image in pixels."""
+        return int(self.figsize[0] * self.dpi)
+
+    def render(self,series,xLabel,yLabel,legend=False):
+        """Render a chart into an in-memory PNG image.
+
+        Parameters
+        ----------
+        series : list
+            The (name, x, y) tuples of the lines.
+        xLabel : str
+            The label of the x axis.
+        yLabel : str
+            The label of the y axis.
+        legend : bool
+            If True, the chart has a legend with the names of the lines.
+
+        Returns
+        -------
+        io.BytesIO
+            The buffer contains the PNG image; its position is at the end of the image.
+
+        Raises
+        ----------
+        IOError
+            If the image can not be rendered.
+        """
+        axes = self._axes
+        for n,(name,x,y) in enumerate(series):
+            if n < len(self._lines):
+                line = self._lines[n]
+                line.set_data(x,y)
+                line.set_label(name)
+                line.set_visible(True)
+            else:
+                self._lines.append(axes.plot(x,y,label=name)[0])
+        for line in self._lines[len(series):]:
+            line.set_data([],[])
+            line.set_label('_unused')
+            line.set_visible(False)
+        oldLegend = axes.get_legend()
+        if oldLegend is not None:
+            oldLegend.remove()
+        try:
+            axes.relim(visible_only=True)
+            if not any(len(x) for name,x,y in series):
+                # without data the limits of the previous chart would stay; a new axes starts from (0,1)
+                axes.set_xlim(0,1,auto=True)
+                axes.set_ylim(0,1,auto=True)
+            if series:
+                axes.autoscale_view()
+            if legend:
+                axes.legend()
+            axes.set_xlabel(xLabel)
+            axes.set_ylabel(yLabel)
+            image = io.BytesIO()
+            self._figure.savefig(image,format='png')
+        except:
+            self._logger.error('The figure can not be rendered.')
+            raise IOError
+        finally:
+            # the data (e.g. a memory-mapped file) is not kept alive by the figure
+            for line in self._lines:
+                line.set_data([],[])
+        return image
 
 
 class Plotter:
-    def __init__(self,inputFile):
+    def __init__(self,inputFile,metrics=None):
         """Initialization.
 
         Set up the logger. Store the name of the input file.
@@ -14,6 +152,8 @@ class Plotter:
         ----------
         inputFile : str
             The name of the input file. It contains the data to be plotted.
+        metrics : Metrics
+            The per-stage timing (see instrumentation_TW). None means no measurement.
 
         Raises
         ----------
@@ -24,6 +164,7 @@ class Plotter:
             If the file can not be read. 
         """
         self._logger = logging.getLogger(self.__class__.__name__)
+        self._metrics = NULL_METRICS if metrics is None else metrics
 
         if not type(inputFile) is str:
              self._logger.error('Name of Input file must be string')
@@ -31,42 +172,172 @@ class Plotter:
         else:
             self.inputFile = inputFile
         try:
-            with open(inputFile) as inpf:
+            with open(inputFile,'rb') as inpf:
                 pass
         except:
             self._logger.error('Input file not found')
             raise IOError
     
-    def readXYData(self,inputFile):
+    def readXYData(self,inputFile,data=None):
         """Read the x,y data sets.
         
-        Read the data from the input file. Return a tuple which contains the x,y data.
+        Read the data from the input file with the streaming XYReader. Return a tuple which contains the x,y data.
+        Both the one-line layout ((1,2)(3,4)...) and the one-pair-per-line layout are accepted.
+        If the input file is in the binary x,y format, or it has an up-to-date binary sidecar (see xy_binary_TW),
+        the binary file is memory-mapped instead of parsing the text. A sidecar which can not be opened is ignored.
+        If the content of the file is already in memory (e.g. prefetched), it is parsed instead of reading the file.
+        A gzip, xz or zstd compressed file is decompressed in chunks while it is parsed (see compressed_TW).
         Parameters
         ----------
         inputFile : str
             The name of the input file. It contains the data to be plotted.
+        data : bytes
+            The content of the input file (or of its binary sidecar).
 
         Returns
         -------
         x,y
-            A tuple contains the x,y data.
+            A tuple contains the x,y data as float64 numpy arrays.
         """
-        with open(inputFile) as inpf:
-                    line = [i.strip() for i in inpf if i]
-                    xy_data = re.finditer(r'(?:[+-]?\d+\.?\d*)',line[0])
-                    x = []
-                    y= []
-                    for n,xy in enumerate(xy_data,1):
-                        if n%2 == 1:
-                            x.append(float(xy.group(0)))
-                        if n%2 == 0:
-                            y.append(float(xy.group(0)))
+        with self._metrics.stage('data') as record:
+            if data is not None:
+                if data.startswith(xy_binary_TW.MAGIC):
+                    x,y = xy_binary_TW.loadXYBinary(data)
+                else:
+                    buffer = io.BytesIO(data)
+                    with compressed_TW.decompressingStream(buffer) as stream:
+                        x,y = XYReader().readStream(stream,len(data) if stream is buffer else 0)
+                record['bytes'] = x.nbytes + y.nbytes
+                return (x,y)
+            binaryFile = xy_binary_TW.findBinary(inputFile)
+            x = None
+            if binaryFile == inputFile:
+                x,y = xy_binary_TW.openXYBinary(binaryFile)
+            elif binaryFile is not None:
+                try:
+                    x,y = xy_binary_TW.openXYBinary(binaryFile)
+                    self._logger.info('Binary data is used ({0}).'.format(binaryFile))
+                except (IOError,ValueError):
+                    self._logger.warning('The sidecar {0} is ignored.'.format(binaryFile))
+            if x is None:
+                x,y = XYReader().read(inputFile)
+            record['bytes'] = x.nbytes + y.nbytes
         return (x,y)
 
-    def generatePlot(self,inputFile,xLabel,yLabel):
-        """Generate a plot and save as an image.
+    def readColumns(self,inputFile,columns,data=None,columnReader=None):
+        """Read the selected columns of a multi-column data file.
+
+        The file is parsed once by the column reader and kept in its memory, so the other plots of the same file do not read it again.
+        Parameters
+        ----------
+        inputFile : str
+            The name of the input file. It contains a header and the columns.
+        columns : dict
+            The selected columns: 'y' is the name or index of a column or a list of them, the optional 'x' is the x column (the first column by default).
+        data : bytes
+            The content of the input file, if it is already in memory.
+        columnReader : ColumnReader
+            The reader which keeps the parsed files (see column_reader_TW). None means the reader of the process.
+
+        Returns
+        -------
+        x,series
+            The x data, and the list of the (name, y data) pairs.
+
+        Raises
+        ----------
+        ValueError
+            If the selection is not appropriate or a column does not exist.
+        """
+        if not type(columns) is dict or not 'y' in columns:
+            self._logger.error('The y columns must be given.')
+            raise ValueError
+        if columnReader is None:
+            columnReader = defaultColumnReader()
+        with self._metrics.stage('data') as record:
+            x,series = columnReader.select(inputFile,columns.get('x'),columns['y'],data)
+            record['bytes'] = x.nbytes + sum(y.nbytes for name,y in series)
+        return (x,series)
+
+    def readSeries(self,inputFile,data=None,columns=None,columnReader=None):
+        """Read the series of a plot.
+
+        Parameters
+        ----------
+        inputFile : str
+            The name of the input file.
+        data : bytes
+            The content of the input file, if it is already in memory.
+        columns : dict
+            The selected columns of a multi-column file (see readColumns). None means an x,y data file (see readXYData).
+        columnReader : ColumnReader
+            The reader which keeps the parsed multi-column files.
+
+        Returns
+        -------
+        list
+            The (name, x, y) tuples of the series; the name is None for an x,y data file.
+        """
+        if columns is None:
+            x,y = self.readXYData(inputFile,data)
+            return [(None,x,y)]
+        x,columnSeries = self.readColumns(inputFile,columns,data,columnReader)
+        return [(name,x,y) for name,y in columnSeries]
+
+    def chartSeries(self,inputFile,downsample=None,data=None,columns=None,columnReader=None,points=NATIVE_CHART_POINTS):
+        """Read the series of a native chart (see PresentationGenerator.addChart).
+
+        The points which are not finite (e.g. missing values) are left out, because a chart can not store them.
+        A series longer than points is always downsampled: by the downsample setting if it is given, by 'lttb' otherwise.
+        'minmax' keeps up to two points per bin and four more (the first, the last and the extremes of the remainder),
+        so it gets fewer bins to stay within points.
+        Parameters
+        ----------
+        inputFile : str
+            The name of the input file.
+        downsample : str or dict
+            The downsample setting of the plot configuration (see decimation_TW.decimate).
+        data : bytes
+            The content of the input file, if it is already in memory.
+        columns : dict
+            The selected columns of a multi-column file.
+        columnReader : ColumnReader
+            The reader which keeps the parsed multi-column files.
+        points : int
+            The maximal number of points of a series, if the downsample setting does not give it.
+
+        Returns
+        -------
+        list
+            The (name, x, y) tuples of the series.
+
+        Raises
+        ----------
+        ValueError
+            If the downsample setting is not appropriate.
+        """
+        method = downsample.get('method','lttb') if type(downsample) is dict else downsample or 'lttb'
+        limit = max(1,(points - 4) // 2) if method == 'minmax' else points
+        series = []
+        for name,x,y in self.readSeries(inputFile,data,columns,columnReader):
+            finite = np.isfinite(x) & np.isfinite(y)
+            if not finite.all():
+                x,y = x[finite],y[finite]
+            if downsample or len(x) > points:
+                with self._metrics.stage('downsample'):
+                    x,y = decimation_TW.decimate(x,y,downsample or 'lttb',limit)
+            series.append((name,x,y))
+        return series
+
+    def generatePlot(self,inputFile,xLabel,yLabel,downsample=None,cache=None,data=None,columns=None,columnReader=None):
+        """Generate a plot as an in-memory PNG image.
         
-        Read the data from the input file by using an another function. Create a plot by using the given labels. Save the plot as an image. Return the name of the image file. 
+        Read the data from the input file by using an another function. Create a plot by using the given labels. Render the plot into a BytesIO buffer and return it. 
+        The plot is rendered by the chart renderer of the process (see ChartRenderer), which reuses one figure for every chart. 
+        If downsample is given, the series is decimated before plotting (see decimation_TW.decimate). 
+        The default number of points is the width of the image in pixels.
+        If a cache is given and it contains the image of the same data and settings, its name is returned without reading the data or rendering.
+        If columns is given, the input file is a multi-column file, and the selected y columns are overlaid on the chart with a legend.
         Parameters
         ----------
         inputFile : str
@@ -75,11 +346,21 @@ class Plotter:
             The label of the x axis.
         yLabel : str
             The label of the y axis.
+        downsample : str or dict
+            The downsample setting of the plot configuration, e.g. 'lttb' or {'method': 'minmax', 'points': 1500}.
+        cache : PlotCache
+            The cache of the rendered images (see plot_cache_TW). None means no caching.
+        data : bytes
+            The content of the input file, if it is already in memory (see prefetch_TW).
+        columns : dict
+            The selected columns of a multi-column file, e.g. {'x': 'time', 'y': ['ch1', 'ch2']} (see readColumns).
+        columnReader : ColumnReader
+            The reader which keeps the parsed multi-column files (see column_reader_TW).
 
         Returns
         -------
-        str
-            The filename of the image file.
+        io.BytesIO or str
+            The buffer contains the PNG image, or the filename of the cached image.
 
         Raises
         ----------
@@ -87,26 +368,54 @@ class Plotter:
             If the xLabel or yLabel is not a string.
 
         IOError
-            If the image file can not be written. 
+            If the image can not be rendered. 
+
+        ValueError
+            If the downsample setting or the column selection is not appropriate.
         """
 
         if not type(xLabel) or not type(yLabel) is str:
             self._logger.error('The labels must be strings.')
             raise TypeError
 
-        plotter = Plotter(inputFile)
-        data = plotter.readXYData(inputFile)
-        x = np.array(data[0])
-        y = np.array(data[1])
-        fig,ax = plt.subplots()
-        ax.plot(x,y)
-        ax.set_xlabel(xLabel)
-        ax.set_ylabel(yLabel)
-        figName = 'figure.png'
-        try:
-            fig.savefig(figName)
-            self._logger.error('The figure is saved.')
-        except:
-            self._logger.error('The figure can not be written.')
-            raise IOError
-        return figName
\ No newline at end of file
+        if cache is not None:
+            figsize,dpi = _rendererSettings()
+            settings = {'x-label': xLabel, 'y-label': yLabel, 'downsample': downsample,
+                        'figsize': figsize, 'dpi': dpi}
+            if columns is not None:
+                settings['columns'] = columns
+            with self._metrics.stage('cache'):
+                cacheKey = cache.key(inputFile, settings, data)
+                cachedImage = cache.get(cacheKey)
+            if cachedImage is not None:
+                return cachedImage
+
+        renderer = defaultRenderer()
+        series = self.readSeries(inputFile,data,columns,columnReader)
+        if downsample:
+            with self._metrics.stage('downsample'):
+                series = [(name,) + decimation_TW.decimate(x,y,downsample,renderer.width) for name,x,y in series]
+        with self._metrics.stage('render') as record:
+            image = renderer.render(series,xLabel,yLabel,columns is not None)
+            self._logger.info('The figure is rendered.')
+            record['bytes'] = image.tell()
+        if cache is not None:
+            cache.put(cacheKey, image.getvalue())
+        image.seek(0)
+        return image
+
+
+def renderPlot(inputFile,xLabel,yLabel,downsample=None,cache=None,columns=None):
+    """Generate a plot image in a worker process.
+
+    Module level wrapper of Plotter.generatePlot, so it can be sent to a process pool.
+
+    Returns
+    -------
+    bytes or str
+        The PNG image, or the filename of the cached image.
+    """
+    image = Plotter(inputFile).generatePlot(inputFile,xLabel,yLabel,downsample,cache,columns=columns)
+    if type(image) is str:
+        return image
+    return image.getvalue()
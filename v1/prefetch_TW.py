@@ -0,0 +1,234 @@
+import collections
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_WORKERS = 8
+DEFAULT_WINDOW = 64
+# the total size of the files read ahead and not taken yet
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def readPicture(fileName):
+    """Read a picture file into memory."""
+    with open(fileName, 'rb') as inpf:
+        return inpf.read()
+
+
+def readData(fileName):
+    """Read a data file into memory.
+
+    A binary file (or an up-to-date binary sidecar, see xy_binary_TW) is not read: the plotter maps it into memory,
+    so only the cache of the operating system is warmed up, and None is returned.
+    """
+    import xy_binary_TW
+    binaryFile = xy_binary_TW.findBinary(fileName)
+    if binaryFile is not None:
+        warmCache(binaryFile)
+        return None
+    with open(fileName, 'rb') as inpf:
+        return inpf.read()
+
+
+def warmCache(fileName):
+    """Ask the operating system to read a file into its cache (where it is supported), without reading it into memory."""
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    fd = os.open(fileName, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    finally:
+        os.close(fd)
+
+
+class AssetPrefetcher:
+    """Load the files referenced by the slides concurrently.
+
+    The slide entries are scanned ahead of the slide builders within a bounded window, and the pictures and data files
+    they reference are read by a bounded thread pool. The builders take the content as ready-to-use buffers.
+    A file referenced by several slides in the window is read once, and its content is released when the last of them takes it.
+    The window is limited by the total size of the files read ahead too: no more entries are scanned while the files
+    not taken yet exceed maxBytes (the next entry is always scanned, so a file larger than the limit is still prefetched).
+    The binary data files are not read ahead, see readData.
+    """
+
+    def __init__(self, maxWorkers=DEFAULT_WORKERS, window=DEFAULT_WINDOW, maxBytes=DEFAULT_MAX_BYTES):
+        """Initialization.
+
+        Parameters
+        ----------
+        maxWorkers : int
+            The number of reader threads.
+        window : int
+            The number of slide entries scanned ahead.
+        maxBytes : int
+            The maximal total size of the files read ahead and not taken yet.
+
+        Raises
+        ----------
+        ValueError
+            If the maxWorkers, the window or the maxBytes is not positive.
+        """
+        self._logger = logging.getLogger(self.__class__.__name__)
+        if maxWorkers < 1 or window < 1 or maxBytes < 1:
+            self._logger.error('The number of workers, the window and the size limit must be positive.')
+            raise ValueError
+        self._executor = ThreadPoolExecutor(max_workers=maxWorkers, thread_name_prefix='prefetch')
+        self._window = window
+        self._maxBytes = maxBytes
+        self._lock = threading.Lock()
+        # (kind, fileName) -> [future, number of slides still waiting for it, size of the file]
+        self._assets = {}
+        # the total size of the scheduled files
+        self._bytes = 0
+
+    @property
+    def pendingBytes(self):
+        """The total size of the files read ahead (or being read) and not taken yet."""
+        return self._bytes
+
+    def schedule(self, kind, fileName):
+        """Start reading a file, or register one more user of a file already being read.
+
+        Parameters
+        ----------
+        kind : str
+            'picture' or 'data'.
+        fileName : str
+            The name of the file.
+        """
+        key = (kind, fileName)
+        with self._lock:
+            asset = self._assets.get(key)
+            if asset is not None:
+                asset[1] += 1
+                return
+            try:
+                size = os.path.getsize(fileName)
+            except OSError:
+                size = 0
+            reader = readData if kind == 'data' else readPicture
+            future = self._executor.submit(reader, fileName)
+            self._assets[key] = [future, 1, size]
+            self._bytes += size
+        # a binary data file is not read into memory, it does not count
+        future.add_done_callback(lambda future: self._settle(key, future))
+
+    def _settle(self, key, future):
+        if future.cancelled() or future.exception() is not None or future.result() is not None:
+            return
+        with self._lock:
+            asset = self._assets.get(key)
+            if asset is not None and asset[0] is future:
+                self._bytes -= asset[2]
+                asset[2] = 0
+
+    def _release(self, key, asset):
+        """Drop a user of a scheduled file, and the file itself after its last user; the lock must be held."""
+        asset[1] -= 1
+        if asset[1] == 0:
+            del self._assets[key]
+            self._bytes -= asset[2]
+            return True
+        return False
+
+    def take(self, kind, fileName):
+        """Wait for a scheduled file and return its content.
+
+        Parameters
+        ----------
+        kind : str
+            'picture' or 'data'.
+        fileName : str
+            The name of the file.
+
+        Returns
+        -------
+        bytes or None
+            The content of the file, None if it is not scheduled, it is a binary data file or it can not be read
+            (the builder then opens the file itself and reports the error as usual).
+        """
+        key = (kind, fileName)
+        with self._lock:
+            asset = self._assets.get(key)
+            if asset is None:
+                return None
+            self._release(key, asset)
+        try:
+            return asset[0].result()
+        except OSError:
+            self._logger.warning('The file can not be prefetched ({0}).'.format(fileName))
+            return None
+
+    def takeBuffer(self, kind, fileName):
+        """Like take, but the content is returned as an io.BytesIO buffer (None if it is not available)."""
+        data = self.take(kind, fileName)
+        return None if data is None else io.BytesIO(data)
+
+    def lookahead(self, slides, prefetchData=True):
+        """Yield the slide entries while the assets of the next window of entries are being read.
+
+        Parameters
+        ----------
+        slides : iterable
+            The slide entries or the compiled slide plans of the configuration.
+        prefetchData : bool
+            False if the data files of the plots are not needed (e.g. the plots are rendered in worker processes).
+        """
+        pending = collections.deque()
+        iterator = iter(slides)
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < self._window and (not pending or self._bytes < self._maxBytes):
+                dat = next(iterator, None)
+                if dat is None:
+                    exhausted = True
+                    break
+                self._scan(dat, prefetchData)
+                pending.append(dat)
+            if not pending:
+                return
+            yield pending.popleft()
+
+    def discard(self, dat):
+        """Release the files of a slide entry which is not built (e.g. it is kept from the previous output)."""
+        asset = self._asset(dat, True)
+        if asset is None:
+            return
+        with self._lock:
+            scheduled = self._assets.get(asset)
+            if scheduled is None:
+                return
+            if self._release(asset, scheduled):
+                scheduled[0].cancel()
+
+    def _scan(self, dat, prefetchData):
+        asset = self._asset(dat, prefetchData)
+        if asset is not None:
+            self.schedule(*asset)
+
+    @staticmethod
+    def _asset(dat, prefetchData):
+        if type(dat) is dict:
+            stype = dat.get('type')
+            content = dat.get('content')
+        else:
+            # a compiled slide plan (see config_compiler_TW)
+            stype = dat.stype
+            content = dat.path
+        if not type(content) is str:
+            return None
+        if stype == 'picture':
+            return ('picture', content)
+        if stype == 'plot' and prefetchData:
+            return ('data', content)
+        return None
+
+    def close(self):
+        """Stop the reader threads and drop the content which is not taken."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            self._assets.clear()
+            self._bytes = 0
@@ -1,14 +1,104 @@
-import logging
+import argparse
+import collections
+import io
+import itertools
 import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
 
+import config_stream_TW
 import presentation_generator_TW
-from plotter_TW import Plotter
+from config_compiler_TW import ConfigCompiler, CustomPlan, ListPlan, PlotPlan
+from image_pipeline_TW import ImagePipeline, DEFAULT_QUALITY
+from incremental_TW import IncrementalBuild
+from instrumentation_TW import Metrics, NULL_METRICS
+from plot_cache_TW import PlotCache
+from prefetch_TW import AssetPrefetcher, DEFAULT_WINDOW
+
+# the estimated cost of a slide relative to a text slide, used to balance the shards
+SHARD_WEIGHTS = {'picture': 3, 'plot': 10}
+# the number of list lines costing as much as a text slide
+SHARD_LIST_LINES = 10
+# the number of configuration entries whose plots are sent to the worker processes ahead of the slides
+PLOT_WINDOW = 64
+
+class BuildOptions:
+    """The options of a build (see Presentation). Every option has a default, so only the changed ones are given.
+
+    Attributes
+    ----------
+    plotCache : PlotCache
+        The cache of the rendered plot images (see plot_cache_TW). None means every plot is rendered.
+    plotWorkers : int
+        The number of worker processes rendering the plots in parallel. None or 0 means the plots are rendered one after another in the main process.
+    template : pptx.presentation.Presentation
+        The already parsed template file (see batch_builder_TW). None means the template file is parsed.
+    metrics : Metrics
+        The per-slide and per-stage timing of the generation (see instrumentation_TW). None means no measurement.
+    imagePipeline : ImagePipeline
+        The downscaling and re-encoding of the pictures (see image_pipeline_TW). None means the pictures are embedded as they are.
+    prefetchWorkers : int
+        The number of threads reading the pictures and data files ahead of the slides (see prefetch_TW). None or 0 means the files are read when their slide is built.
+    prefetchWindow : int
+        The number of configuration entries scanned ahead for files to prefetch.
+    incremental : bool
+        If True, the slides of the previous output whose configuration entry and files are unchanged are kept,
+        and only the other slides are built (see incremental_TW).
+    streaming : bool
+        If True, every finished slide is written to the output file at once and released, so the memory use does not grow
+        with the length of the deck (see streaming_writer_TW).
+    shards : int
+        The number of worker processes building the deck. The slides are split into this many contiguous shards,
+        every shard is built into its own pptx from the template, and the shards are merged (see deck_merge_TW).
+        None or 1 means the deck is built in the main process. It can not be combined with incremental.
+    nativeCharts : bool
+        If True, the plots are native chart objects instead of rendered images, unless their configuration says otherwise ('chart': 'image').
+    optimize : bool
+        If True, the output is written by the optimizing save (see package_optimizer_TW): the layouts and masters no slide uses are pruned
+        (except in an incremental build, the next build may need them), the pictures are stored without compression and the XML is deflated
+        at the highest level.
+    """
+
+    __slots__ = ('plotCache', 'plotWorkers', 'template', 'metrics', 'imagePipeline', 'prefetchWorkers', 'prefetchWindow',
+                 'incremental', 'streaming', 'shards', 'nativeCharts', 'optimize')
+
+    def __init__(self,plotCache=None,plotWorkers=None,template=None,metrics=None,imagePipeline=None,prefetchWorkers=None,prefetchWindow=DEFAULT_WINDOW,
+                 incremental=False,streaming=False,shards=None,nativeCharts=False,optimize=False):
+        self.plotCache = plotCache
+        self.plotWorkers = plotWorkers
+        self.template = template
+        self.metrics = metrics
+        self.imagePipeline = imagePipeline
+        self.prefetchWorkers = prefetchWorkers
+        self.prefetchWindow = prefetchWindow
+        self.incremental = incremental
+        self.streaming = streaming
+        self.shards = shards
+        self.nativeCharts = nativeCharts
+        self.optimize = optimize
+
 
 class Presentation:
     """The main class to create the pptx. One function (generate) should go through the configuration (JSON) file, and call the appropriate module/object/function. 
-    The output is the generated pptx file."""
+    The output is the generated pptx file.
+
+    The slide types are dispatched through a registry. Every type has a handler and the name of its layout in the template,
+    new types can be added with registerSlideType.
+    The whole configuration is checked before the first slide is built, and its entries are compiled into slide plans (see config_compiler_TW)."""
+
+    # slide type -> (name of the handler method, name of the layout in the template); the handlers get the compiled SlidePlan of the slide
+    SLIDE_TYPES = {
+        'title': ('_titleSlide', 'Title Slide'),
+        'list': ('_listSlide', 'Title and Content'),
+        'picture': ('_pictureSlide', 'Title Only'),
+        'plot': ('_plotSlide', 'Title Only'),
+        'text': ('_textSlide', 'Title Only'),
+    }
 
-    def __init__(self,outputFileName,templateFileName):
+    def __init__(self,outputFileName,templateFileName,options=None):
         """Initialization.
 
         Set up the logger. Call the generator module with the name of the output file and the name of the template file.
@@ -19,9 +109,49 @@ class Presentation:
             The name of the output pptx file.            
         templateFileName : str
             The name of the template file. 
+        options : BuildOptions
+            The options of the build. None means the defaults.
+
+        Raises
+        ----------
+        ValueError
+            If both shards and incremental are set.
         """
+        if options is None:
+            options = BuildOptions()
         self._logger = logging.getLogger(self.__class__.__name__)
-        self._generator = presentation_generator_TW.PresentationGenerator(outputFileName,templateFileName)
+        self._plotCache = options.plotCache
+        self._plotWorkers = options.plotWorkers
+        self._metrics = NULL_METRICS if options.metrics is None else options.metrics
+        self._plotJobs = collections.deque()
+        self._prefetchWorkers = options.prefetchWorkers
+        self._prefetchWindow = options.prefetchWindow
+        self._prefetcher = None
+        self._columnReader = None
+        self._incremental = None
+        self._claims = collections.deque()
+        self._outputFileName = outputFileName
+        self._templateFileName = templateFileName
+        self._imagePipeline = options.imagePipeline
+        self._streaming = options.streaming
+        self._shards = options.shards
+        self._nativeCharts = options.nativeCharts
+        self._optimize = options.optimize
+        if options.shards and options.shards > 1 and options.incremental:
+            self._logger.error('The sharded build can not be incremental.')
+            raise ValueError
+        previous = None
+        if options.incremental:
+            settings = {'image': None if options.imagePipeline is None else options.imagePipeline.settings(), 'nativeCharts': options.nativeCharts}
+            self._incremental = IncrementalBuild(outputFileName,templateFileName,settings)
+            previous = self._incremental.previousPresentation()
+        self._slideTypes = {stype: (getattr(self, handler), layoutName) for stype, (handler, layoutName) in self.SLIDE_TYPES.items()}
+        self._typedTypes = set(self.SLIDE_TYPES)
+        self._layouts = {}
+        self._compiler = ConfigCompiler(self._slideTypes,self.resolveLayout,self._typedTypes)
+        self._generator = presentation_generator_TW.PresentationGenerator(outputFileName,templateFileName,options.template,options.metrics,
+                                                                          options.imagePipeline,previous,options.streaming,options.optimize,
+                                                                          keepTemplate=options.incremental)
 
     def layoutSelect(self,stype):
         """Select the layout of the slide.
@@ -64,21 +194,91 @@ class Presentation:
             self._logger.error('There is an inaproppriate slide type.')
             raise ValueError
 
+    def registerSlideType(self,stype,handler,layoutName):
+        """Register a new slide type or replace an existing one.
+
+        Parameters
+        ----------
+        stype : str
+            The type of the slide, as it appears in the configuration.
+        handler : callable
+            It is called as handler(generator, layout, dat) for every slide of this type, where generator is the PresentationGenerator,
+            layout is the number of the resolved layout and dat is the entry of the configuration.
+        layoutName : str
+            The name of the layout in the template.
+
+        Raises
+        ----------
+        TypeError
+            If the stype or layoutName is not a string, or the handler is not callable.
+
+        ValueError
+            If the template has no layout named layoutName.
+        """
+        if not type(stype) is str or not type(layoutName) is str or not callable(handler):
+            self._logger.error('The slide type and the layout name must be strings, the handler must be callable.')
+            raise TypeError
+        if self._generator.layoutIndex(layoutName) is None:
+            self._logger.error('The template has no layout named {0}.'.format(layoutName))
+            raise ValueError("the template has no layout named '{0}'.".format(layoutName))
+        self._slideTypes[stype] = (handler,layoutName)
+        self._typedTypes.discard(stype)
+        self._layouts.pop(stype,None)
+
+    def resolveLayout(self,stype):
+        """Resolve the layout of a slide type by its name in the loaded template.
+
+        The result is cached, so the template is searched only once per slide type.
+        If the template does not contain the layout name of a built-in type, the number given by layoutSelect is used.
+
+        Parameters
+        ----------
+        stype : str
+            The type of the slide.
+
+        Returns
+        -------
+        layoutNumber : int
+            The number of the layout in the template.
+
+        Raises
+        ----------
+        ValueError
+            If the stype is not registered, or the template has no layout for it.
+        """
+        try:
+            return self._layouts[stype]
+        except KeyError:
+            pass
+        if stype not in self._slideTypes:
+            self._logger.error('There is an inaproppriate slide type.')
+            raise ValueError
+        layoutName = self._slideTypes[stype][1]
+        layout = self._generator.layoutIndex(layoutName)
+        if layout is None:
+            if stype not in self.SLIDE_TYPES:
+                self._logger.error('The template has no layout named {0}.'.format(layoutName))
+                raise ValueError("the template has no layout named '{0}'.".format(layoutName))
+            self._logger.warning('The template has no layout named {0}, the default one is used.'.format(layoutName))
+            layout = self.layoutSelect(stype)
+        self._layouts[stype] = layout
+        return layout
+
     def generate(self,configFileName):
         """Read the configuration (JSON) file and act accordingly.
-        
-        The configuration file should contain the type of the slide. The generate function calls the appropriate functions accordind to the different types. 
-        The configuration file usually contains every information needed to generate the slide, except the layout number. 
-        The layout number should be chosen according to the type of the slide by using the layoutSelect. The layout number is an input for every function of the presentation generator.     
-        But there are cases, when other opreations must be done before calling the slide generator. 
-        In case of the Plot slide, first, the Plotter module should be called and the image file should be generated. 
-        In case of the List slide, a numpy array containing the levels and the numpy array containing the lines should be generated. 
-        (There is no need to do the conversion with an other function.) 
+
+        The configuration is checked before the first slide is built, and all the errors are reported at once (see config_compiler_TW).
+        Every entry is compiled into a slide plan and built by the handler of its slide type with the layout resolved by name (resolveLayout).
+        A configuration file is read again while the slides are built, so the memory use does not grow with it; the standard input
+        or an opened stream is buffered instead. Both the {"presentation": [...]} document and JSON Lines are accepted.
+        A plot entry may select the 'x' and 'y' columns of a multi-column file, a 'downsample' method and the 'chart' kind
+        ('image' or 'native'); a list entry may set its 'lines-per-slide'.
+        The plots, pictures and shards are built as the options of the build say (see BuildOptions).
 
         Parameters
         ----------
-        configFileName : str
-            The name of the configuration (JSON) file.            
+        configFileName : str or file object
+            The name of the configuration (JSON) file, '-' for the standard input, or an opened text stream.
         
         Returns
         -------
@@ -93,43 +293,382 @@ class Presentation:
         ValueError
             If the configuration file contains wrong data.
         """
+        with self._metrics.profile():
+            return self._generate(configFileName)
+
+    def check(self,configFileName):
+        """Check the configuration without building any slide.
+
+        Parameters
+        ----------
+        configFileName : str or file object
+            The name of the configuration (JSON) file, '-' for the standard input, or an opened text stream.
+
+        Returns
+        -------
+        list
+            The error messages (one per wrong entry), empty if the configuration is correct.
+
+        Raises
+        ----------
+        IOError
+            If the config file can not be read.
+        """
+        inpf = self._openConfig(configFileName)
+        try:
+            return self._compiler.check(config_stream_TW.ConfigStream(inpf))
+        finally:
+            self._closeConfig(configFileName,inpf)
+
+    def _openConfig(self,configFileName):
         try:
-            with open(configFileName) as inpf:
-                try:
-                    self.data = json.load(inpf)['presentation']
-                except:
-                    self._logger.error('File contains bad data.')
-                    raise ValueError
+            return config_stream_TW.openConfig(configFileName)
         except IOError:
             self._logger.error('Input file not found.')
             raise IOError
-        
-        for dat in self.data:
-            if dat['type'] == 'text':
-                self._generator.addText(presentation.layoutSelect(dat['type']),dat['title'],dat['content'])
-            elif dat['type'] == 'title':
-                self._generator.addTitle(presentation.layoutSelect(dat['type']),dat['title'],dat['content'])
-            elif dat['type'] == 'list':
-                levels = []
-                text = []
-                for level in dat['content']:
-                    levels.append(level['level'])
-                    text.append(level['text'])
-                self._generator.addList(presentation.layoutSelect(dat['type']),dat['title'],levels,text)
-            elif dat['type'] == 'picture':
-                self._generator.addImage(presentation.layoutSelect(dat['type']),dat['title'],dat['content'])
-            elif dat['type'] == 'plot':
-                plotImage = Plotter(dat['content']).generatePlot(dat['content'],dat['configuration']['x-label'],dat['configuration']['y-label'])
-                self._generator.addPlot(presentation.layoutSelect(dat['type']),dat['title'],plotImage)
+
+    @staticmethod
+    def _closeConfig(configFileName,inpf):
+        if inpf is not configFileName and inpf is not sys.stdin:
+            inpf.close()
+
+    def _generate(self,configFileName):
+        plans,entries = self._readPlans(configFileName)
+        try:
+            if self._shards and self._shards > 1:
+                return self._generateShards(configFileName,plans,entries)
+            return self._buildSlides(plans)
+        finally:
+            if hasattr(plans,'close'):
+                plans.close()
+
+    def _readPlans(self,configFileName):
+        """Check the configuration and return its slide plans and its entries.
+
+        A configuration file is checked in a streaming pass first, then the plans are compiled from a second reading
+        while the slides are built, so neither the entries nor the plans are held in memory: the plans are a generator
+        and the entries are None (they can be read again).
+        The standard input, a pipe or an opened stream can not be read again, so it is buffered: its plans are compiled
+        into a list at once, and its entries are kept too if they are needed by the shards.
+        """
+        if self._isRereadable(configFileName):
+            with self._metrics.stage('config'):
+                errors = self.check(configFileName)
+            if errors:
+                self._compiler.raiseErrors(errors)
+            return (self._streamPlans(configFileName),None)
+        inpf = self._openConfig(configFileName)
+        try:
+            with self._metrics.stage('config'):
+                if self._shards and self._shards > 1:
+                    entries = list(config_stream_TW.ConfigStream(inpf))
+                    return (self._compiler.compile(entries),entries)
+                return (self._compiler.compile(config_stream_TW.ConfigStream(inpf)),None)
+        finally:
+            self._closeConfig(configFileName,inpf)
+
+    @staticmethod
+    def _isRereadable(configFileName):
+        return type(configFileName) is str and configFileName != '-' and os.path.isfile(configFileName)
+
+    def _streamEntries(self,configFileName):
+        """Read the entries of a configuration file again, one by one."""
+        inpf = self._openConfig(configFileName)
+        try:
+            yield from config_stream_TW.ConfigStream(inpf)
+        finally:
+            self._closeConfig(configFileName,inpf)
+
+    def _streamPlans(self,configFileName):
+        """Compile the plans of a checked configuration file one by one (see ConfigCompiler.iterCompile)."""
+        entries = self._streamEntries(configFileName)
+        try:
+            yield from self._compiler.iterCompile(entries)
+        finally:
+            entries.close()
+
+    def _buildSlides(self,plans):
+        """Build the slides of the plans in the main process and write the output."""
+        plotExecutor = None
+        self._plotJobs.clear()
+        self._claims.clear()
+        try:
+            slides = plans
+            if self._plotWorkers:
+                from concurrent.futures import ProcessPoolExecutor
+                plotExecutor = ProcessPoolExecutor(max_workers=self._plotWorkers)
+                slides = self._submitPlots(slides,plotExecutor)
+            if self._prefetchWorkers:
+                self._prefetcher = AssetPrefetcher(self._prefetchWorkers,self._prefetchWindow)
+                # the worker processes read the data files of the plots themselves
+                slides = self._prefetcher.lookahead(slides,prefetchData=not self._plotWorkers)
+            self._addSlides(slides)
+        except:
+            self._generator.abort()
+            raise
+        finally:
+            if plotExecutor is not None:
+                plotExecutor.shutdown(cancel_futures=True)
+                self._plotJobs.clear()
+                self._claims.clear()
+            if self._prefetcher is not None:
+                self._prefetcher.close()
+                self._prefetcher = None
+            self._columnReader = None
         try:
             self._generator.finalize()
+            if self._incremental is not None:
+                self._incremental.save()
             self._logger.info('Finalization is succesfull.')
             return(True)
         except: 
             self._logger.error('Finalization is not succesfull')
             return(False)
 
+    def _submitPlots(self,plans,executor):
+        """Send the plots to the worker processes PLOT_WINDOW entries ahead of the slides, and yield the plans in their order."""
+        from plotter_TW import renderPlot
+        pending = collections.deque()
+        iterator = iter(plans)
+        exhausted = False
+        submitted = 0
+        while True:
+            while not exhausted and len(pending) < PLOT_WINDOW:
+                plan = next(iterator,None)
+                if plan is None:
+                    exhausted = True
+                    break
+                previousIndices = None
+                if self._incremental is not None:
+                    # the kept plots are not rendered, so the slides are matched before the plots are submitted
+                    key,previousIndices = self._incremental.claim(plan)
+                    self._claims.append((key,previousIndices))
+                if type(plan) is PlotPlan and not previousIndices and not self._isNative(plan):
+                    self._plotJobs.append(executor.submit(renderPlot,plan.path,plan.xLabel,plan.yLabel,plan.downsample,self._plotCache,plan.columns))
+                    submitted += 1
+                pending.append(plan)
+            if not pending:
+                self._logger.info('{0} plots are rendered by {1} worker processes.'.format(submitted,self._plotWorkers))
+                return
+            yield pending.popleft()
+
+    def _generateShards(self,configFileName,plans,entries):
+        """Build the shards of the configuration in worker processes and merge them into the output.
+
+        The entries of every shard are written into a JSON Lines file of the shard directory, which the worker reads
+        as its configuration. The entries are None if the configuration file is read again for them.
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        from deck_merge_TW import DeckMerger
+        ranges = self._shardRanges(self._shardablePlans(plans),self._shards)
+        if entries is None:
+            entries = self._streamEntries(configFileName)
+        shardDir = tempfile.mkdtemp(prefix='shards',dir=os.path.dirname(os.path.abspath(self._outputFileName)))
+        # the shards are built in the main process of their worker, without the options of the whole build
+        shardOptions = BuildOptions(plotCache=self._plotCache,imagePipeline=self._imagePipeline,prefetchWorkers=self._prefetchWorkers,
+                                    prefetchWindow=self._prefetchWindow,streaming=self._streaming,nativeCharts=self._nativeCharts)
+        merger = None
+        try:
+            with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+                shards = []
+                iterator = iter(entries)
+                for n,(start,end) in enumerate(ranges):
+                    shardFileName = os.path.join(shardDir,'shard{0}.pptx'.format(n))
+                    shardConfigName = os.path.join(shardDir,'shard{0}.json'.format(n))
+                    with open(shardConfigName,'w') as outf:
+                        for dat in itertools.islice(iterator,end - start):
+                            outf.write(json.dumps(dat))
+                            outf.write('\n')
+                    shards.append((shardFileName,executor.submit(_buildShard,shardFileName,self._templateFileName,shardConfigName,shardOptions)))
+                self._logger.info('{0} slides are built in {1} shards.'.format(ranges[-1][1],len(ranges)))
+                with self._metrics.stage('shards'):
+                    merger = DeckMerger(self._outputFileName)
+                    # the shards are merged in their order as soon as they are ready
+                    for shardFileName,job in shards:
+                        job.result()
+                        merger.add(shardFileName)
+                    merger.close()
+            if self._optimize:
+                # the shards share the whole template, so it is pruned in the merged output
+                import package_optimizer_TW
+                with self._metrics.stage('optimize'):
+                    result = package_optimizer_TW.optimizeFile(self._outputFileName)
+                self._logger.info('The output is optimized: {0} layouts and {1} masters are pruned, {2} bytes are saved.'.format(
+                    result['layouts'],result['masters'],result['savedBytes']))
+        except:
+            if merger is not None:
+                merger.abort()
+            raise
+        finally:
+            if hasattr(entries,'close'):
+                entries.close()
+            shutil.rmtree(shardDir,ignore_errors=True)
+        self._logger.info('Finalization is succesfull.')
+        return(True)
+
+    def _shardablePlans(self,plans):
+        """Yield the plans, and raise ValueError for a plan of a registered slide type."""
+        for plan in plans:
+            if type(plan) is CustomPlan:
+                self._logger.error('The registered slide types can not be built in shards.')
+                raise ValueError
+            yield plan
+
+    @staticmethod
+    def _shardRanges(plans,shards):
+        """Split the plans into contiguous (start, end) ranges of about the same estimated cost."""
+        weights = []
+        for plan in plans:
+            weight = SHARD_WEIGHTS.get(plan.stype,1)
+            if type(plan) is ListPlan:
+                weight += len(plan.texts) // SHARD_LIST_LINES
+            weights.append(weight)
+        total = sum(weights)
+        ranges = []
+        start = 0
+        cumulative = 0
+        for n,weight in enumerate(weights):
+            cumulative += weight
+            if cumulative * shards >= total * (len(ranges) + 1) and len(ranges) < shards - 1:
+                ranges.append((start,n + 1))
+                start = n + 1
+        if start < len(weights) or not ranges:
+            ranges.append((start,len(weights)))
+        return ranges
+
+    def _addSlides(self,slides):
+        """Add the slides in order.
+
+        Parameters
+        ----------
+        slides : iterable
+            The compiled slide plans of the configuration.
+        """
+        slideTypes = self._slideTypes
+        metrics = self._metrics
+        incremental = self._incremental
+        for plan in slides:
+            stype = plan.stype
+            handler = slideTypes[stype][0]
+            if incremental is not None:
+                key,previousIndices = self._claims.popleft() if self._claims else incremental.claim(plan)
+                if previousIndices:
+                    with metrics.slideStage(plan.index,stype):
+                        with metrics.stage('reuse'):
+                            for previousIndex in previousIndices:
+                                self._generator.keepSlide(previousIndex)
+                    if self._prefetcher is not None:
+                        self._prefetcher.discard(plan)
+                    incremental.record(key,len(previousIndices))
+                    self._generator.flushSlides()
+                    continue
+                slideCount = self._generator.slideCount()
+            with metrics.slideStage(plan.index,stype):
+                # the handlers of the registered types get the entry of the configuration as it is
+                handler(self._generator,plan.layout,plan.entry if type(plan) is CustomPlan else plan)
+            self._generator.flushSlides()
+            if incremental is not None:
+                # a long list is continued on several slides
+                incremental.record(key,self._generator.slideCount() - slideCount)
+
+    def _textSlide(self,generator,layout,plan):
+        generator.addText(layout,plan.title,plan.text)
+
+    def _titleSlide(self,generator,layout,plan):
+        generator.addTitle(layout,plan.title,plan.subtitle)
+
+    def _listSlide(self,generator,layout,plan):
+        generator.addList(layout,plan.title,plan.levels,plan.texts,plan.linesPerSlide)
+
+    def _pictureSlide(self,generator,layout,plan):
+        picture = plan.path
+        if self._prefetcher is not None:
+            with self._metrics.stage('prefetch-wait'):
+                picture = self._prefetcher.takeBuffer('picture',picture) or picture
+        generator.addImage(layout,plan.title,picture)
+
+    def _isNative(self,plan):
+        """Return True if the plot is a native chart."""
+        return plan.chart == 'native' or (plan.chart is None and self._nativeCharts)
+
+    def _plotSlide(self,generator,layout,plan):
+        # matplotlib and numpy are imported with the first plot, decks without plots do not pay for them
+        from plotter_TW import Plotter
+        native = self._isNative(plan)
+        if self._plotJobs and not native:
+            # the plots of the process pool are submitted in the order of the slides; the native charts are not rendered there
+            with self._metrics.stage('plot-wait'):
+                plotImage = self._plotJobs.popleft().result()
+            if type(plotImage) is bytes:
+                plotImage = io.BytesIO(plotImage)
+        else:
+            data = None
+            if self._prefetcher is not None:
+                with self._metrics.stage('prefetch-wait'):
+                    data = self._prefetcher.take('data',plan.path)
+            if plan.columns is not None and self._columnReader is None:
+                from column_reader_TW import ColumnReader
+                self._columnReader = ColumnReader()
+            plotter = Plotter(plan.path,self._metrics)
+            if native:
+                series = plotter.chartSeries(plan.path,plan.downsample,data,plan.columns,self._columnReader)
+                generator.addChart(layout,plan.title,series,plan.xLabel,plan.yLabel)
+                return
+            plotImage = plotter.generatePlot(plan.path,plan.xLabel,plan.yLabel,plan.downsample,self._plotCache,data,
+                                             plan.columns,self._columnReader)
+        generator.addPlot(layout,plan.title,plotImage)
+
+def _buildShard(outputFileName,templateFileName,configFileName,options):
+    """Build a shard of a sharded generation in a worker process from the configuration file of the shard.
+
+    Raises
+    ----------
+    IOError
+        If the shard can not be written.
+    """
+    presentation = Presentation(outputFileName,templateFileName,options)
+    if not presentation.generate(configFileName):
+        raise IOError
+
 if __name__ == "__main__":
     logging.basicConfig(format="%(asctime)s %(levelname)s %(message)s", level = logging.INFO)
-    presentation = Presentation('PYTHON-Environment.pptx','PYTHON-Course.template')
-    presentation.generate("sample.json")
+    parser = argparse.ArgumentParser(description='Generate a presentation from a configuration (JSON) file.')
+    parser.add_argument('config', nargs='?', default='sample.json', help="the configuration file, '-' for the standard input")
+    parser.add_argument('output', nargs='?', default='PYTHON-Environment.pptx', help='the output pptx file')
+    parser.add_argument('--template', default='PYTHON-Course.template', help='the template file')
+    parser.add_argument('--metrics', help='write the per-stage timing into this JSON file')
+    parser.add_argument('--profile', help='run under cProfile and dump the statistics into this file')
+    parser.add_argument('--plot-workers', type=int, help='render the plots in this many worker processes')
+    parser.add_argument('--plot-cache', help='keep the rendered plot images in this cache directory and reuse them')
+    parser.add_argument('--image-dpi', type=int, help='downscale the pictures to this resolution and re-encode them')
+    parser.add_argument('--image-quality', type=int, default=DEFAULT_QUALITY, help='the JPEG quality of the re-encoded pictures')
+    parser.add_argument('--incremental', action='store_true', help='keep the unchanged slides of the previous output and build only the changed ones')
+    parser.add_argument('--streaming', action='store_true', help='write every slide to the output as soon as it is finished (bounded memory for long decks)')
+    parser.add_argument('--prefetch-workers', type=int, help='read the pictures and data files ahead of the slides with this many threads')
+    parser.add_argument('--shards', type=int, help='build the deck in this many worker processes and merge their parts')
+    parser.add_argument('--native-charts', action='store_true', help='build the plots as native chart objects instead of rendered images')
+    parser.add_argument('--optimize', action='store_true', help='prune the unused layouts of the template and choose the compression of every part of the output')
+    parser.add_argument('--check', nargs='+', metavar='CONFIG', help='only check these configuration files, the exit status is 1 if any of them is wrong')
+    args = parser.parse_args()
+    if args.check:
+        presentation = Presentation(args.output,args.template)
+        failed = 0
+        for configFileName in args.check:
+            try:
+                errors = presentation.check(configFileName)
+            except IOError:
+                errors = ['The file can not be read.']
+            for error in errors:
+                print('{0}: {1}'.format(configFileName,error))
+            failed += bool(errors)
+        print('{0} of {1} configurations are wrong.'.format(failed,len(args.check)))
+        sys.exit(1 if failed else 0)
+    metrics = Metrics(profileFile=args.profile) if args.metrics or args.profile else None
+    imagePipeline = ImagePipeline(args.image_dpi,args.image_quality) if args.image_dpi else None
+    plotCache = PlotCache(args.plot_cache) if args.plot_cache else None
+    options = BuildOptions(plotCache,args.plot_workers,metrics=metrics,imagePipeline=imagePipeline,prefetchWorkers=args.prefetch_workers,incremental=args.incremental,
+                           streaming=args.streaming,shards=args.shards,nativeCharts=args.native_charts,optimize=args.optimize)
+    presentation = Presentation(args.output,args.template,options)
+    presentation.generate(args.config)
+    if args.metrics:
+        metrics.write(args.metrics)
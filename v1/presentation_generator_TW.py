@@ -1,8 +1,58 @@
+import copy
+import datetime
 import logging
+import math
+import operator
+import os
+import re
+from contextlib import contextmanager
+from xml.sax.saxutils import escape
 
 from pptx import Presentation
+from pptx.chart.data import XyChartData
+from pptx.chart.xlsx import XyWorkbookWriter
+from pptx.enum.chart import XL_CHART_TYPE, XL_LEGEND_POSITION
+from pptx.oxml import parse_xml
+from pptx.oxml.ns import nsdecls, qn
 from pptx.util import Inches
 from pptx.util import Cm
+from pptx.util import Pt
+from pptx.util import lazyproperty
+
+from instrumentation_TW import NULL_METRICS
+
+# the title of the slides continuing a list which does not fit on one slide
+LIST_CONTINUED = '{0} (cont.)'
+# the average width of a character relative to the size of the font, to estimate the wrapping of the list lines
+CHARACTER_WIDTH = 0.5
+# the control characters python-pptx escapes in a text run (e.g. BEL becomes "_x0007_")
+_CONTROL_CHARACTERS = re.compile(r'[\x00-\x08\x0B-\x1F]')
+_LINE_BREAKS = re.compile('\n|\v')
+# the size of a native chart, the same as the rendered plot images (640x480 pixels at 100 dpi)
+CHART_WIDTH = Inches(6.4)
+CHART_HEIGHT = Inches(4.8)
+# the font size of the axes and the legend of a native chart
+CHART_FONT_SIZE = Pt(12)
+# the creation date of the embedded workbooks of the charts, so the same chart gives the same file in every build
+CHART_WORKBOOK_DATE = datetime.datetime(2000, 1, 1)
+
+
+class _XyWorkbookWriter(XyWorkbookWriter):
+    """The workbook of a native chart with a fixed creation date."""
+
+    @contextmanager
+    def _open_worksheet(self, xlsx_file):
+        with super()._open_worksheet(xlsx_file) as (workbook, worksheet):
+            workbook.set_properties({'created': CHART_WORKBOOK_DATE})
+            yield workbook, worksheet
+
+
+class _XyChartData(XyChartData):
+    """The data of a native chart, written into a reproducible workbook."""
+
+    @lazyproperty
+    def _workbook_writer(self):
+        return _XyWorkbookWriter(self)
 
 #from presentation_io import PresentationIO
 
@@ -11,10 +61,14 @@ class PresentationGenerator:
 
     It creates different type of slides. The available types: Title, Text, Image, List, Plot.
     """
-    def __init__(self, outputFileName,templateFileName):
+    def __init__(self, outputFileName,templateFileName,template=None,metrics=None,imagePipeline=None,previous=None,streaming=False,optimize=False,keepTemplate=False):
         """Initialization.
         
         Set up the logger. Give the name of the output file and the template file of the presentation.
+        If an already parsed template is given, a copy of it is used instead of parsing the template file again.
+        If the previous output is given (see incremental_TW), it is used instead of the template, and its slides can be kept with keepSlide.
+        In streaming mode the finished slides are written to the output file by flushSlides and released, so the memory does not grow with the number of slides.
+        In optimizing mode the unused parts of the template are pruned and every part is written with the compression of its kind (see package_optimizer_TW).
 
         Parameters
         ----------
@@ -22,6 +76,20 @@ class PresentationGenerator:
             The name of the output file.
         templateFileName : str
             The name of the template file. 
+        template : pptx.presentation.Presentation
+            The parsed template file. It is not modified.
+        metrics : Metrics
+            The per-stage timing (see instrumentation_TW). None means no measurement.
+        imagePipeline : ImagePipeline
+            The downscaling and re-encoding of the pictures (see image_pipeline_TW). None means the pictures are embedded as they are.
+        previous : pptx.presentation.Presentation
+            The parsed previous output built from the same template. It is modified and saved as the new output.
+        streaming : bool
+            If True, the slides are written to the output as they are finished (see streaming_writer_TW).
+        optimize : bool
+            If True, the output is written by the optimizing save of finalize.
+        keepTemplate : bool
+            If True, the optimizing save keeps the unused layouts and masters (e.g. an incremental build needs them next time).
         Raises
         ----------
         TypeError
@@ -31,13 +99,32 @@ class PresentationGenerator:
             If the outputFileName has not .pptx extension or templateFileName has not .template extension.
         """
         self._logger = logging.getLogger(self.__class__.__name__)
+        self._metrics = NULL_METRICS if metrics is None else metrics
+        self._imagePipeline = imagePipeline
         if not type(outputFileName) is str or not type(templateFileName) is str:
             self._logger.error('Name of the file must be string.')
             raise TypeError
         else:
             if outputFileName.endswith('.pptx') and templateFileName.endswith('.template'):
                 self._outputFileName = outputFileName
-                self._presentation = Presentation(templateFileName)
+                self._previousSlides = []
+                if streaming:
+                    import streaming_writer_TW
+                    if not streaming_writer_TW.isSupported():
+                        self._logger.warning('The streaming mode is not supported by this python-pptx version, the presentation is saved at the end.')
+                        streaming = False
+                self._streaming = streaming
+                self._optimize = optimize
+                self._keepTemplate = keepTemplate
+                self._writer = None
+                self._listStyles = {}
+                if previous is not None:
+                    self._presentation = previous
+                    self._previousSlides = list(previous.slides._sldIdLst)
+                elif template is None:
+                    self._presentation = Presentation(templateFileName)
+                else:
+                    self._presentation = copy.deepcopy(template)
             else:
                 self._logger.error('The file extension is wrong.')
                 raise ValueError
@@ -45,6 +132,24 @@ class PresentationGenerator:
 
         
 
+    def layoutIndex(self, name):
+        """Find a layout of the template by its name.
+
+        Parameters
+        ----------
+        name : str
+            The name of the layout (e.g. 'Title Only').
+
+        Returns
+        -------
+        int or None
+            The number of the layout, None if the template has no layout with this name.
+        """
+        for index, slideLayout in enumerate(self._presentation.slide_layouts):
+            if slideLayout.name == name:
+                return index
+        return None
+
     def addTitle(self, layout, title, subTitle):
         """Generate the Title slide. 
 
@@ -123,11 +228,13 @@ class PresentationGenerator:
             self._logger.error("The slide generation is not successful.")
             raise SystemError
 
-    def addList(self, layout, title, levels, text):
+    def addList(self, layout, title, levels, text, linesPerSlide=None):
         """Generate the List slide. 
         
         The slide contains a title and a list. The number of the level is also an input. 
         It should select the layout first, then add a new slide and write the title and the text on the appropriate level.
+        The XML of all the lines is generated in one pass and added to the body at once (as python-pptx would write it line by line).
+        A list which does not fit on one slide is continued on new slides with the same layout and the title marked by LIST_CONTINUED.
         
         Parameters
         ----------
@@ -139,6 +246,9 @@ class PresentationGenerator:
             The numpy array contains the numbers to select the level of the list. 
         text : numpy array
             The numpy array contains the the text line by line (as a string). 
+        linesPerSlide : int
+            The maximal number of lines on one slide. None means the lines fitting the body of the layout are estimated
+            from its size and the text styles of the template, 0 means the list is never split.
 
         Returns
         -------
@@ -153,27 +263,103 @@ class PresentationGenerator:
 
         slideLayout = self._presentation.slide_layouts[layout]
         try:
-            slide = self._presentation.slides.add_slide(slideLayout)
-            shapes = slide.shapes
-            titleShape = shapes.title
-            bodyShape = shapes.placeholders[1]
-            titleShape.text = title
-            textFrame = bodyShape.text_frame
-            lines = [levels,text]
-            for i in range(len(levels)):
-                paragraph = textFrame.add_paragraph()
-                paragraph.level = lines[0][i]
-                paragraph.text = lines[1][i]
-            self._logger.info("List page is added.")
+            if len(levels) != len(text):
+                raise ValueError
+            paragraphs = [self._paragraphXml(level, line) for level, line in zip(levels, text)]
+            pages = self._listPages(slideLayout, levels, text, linesPerSlide)
+            for n, (start, end) in enumerate(pages):
+                slide = self._presentation.slides.add_slide(slideLayout)
+                shapes = slide.shapes
+                titleShape = shapes.title
+                bodyShape = shapes.placeholders[1]
+                titleShape.text = title if n == 0 else LIST_CONTINUED.format(title)
+                txBody = bodyShape.text_frame._txBody
+                txBody.extend(parse_xml('<p:txBody {0}>{1}</p:txBody>'.format(nsdecls('a', 'p'), ''.join(paragraphs[start:end]))))
+            if len(pages) == 1:
+                self._logger.info("List page is added.")
+            else:
+                self._logger.info("List page is added ({0} slides).".format(len(pages)))
             return True
         except:
             self._logger.error("The slide generation is not successful.")
             raise SystemError
     
+    @staticmethod
+    def _paragraphXml(level, line):
+        """Return the XML of a list line, the same as python-pptx writes for the level and text of a paragraph."""
+        level = operator.index(level)
+        if not 0 <= level <= 8:
+            raise ValueError
+        runs = '<a:br/>'.join('<a:r><a:t>{0}</a:t></a:r>'.format(escape(_CONTROL_CHARACTERS.sub(lambda match: '_x%04X_' % ord(match.group(0)), run))) if run else ''
+                              for run in _LINE_BREAKS.split(line))
+        return '<a:p><a:pPr{0}/>{1}</a:p>'.format(' lvl="{0}"'.format(level) if level else '', runs)
+
+    def _listPages(self, slideLayout, levels, text, linesPerSlide):
+        """Split the lines of a list into slides. Return the (first, end) line indices of every slide."""
+        count = len(text)
+        if linesPerSlide:
+            return [(start, min(start + linesPerSlide, count)) for start in range(0, count, linesPerSlide)] or [(0, 0)]
+        style = None if linesPerSlide == 0 else self._listStyle(slideLayout)
+        if style is None:
+            return [(0, count)]
+        height, width, levelStyles = style
+        pages = []
+        start = 0
+        # the body starts with an empty paragraph
+        used = levelStyles[0][0]
+        for n in range(count):
+            lineHeight, spaceBefore, margin, characterWidth = levelStyles[levels[n]]
+            lines = sum(max(1, math.ceil(len(part) * characterWidth / max(width - margin, characterWidth))) for part in _LINE_BREAKS.split(text[n]))
+            needed = spaceBefore + lines * lineHeight
+            if used + needed > height and n > start:
+                pages.append((start, n))
+                start = n
+                used = levelStyles[0][0]
+            used += needed
+        pages.append((start, count))
+        return pages
+
+    def _listStyle(self, slideLayout):
+        """Estimate the space of the list lines on a layout from the size of its body and the text styles of the slide master.
+
+        Returns the height and width of the body, and the line height, space before, left margin and character width of
+        every level (in EMU), or None if the layout has no body placeholder.
+        """
+        try:
+            return self._listStyles[slideLayout.part.partname]
+        except KeyError:
+            pass
+        style = None
+        body = next((placeholder for placeholder in slideLayout.placeholders if placeholder.placeholder_format.idx == 1), None)
+        if body is not None and body.height and body.width:
+            bodyStyle = slideLayout.slide_master._element.find('{0}/{1}'.format(qn('p:txStyles'), qn('p:bodyStyle')))
+            levelStyles = []
+            for level in range(9):
+                properties = None if bodyStyle is None else bodyStyle.find(qn('a:lvl{0}pPr'.format(level + 1)))
+                size = Pt(self._styleValue(properties, 'a:defRPr', 'sz', 1800) / 100)
+                spacing = self._styleValue(properties, 'a:lnSpc/a:spcPct', 'val', 100000) / 100000
+                spaceBefore = Pt(self._styleValue(properties, 'a:spcBef/a:spcPts', 'val', 0) / 100)
+                margin = int(properties.get('marL', 0)) if properties is not None else 0
+                levelStyles.append((size * spacing, spaceBefore, margin, size * CHARACTER_WIDTH))
+            # the default insets of the text frame: 0.1 inch on the left and right, 0.05 inch on the top and bottom
+            style = (body.height - Inches(0.1), body.width - Inches(0.2), levelStyles)
+        self._listStyles[slideLayout.part.partname] = style
+        return style
+
+    @staticmethod
+    def _styleValue(properties, path, attribute, default):
+        if properties is None:
+            return default
+        element = properties.find('/'.join(qn(tag) for tag in path.split('/')))
+        if element is None or element.get(attribute) is None:
+            return default
+        return int(element.get(attribute))
+
     def addImage(self, layout, title, fileName):
         """Generate the Image slide. 
             
             The slide contains a title and an image. It should select the layout first, then add a new slide and write the title and add the image.
+            If an image pipeline is set, the image is downscaled to the free area of the slide and re-encoded before it is embedded.
             
             Parameters
             ----------
@@ -181,8 +367,8 @@ class PresentationGenerator:
                 The number of the layout to be selected. 
             title : str
                 The string contains the title text. 
-            fileName: str
-                The name of the image file.
+            fileName: str or file-like object
+                The name of the image file, or a buffer contains the image.
 
             Returns
             -------
@@ -201,7 +387,12 @@ class PresentationGenerator:
             titleShape.text = title
             left = Cm(3.5)
             top = Cm(3.0)
-            slide.shapes.add_picture(fileName, left, top)
+            with self._metrics.stage('embed'):
+                if self._imagePipeline is None:
+                    slide.shapes.add_picture(fileName, left, top)
+                else:
+                    image, width, height = self._imagePipeline.prepare(fileName, self._presentation.slide_width - left, self._presentation.slide_height - top)
+                    slide.shapes.add_picture(image, left, top, width, height)
             self._logger.info("Image page is added ({0}, {1})".format(title, fileName))
             return True
         except:
@@ -211,7 +402,7 @@ class PresentationGenerator:
     def addPlot(self, layout, title, plotName):
         """Generate the Plot slide.
         
-        The slide contains a title and an image named plotName. It should select the layout first, then add a new slide and write the title and add the image.
+        The slide contains a title and the plot image given by plotName. It should select the layout first, then add a new slide and write the title and add the image.
                     
         Parameters
         ----------
@@ -219,8 +410,8 @@ class PresentationGenerator:
             The number of the layout to be selected. 
         title : str
             The string contains the title text. 
-        plotName: str
-            The name of the image file.
+        plotName: str or file-like object
+            The name of the image file, or a buffer (e.g. io.BytesIO) contains the image.
 
         Returns
         -------
@@ -240,14 +431,159 @@ class PresentationGenerator:
             titleShape.text = title
             left = Cm(3.5)
             top = Cm(3.0)
-            slide.shapes.add_picture(plotName, left, top)
-            self._logger.info("Plot page is added ({0}, {1})".format(title, plotName))
+            with self._metrics.stage('embed'):
+                slide.shapes.add_picture(plotName, left, top)
+            self._logger.info("Plot page is added ({0})".format(title))
+            return True
+        except:
+            raise SystemError
+
+    def addChart(self, layout, title, series, xLabel, yLabel):
+        """Generate the Plot slide with a native chart.
+
+        The slide contains a title and an XY (scatter with lines) chart object built from the series, in the place of the plot image.
+        The chart is drawn by PowerPoint, so it does not depend on a resolution; its data is kept in the embedded workbook of the chart.
+
+        Parameters
+        ----------
+        layout : int
+            The number of the layout to be selected.
+        title : str
+            The string contains the title text.
+        series : list
+            The (name, x, y) tuples of the series. A series without name is named by the yLabel; the legend is shown if every series has a name.
+        xLabel : str
+            The label of the x axis.
+        yLabel : str
+            The label of the y axis.
+
+        Returns
+        -------
+        bool
+            True if the slide generation is successful, False otherwise.
+
+        Raises
+        ----------
+        SystemError
+            If the slide generation is not successful.
+        """
+        slideLayout = self._presentation.slide_layouts[layout]
+        try:
+            slide = self._presentation.slides.add_slide(slideLayout)
+            slide.shapes.title.text = title
+            with self._metrics.stage('embed'):
+                chartData = _XyChartData()
+                for name, x, y in series:
+                    chartSeries = chartData.add_series(yLabel if name is None else name)
+                    for xValue, yValue in zip(x.tolist(), y.tolist()):
+                        chartSeries.add_data_point(xValue, yValue)
+                chart = slide.shapes.add_chart(XL_CHART_TYPE.XY_SCATTER_LINES_NO_MARKERS, Cm(3.5), Cm(3.0),
+                                               CHART_WIDTH, CHART_HEIGHT, chartData).chart
+                chart.font.size = CHART_FONT_SIZE
+                chart.has_legend = all(name is not None for name, x, y in series)
+                if chart.has_legend:
+                    chart.legend.position = XL_LEGEND_POSITION.BOTTOM
+                    chart.legend.include_in_layout = False
+                for axis, label in ((chart.category_axis, xLabel), (chart.value_axis, yLabel)):
+                    axis.has_title = True
+                    axis.axis_title.text_frame.text = label
+            self._logger.info("Chart page is added ({0})".format(title))
             return True
         except:
             raise SystemError
 
+    def slideCount(self):
+        """Return the number of slides of the presentation (including the not yet kept slides of the previous output)."""
+        return len(self._presentation.slides._sldIdLst)
+
+    def keepSlide(self, index):
+        """Keep a slide of the previous output as the next slide.
+
+        The slide is moved after the slides added so far, its XML and media parts are kept as they are.
+
+        Parameters
+        ----------
+        index : int
+            The index of the slide in the previous output.
+
+        Returns
+        -------
+        bool
+            True if the slide is kept.
+
+        Raises
+        ----------
+        ValueError
+            If there is no such slide in the previous output, or it is already kept.
+        """
+        try:
+            sldId = self._previousSlides[index]
+        except (IndexError, TypeError):
+            sldId = None
+        if sldId is None:
+            self._logger.error('There is no such slide in the previous output.')
+            raise ValueError
+        self._previousSlides[index] = None
+        sldIdLst = self._presentation.slides._sldIdLst
+        sldIdLst.remove(sldId)
+        sldIdLst.append(sldId)
+        self._logger.info("Slide {0} of the previous output is kept.".format(index))
+        return True
+
+    def _dropPreviousSlides(self):
+        """Remove the slides of the previous output which are not kept. Their parts are not saved."""
+        sldIdLst = self._presentation.slides._sldIdLst
+        for sldId in self._previousSlides:
+            if sldId is not None:
+                sldIdLst.remove(sldId)
+                self._presentation.part.drop_rel(sldId.rId)
+        self._previousSlides = []
+
+    def flushSlides(self):
+        """Write the finished slides to the output file and release them (streaming mode only).
+
+        The slides added or kept since the last call are written. They must not be changed afterwards.
+
+        Returns
+        -------
+        int
+            The number of written slides.
+
+        Raises
+        ----------
+        IOError
+            If the output file can not be written.
+        """
+        if not self._streaming:
+            return 0
+        if self._writer is None:
+            from streaming_writer_TW import StreamingWriter
+            self._writer = StreamingWriter(self._presentation, self._outputFileName, self._optimize)
+        pending = set(sldId for sldId in self._previousSlides if sldId is not None)
+        slideParts = []
+        # the new and the kept slides are always appended, so the unwritten ones are at the end
+        for sldId in reversed(self._presentation.slides._sldIdLst):
+            if sldId in pending:
+                break
+            slidePart = self._presentation.part.related_part(sldId.rId)
+            if self._writer.isFlushed(slidePart):
+                break
+            slideParts.append(slidePart)
+        for slidePart in reversed(slideParts):
+            self._writer.flushSlide(slidePart)
+        return len(slideParts)
+
+    def abort(self):
+        """Drop the partially written output file of the streaming mode."""
+        if self._writer is not None:
+            self._writer.abort()
+            self._writer = None
+
     def finalize(self):
         """Save the created pptx.
+
+        The optimizing save prunes the layouts and masters no slide uses (unless keepTemplate is set), stores the already
+        compressed parts (pictures, workbooks) without compression and deflates the XML parts at the highest level.
     
         Returns
         -------
@@ -260,7 +596,25 @@ class PresentationGenerator:
             If the finalization is not successfull, so the pptx file can not be written. 
         """
         try:
-            self._presentation.save(self._outputFileName)
+            with self._metrics.stage('finalize') as record:
+                self._dropPreviousSlides()
+                if self._optimize:
+                    import package_optimizer_TW
+                    pruned = {'layouts': 0, 'masters': 0, 'parts': 0, 'bytes': 0, 'savedBytes': 0}
+                    if not self._keepTemplate:
+                        pruned = package_optimizer_TW.pruneTemplate(self._presentation)
+                if self._streaming:
+                    self.flushSlides()
+                    self._writer.close()
+                    self._writer = None
+                elif self._optimize:
+                    package_optimizer_TW.writePackage(self._presentation, self._outputFileName)
+                else:
+                    self._presentation.save(self._outputFileName)
+                record['bytes'] = os.path.getsize(self._outputFileName)
+                if self._optimize:
+                    self._logger.info('The output is optimized: {0} layouts and {1} masters are pruned, {2} parts are not written (about {3} bytes are saved).'.format(
+                        pruned['layouts'], pruned['masters'], pruned['parts'], pruned['savedBytes']))
             return True
         except:
             raise IOError
\ No newline at end of file
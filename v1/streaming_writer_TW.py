@@ -0,0 +1,213 @@
+import logging
+import zipfile
+
+from pptx.opc.constants import CONTENT_TYPE as CT
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.opc.package import OpcPackage, Part
+from pptx.opc.packuri import CONTENT_TYPES_URI, PACKAGE_URI, PackURI
+from pptx.opc.oxml import serialize_part_xml
+from pptx.parts.image import ImagePart
+
+import package_optimizer_TW
+from atomic_file_TW import AtomicFile
+
+try:
+    from pptx.opc.serialized import _ContentTypesItem
+except ImportError:
+    _ContentTypesItem = None
+
+# The streaming writer relies on the following private details of python-pptx (tested with 1.0.2). They are all used
+# through _Internals, and isSupported checks them, so the generator falls back to the normal save if they change.
+
+
+def isSupported():
+    """Return True if the private details of python-pptx used by the streaming writer are available."""
+    return _Internals.isSupported()
+
+
+class _FlushedPart(Part):
+    """A part which is already written to the output. Only its name, content type and relationships are kept."""
+
+    @property
+    def blob(self):
+        return b''
+
+
+class _FlushedImagePart(ImagePart):
+    """An image part which is already written to the output.
+
+    Its hash and size are kept, so python-pptx can still share it between slides and scale new pictures of it.
+    """
+
+    @property
+    def blob(self):
+        return b''
+
+    @property
+    def _px_size(self):
+        return self._flushedSize[0]
+
+    @property
+    def _dpi(self):
+        return self._flushedSize[1]
+
+
+class _Internals:
+    """The private python-pptx details used by the streaming writer."""
+
+    @staticmethod
+    def isSupported():
+        try:
+            part = Part(PackURI('/check.xml'), CT.XML, None, b'')
+            return (_ContentTypesItem is not None and hasattr(_ContentTypesItem, 'xml_for') and '_blob' in vars(part)
+                    and hasattr(Part, '_rels') and hasattr(OpcPackage, '_rels')
+                    and isinstance(getattr(ImagePart, '_px_size', None), property) and isinstance(getattr(ImagePart, '_dpi', None), property))
+        except Exception:
+            return False
+
+    @staticmethod
+    def releaseImage(imagePart):
+        """Drop the content of an image part, but keep its hash and size."""
+        imagePart.sha1
+        imagePart._flushedSize = (imagePart._px_size, imagePart._dpi)
+        imagePart.__class__ = _FlushedImagePart
+        imagePart._blob = b''
+
+    @staticmethod
+    def release(part):
+        """Drop the content (blob or XML) of a part."""
+        part.__class__ = _FlushedPart
+        part._blob = b''
+        for name in ('_element', 'slide', 'notes_slide', 'chart', 'chart_workbook'):
+            part.__dict__.pop(name, None)
+
+    @staticmethod
+    def hasRels(part):
+        """Return True if the part has relationships (without creating them)."""
+        return bool(part._rels)
+
+    @staticmethod
+    def packageRelsXml(package):
+        return package._rels.xml
+
+    @staticmethod
+    def contentTypesXml(parts):
+        return serialize_part_xml(_ContentTypesItem.xml_for(parts))
+
+
+class StreamingWriter:
+    """Write a presentation into the pptx (zip) file slide by slide.
+
+    A finished slide is written to the zip file at once together with the images and charts it refers to, and the XML of the slide
+    and the content of the images and charts are released; only the name, content type and relationships of these parts stay in memory.
+    The remaining parts (presentation, layouts, masters, themes...) are written by close. The zip file is written next to
+    the output file and renamed at the end, so an interrupted build does not leave a broken pptx behind.
+    It must be used only if isSupported returns True.
+    """
+
+    def __init__(self, presentation, outputFileName, optimize=False):
+        """Initialization.
+
+        Parameters
+        ----------
+        presentation : pptx.presentation.Presentation
+            The presentation being built.
+        outputFileName : str
+            The name of the output pptx file.
+        optimize : bool
+            If True, every part is written with its own compression (see package_optimizer_TW.compressType).
+
+        Raises
+        ----------
+        IOError
+            If the output file can not be created.
+        """
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self._presentation = presentation
+        try:
+            self._output = AtomicFile(outputFileName)
+            self._zipFile = zipfile.ZipFile(self._output.file, 'w', compression=zipfile.ZIP_DEFLATED, strict_timestamps=False,
+                                            compresslevel=package_optimizer_TW.DEFLATE_LEVEL if optimize else None)
+        except OSError:
+            self._logger.error('The output file can not be created.')
+            raise IOError
+        self._optimize = optimize
+        self._written = set()
+        self.bytesWritten = 0
+
+    def isFlushed(self, part):
+        """Return True if the part is already written."""
+        return part.partname in self._written
+
+    def flushSlide(self, slidePart):
+        """Write a finished slide, its images and charts, and release them.
+
+        Parameters
+        ----------
+        slidePart : pptx.parts.slide.SlidePart
+            The part of the slide. It must not be changed after this call.
+        """
+        for rel in slidePart.rels.values():
+            if rel.is_external:
+                continue
+            if rel.reltype == RT.CHART:
+                # the chart and its embedded workbook belong to this slide only
+                for chartRel in rel.target_part.rels.values():
+                    if not chartRel.is_external:
+                        self._release(chartRel.target_part)
+                self._release(rel.target_part)
+                continue
+            if rel.reltype != RT.IMAGE:
+                continue
+            imagePart = rel.target_part
+            if not self.isFlushed(imagePart):
+                self._write(imagePart)
+                _Internals.releaseImage(imagePart)
+        self._release(slidePart)
+
+    def _release(self, part):
+        """Write a part and release its content."""
+        if self.isFlushed(part):
+            return
+        self._write(part)
+        _Internals.release(part)
+
+    def close(self):
+        """Write the remaining parts, the relationships of the package and the content types, and move the file to its place.
+
+        Raises
+        ----------
+        IOError
+            If the file can not be written.
+        """
+        package = self._presentation.part.package
+        try:
+            parts = tuple(package.iter_parts())
+            for part in parts:
+                if not self.isFlushed(part):
+                    self._write(part)
+            self._zipFile.writestr(PACKAGE_URI.rels_uri.membername, _Internals.packageRelsXml(package))
+            self._zipFile.writestr(CONTENT_TYPES_URI.membername, _Internals.contentTypesXml(parts))
+            self._zipFile.close()
+            self._output.commit()
+        except OSError:
+            self.abort()
+            self._logger.error('The output file can not be written.')
+            raise IOError
+        self._logger.info('{0} parts are written ({1} bytes before compression).'.format(len(self._written), self.bytesWritten))
+
+    def abort(self):
+        """Close and remove the partially written file."""
+        self._zipFile.close()
+        self._output.discard()
+
+    def _write(self, part):
+        blob = part.blob
+        if self._optimize:
+            package_optimizer_TW.writePart(self._zipFile, part.partname, blob, part.content_type)
+        else:
+            self._zipFile.writestr(part.partname.membername, blob)
+        self.bytesWritten += len(blob)
+        if _Internals.hasRels(part):
+            self._zipFile.writestr(part.partname.rels_uri.membername, part.rels.xml)
+        self._written.add(part.partname)
@@ -0,0 +1,56 @@
+import os
+import shutil
+import tempfile
+import unittest
+from atomic_file_TW import AtomicFile
+
+"""
+Call as Py -3 -m unittest test_atomic_file.py
+"""
+
+class TestAtomicFile(unittest.TestCase):
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+        self.fileName = os.path.join(self.tmpDir, 'output.txt')
+        with open(self.fileName, 'w') as outf:
+            outf.write('old')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir)
+
+    def read(self):
+        with open(self.fileName) as inpf:
+            return inpf.read()
+
+    def test_commit(self):
+        """
+        The file is replaced at the end, not while it is written
+        """
+        with AtomicFile(self.fileName, 'w') as outf:
+            outf.write('new')
+            outf.flush()
+            self.assertEqual(self.read(), 'old')
+        self.assertEqual(self.read(), 'new')
+        self.assertEqual(os.listdir(self.tmpDir), ['output.txt'])
+
+    def test_discard(self):
+        """
+        An exception keeps the old file and removes the temporary file
+        """
+        with self.assertRaises(ValueError):
+            with AtomicFile(self.fileName, 'w') as outf:
+                outf.write('new')
+                raise ValueError
+        self.assertEqual(self.read(), 'old')
+        self.assertEqual(os.listdir(self.tmpDir), ['output.txt'])
+
+    def test_commit_failed(self):
+        """
+        The temporary file is removed if it can not be moved to its place
+        """
+        atomicFile = AtomicFile(self.fileName, 'w')
+        os.remove(self.fileName)
+        os.mkdir(self.fileName)
+        with self.assertRaises(OSError):
+            atomicFile.commit()
+        self.assertEqual(os.listdir(self.tmpDir), ['output.txt'])
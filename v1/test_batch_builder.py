@@ -0,0 +1,52 @@
+import os
+import shutil
+import tempfile
+import unittest
+from batch_builder_TW import BatchBuilder, collectJobs
+from pptx import Presentation
+
+"""
+Call as Py -3 -m unittest test_batch_builder.py
+"""
+
+class TestBatchBuilder(unittest.TestCase):
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir)
+
+    def test_templateFileName_badType(self):
+        """
+        templateFileName wrong type
+        """
+        with self.assertRaises(TypeError):
+            result = BatchBuilder(123)
+
+    def test_templateFileName_badFormat(self):
+        """
+        templateFileName wrong format
+        """
+        with self.assertRaises(ValueError):
+            result = BatchBuilder('ASD')
+
+    def test_collectJobs_directory(self):
+        """
+        A directory is expanded to its JSON files, the output goes to the output directory
+        """
+        for name in ('b.json', 'a.json', 'c.txt'):
+            open(os.path.join(self.tmpDir, name), 'w').close()
+        jobs = collectJobs([self.tmpDir], 'out')
+        self.assertEqual(jobs, [(os.path.join(self.tmpDir, 'a.json'), os.path.join('out', 'a.pptx')),
+                                (os.path.join(self.tmpDir, 'b.json'), os.path.join('out', 'b.pptx'))])
+
+    def test_buildAll_sharedTemplate(self):
+        """
+        Every job gets its own copy of the template
+        """
+        builder = BatchBuilder('PYTHON-Course.template')
+        outputs = [os.path.join(self.tmpDir, name) for name in ('a.pptx', 'b.pptx')]
+        results = builder.buildAll([('sample.json', output) for output in outputs])
+        self.assertTrue(all(results.values()))
+        for output in outputs:
+            self.assertEqual(len(Presentation(output).slides), 5)
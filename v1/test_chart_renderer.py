@@ -0,0 +1,71 @@
+import io
+import unittest
+import numpy as np
+import matplotlib.pyplot as plt
+from plotter_TW import ChartRenderer
+
+"""
+Call as Py -3 -m unittest test_chart_renderer.py
+"""
+
+def renderWithPyplot(series, legend):
+    fig, ax = plt.subplots()
+    try:
+        for name, x, y in series:
+            ax.plot(x, y, label=name)
+        if legend:
+            ax.legend()
+        ax.set_xlabel('x')
+        ax.set_ylabel('y')
+        image = io.BytesIO()
+        fig.savefig(image, format='png')
+    finally:
+        plt.close(fig)
+    return image.getvalue()
+
+
+class TestChartRenderer(unittest.TestCase):
+    def setUp(self):
+        x = np.arange(20.0)
+        self.single = [(None, x, x ** 2)]
+        self.multi = [('a', x, x), ('b', x, -x), ('c', x, np.sin(x))]
+
+    def test_render_samePyplotImage(self):
+        """
+        The chart is the same as the one rendered on a new pyplot figure
+        """
+        renderer = ChartRenderer()
+        self.assertEqual(renderer.render(self.single, 'x', 'y').getvalue(), renderWithPyplot(self.single, False))
+
+    def test_render_reused(self):
+        """
+        The figure is reused by charts with different number of lines without leaving anything behind
+        """
+        renderer = ChartRenderer()
+        renderer.render(self.multi, 'x', 'y', True)
+        self.assertEqual(renderer.render(self.single, 'x', 'y').getvalue(), renderWithPyplot(self.single, False))
+        self.assertEqual(renderer.render(self.multi, 'x', 'y', True).getvalue(), renderWithPyplot(self.multi, True))
+
+    def test_render_empty(self):
+        """
+        A chart without data does not keep the axis limits of the previous chart
+        """
+        renderer = ChartRenderer()
+        for series in ([], [(None, np.array([]), np.array([]))]):
+            renderer.render(self.multi, 'x', 'y', True)
+            self.assertEqual(renderer.render(series, 'x', 'y').getvalue(), renderWithPyplot(series, False))
+
+    def test_render_dataReleased(self):
+        """
+        The figure does not keep the data of the rendered chart
+        """
+        renderer = ChartRenderer()
+        renderer.render(self.multi, 'x', 'y', True)
+        self.assertTrue(all(len(line.get_xdata()) == 0 for line in renderer._axes.get_lines()))
+
+    def test_width_settings(self):
+        """
+        The size of the image is taken from the given settings
+        """
+        renderer = ChartRenderer(figsize=(4, 3), dpi=50)
+        self.assertEqual((renderer.figsize, renderer.dpi, renderer.width), ([4.0, 3.0], 50.0, 200))
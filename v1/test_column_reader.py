@@ -0,0 +1,108 @@
+import math
+import numpy as np
+import os
+import shutil
+import tempfile
+import unittest
+from column_reader_TW import ColumnReader
+from plotter_TW import NATIVE_CHART_POINTS, Plotter
+
+"""
+Call as Py -3 -m unittest test_column_reader.py
+"""
+
+class TestColumnReader(unittest.TestCase):
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+        self.dataFile = os.path.join(self.tmpDir, 'data.csv')
+        with open(self.dataFile, 'w') as outf:
+            outf.write('# instrument export\ntime,ch1,ch2\n0,1,2\n1,3,4\n2,5,6\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir)
+
+    def test_parse_header(self):
+        """
+        The header gives the names of the columns
+        """
+        table = ColumnReader().parse(b'time;a;b\n1;2;3\n4;5;6\n')
+        self.assertEqual(table.names, ['time', 'a', 'b'])
+        self.assertEqual(list(table.column('b')), [3.0, 6.0])
+
+    def test_parse_noHeader(self):
+        """
+        Without header the columns are named by their index
+        """
+        table = ColumnReader().parse(b'1 2\r\n3 4\r\n')
+        self.assertEqual(table.names, ['0', '1'])
+        self.assertEqual(list(table.column(1)), [2.0, 4.0])
+
+    def test_parse_missingValue(self):
+        """
+        A missing value becomes NaN, the other values keep their columns
+        """
+        table = ColumnReader().parse(b'a,b,c\n1,,3\n4,5,6\n')
+        self.assertTrue(math.isnan(table.column('b')[0]))
+        self.assertEqual(list(table.column('c')), [3.0, 6.0])
+
+    def test_parse_raggedRows(self):
+        """
+        Rows with different number of values
+        """
+        with self.assertRaises(ValueError):
+            result = ColumnReader().parse(b'a,b\n1,2\n3\n')
+
+    def test_select_columns(self):
+        """
+        The selected y columns are returned with their names
+        """
+        x, series = ColumnReader().select(self.dataFile, 'time', ['ch2', 1])
+        self.assertEqual(list(x), [0.0, 1.0, 2.0])
+        self.assertEqual([name for name, y in series], ['ch2', 'ch1'])
+        self.assertEqual(list(series[1][1]), [1.0, 3.0, 5.0])
+
+    def test_select_unknownColumn(self):
+        """
+        A column which does not exist
+        """
+        with self.assertRaises(ValueError):
+            result = ColumnReader().select(self.dataFile, None, 'ch9')
+
+    def test_read_cached(self):
+        """
+        The file is parsed only once while it is not changed
+        """
+        reader = ColumnReader()
+        table = reader.read(self.dataFile)
+        self.assertIs(reader.read(self.dataFile), table)
+        with open(self.dataFile, 'a') as outf:
+            outf.write('3,7,8\n')
+        self.assertEqual(reader.read(self.dataFile).values.shape, (3, 4))
+
+    def test_generatePlot_columns(self):
+        """
+        A multi-column plot is rendered into a PNG image
+        """
+        image = Plotter(self.dataFile).generatePlot(self.dataFile, 'x', 'y', columns={'x': 'time', 'y': ['ch1', 'ch2']})
+        self.assertTrue(image.getvalue().startswith(b'\x89PNG'))
+
+    def test_chartSeries_limited(self):
+        """
+        The missing values are left out of a native chart, and a long series is downsampled
+        """
+        with open(self.dataFile, 'a') as outf:
+            outf.write('3,,9\n')
+            outf.write(''.join('{0},{0},{0}\n'.format(n) for n in range(4, 100)))
+        series = Plotter(self.dataFile).chartSeries(self.dataFile, columns={'x': 'time', 'y': ['ch1', 'ch2']}, points=50)
+        self.assertEqual([len(x) for name, x, y in series], [50, 50])
+        self.assertNotIn(3.0, list(series[0][1]))
+        self.assertTrue(all(np.isfinite(y).all() for name, x, y in series))
+
+    def test_chartSeries_minmaxLimited(self):
+        """
+        A 'minmax' series of a native chart has at most NATIVE_CHART_POINTS points
+        """
+        with open(self.dataFile, 'a') as outf:
+            outf.write(''.join('{0},{1},{2}\n'.format(n, math.sin(n), n % 7) for n in range(3, 10007)))
+        series = Plotter(self.dataFile).chartSeries(self.dataFile, 'minmax', columns={'x': 'time', 'y': ['ch1', 'ch2']})
+        self.assertTrue(all(0 < len(x) <= NATIVE_CHART_POINTS for name, x, y in series))
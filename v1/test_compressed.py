@@ -0,0 +1,97 @@
+import gzip
+import lzma
+import os
+import shutil
+import tempfile
+import unittest
+import compressed_TW
+from column_reader_TW import ColumnReader
+from plotter_TW import Plotter
+from xy_reader_TW import XYReader
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+"""
+Call as Py -3 -m unittest test_compressed.py
+"""
+
+class TestCompressed(unittest.TestCase):
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+        with open('sample.dat', 'rb') as inpf:
+            self.data = inpf.read()
+        self.expected = XYReader().read('sample.dat')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir)
+
+    def write(self, name, data):
+        fileName = os.path.join(self.tmpDir, name)
+        with open(fileName, 'wb') as outf:
+            outf.write(data)
+        return fileName
+
+    def assertSameData(self, result):
+        self.assertEqual([list(values) for values in result], [list(values) for values in self.expected])
+
+    def test_detectCompression_magic(self):
+        """
+        The compression is detected by the magic bytes, not by the name of the file
+        """
+        self.assertEqual(compressed_TW.detectCompression(gzip.compress(b'1 2')), 'gzip')
+        self.assertEqual(compressed_TW.detectCompression(lzma.compress(b'1 2')), 'xz')
+        self.assertEqual(compressed_TW.detectCompression(b'\x28\xb5\x2f\xfd\x00'), 'zstd')
+        self.assertIsNone(compressed_TW.detectCompression(b'(1,2)(3,4)'))
+
+    def test_read_gzipChunks(self):
+        """
+        A gzip compressed file is parsed in small chunks
+        """
+        self.assertSameData(XYReader(chunkSize=7).read(self.write('data', gzip.compress(self.data))))
+
+    def test_read_xz(self):
+        """
+        An xz compressed file
+        """
+        self.assertSameData(XYReader().read(self.write('data.xz', lzma.compress(self.data))))
+
+    @unittest.skipIf(zstandard is None, 'the zstandard package is not installed')
+    def test_read_zstd(self):
+        """
+        A zstd compressed file
+        """
+        self.assertSameData(XYReader().read(self.write('data.zst', zstandard.ZstdCompressor().compress(self.data))))
+
+    @unittest.skipIf(zstandard is not None, 'the zstandard package is installed')
+    def test_read_zstdNotSupported(self):
+        """
+        A zstd compressed file without the zstandard package
+        """
+        with self.assertRaises(IOError):
+            result = XYReader().read(self.write('data.zst', b'\x28\xb5\x2f\xfd\x00\x00'))
+
+    def test_read_truncated(self):
+        """
+        A truncated compressed file
+        """
+        with self.assertRaises(IOError):
+            result = XYReader().read(self.write('data.gz', gzip.compress(self.data)[:-20]))
+
+    def test_readXYData_prefetched(self):
+        """
+        The compressed content of a prefetched file is decompressed while it is parsed
+        """
+        fileName = self.write('data.gz', gzip.compress(self.data))
+        self.assertSameData(Plotter(fileName).readXYData(fileName, gzip.compress(self.data)))
+
+    def test_columnReader_compressed(self):
+        """
+        A compressed multi-column file, read from the disk and from the memory
+        """
+        data = lzma.compress(b'time,a\n0,1\n1,3\n')
+        fileName = self.write('data.csv.xz', data)
+        self.assertEqual(list(ColumnReader().read(fileName).column('a')), [1.0, 3.0])
+        self.assertEqual(list(ColumnReader().read(fileName, data).column('a')), [1.0, 3.0])
@@ -0,0 +1,147 @@
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from config_compiler_TW import ConfigCompiler, CustomPlan, ListPlan, PlotPlan
+from presentation_environment_TW import Presentation
+
+"""
+Call as Py -3 -m unittest test_config_compiler.py
+"""
+
+SLIDE_TYPES = {stype: (None, None) for stype in ('title', 'text', 'list', 'picture', 'plot', 'quote')}
+
+
+class TestConfigCompiler(unittest.TestCase):
+    def setUp(self):
+        self.compiler = ConfigCompiler(SLIDE_TYPES, lambda stype: 5, {'title', 'text', 'list', 'picture', 'plot'})
+
+    def test_compile_plans(self):
+        """
+        The entries are compiled into typed plans with resolved layouts and absolute file names
+        """
+        plans = self.compiler.compile([{'type': 'list', 'title': 'List', 'content': [{'level': 1, 'text': 'a'}, {'level': 2, 'text': 'b'}]},
+                                       {'type': 'plot', 'title': 'Plot', 'content': 'sample.dat', 'configuration': {'x-label': 'x', 'y-label': 'y', 'downsample': 'lttb'}},
+                                       {'type': 'quote', 'content': 'Asd'}])
+        self.assertIs(type(plans[0]), ListPlan)
+        self.assertEqual((plans[0].levels, plans[0].texts, plans[0].layout), ([1, 2], ['a', 'b'], 5))
+        self.assertIs(type(plans[1]), PlotPlan)
+        self.assertEqual(plans[1].path, os.path.abspath('sample.dat'))
+        self.assertEqual((plans[1].index, plans[1].columns), (1, None))
+        self.assertIs(type(plans[2]), CustomPlan)
+        self.assertEqual(plans[2].entry['content'], 'Asd')
+
+    def test_compile_slots(self):
+        """
+        The plans have no per-instance dictionary
+        """
+        plan = self.compiler.compile([{'type': 'text', 'title': 'Text', 'content': 'Asd'}])[0]
+        self.assertFalse(hasattr(plan, '__dict__'))
+
+    def test_compile_badEntries(self):
+        """
+        Wrong entries
+        """
+        with self.assertRaises(ValueError):
+            result = self.compiler.compile([{'type': 'text', 'title': 'Text'}])
+
+    def test_iterCompile_lazy(self):
+        """
+        The entries are compiled when their plans are taken, and a wrong entry raises when it is reached
+        """
+        plans = self.compiler.iterCompile(iter([{'type': 'text', 'title': 'Text', 'content': 'Asd'}, {'type': 'XXX'}]))
+        self.assertEqual(next(plans).title, 'Text')
+        with self.assertRaisesRegex(ValueError, "Entry 1: unknown slide type 'XXX'."):
+            result = next(plans)
+
+    def test_check_allErrors(self):
+        """
+        Every wrong entry of the configuration is reported
+        """
+        errors = self.compiler.check([{'type': 'title', 'title': 'Title', 'content': 'Sub'},
+                                      {'type': 'XXX'},
+                                      {'type': 'picture', 'title': 'Picture', 'content': 'missing.png'},
+                                      {'type': 'list', 'title': 'List', 'content': [{'level': '1', 'text': 'a'}]},
+                                      {'type': 'plot', 'title': 'Plot', 'content': 'sample.dat', 'configuration': {'x-label': 'x'}},
+                                      {'type': 'plot', 'title': 'Plot', 'content': 'sample.dat', 'configuration': {'x-label': 'x', 'y-label': 'y', 'downsample': 'XXX'}},
+                                      {'type': 'plot', 'title': 'Plot', 'content': 'sample.dat', 'configuration': {'x-label': 'x', 'y-label': 'y', 'y': []}},
+                                      {'type': 'plot', 'title': 'Plot', 'content': 'sample.dat', 'configuration': {'x-label': 'x', 'y-label': 'y', 'chart': 'XXX'}},
+                                      7])
+        self.assertEqual([error.split(':')[0] for error in errors], ['Entry {0}'.format(n) for n in range(1, 9)])
+
+    def test_check_listLevel(self):
+        """
+        A list level out of the range of the presentation
+        """
+        errors = self.compiler.check([{'type': 'list', 'title': 'List', 'content': [{'level': 0, 'text': 'a'}, {'level': 8, 'text': 'b'}]},
+                                      {'type': 'list', 'title': 'List', 'content': [{'level': 9, 'text': 'a'}]},
+                                      {'type': 'list', 'title': 'List', 'content': [{'level': -1, 'text': 'a'}]}])
+        self.assertEqual(errors, ["Entry 1: the 'level' of a list line must be between 0 and 8.",
+                                  "Entry 2: the 'level' of a list line must be between 0 and 8."])
+
+    def test_check_missingColumns(self):
+        """
+        The selected columns are checked against the header of the data file
+        """
+        tmpDir = tempfile.mkdtemp()
+        try:
+            dataFile = os.path.join(tmpDir, 'data.csv')
+            with open(dataFile, 'w') as outf:
+                outf.write('# comment\ntime,a,b\n0,1,2\n')
+            plot = {'type': 'plot', 'title': 'Plot', 'content': dataFile, 'configuration': {'x-label': 'x', 'y-label': 'y'}}
+            entries = [dict(plot, configuration=dict(plot['configuration'], **columns))
+                       for columns in ({'x': 'time', 'y': ['a', 2]}, {'y': 'c'}, {'x': 'XXX', 'y': 'a'}, {'y': 3})]
+            errors = self.compiler.check(entries)
+        finally:
+            shutil.rmtree(tmpDir)
+        self.assertEqual([error.split(':')[0] for error in errors], ['Entry 1', 'Entry 2', 'Entry 3'])
+        self.assertIn('has no column "c"', errors[0])
+        self.assertIn('has no column 3', errors[2])
+
+    def test_check_brokenJSON(self):
+        """
+        A configuration which is not valid JSON
+        """
+        errors = Presentation('PYTHON-Environment.pptx', 'PYTHON-Course.template').check(io.StringIO('{"presentation": [{"type": "text"}, 1, 2'))
+        self.assertEqual(len(errors), 4)
+        self.assertIn('not valid JSON', errors[3])
+
+
+class TestCheck(unittest.TestCase):
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir)
+
+    def test_generate_nothingBuilt(self):
+        """
+        A wrong configuration is refused before any slide is built
+        """
+        output = os.path.join(self.tmpDir, 'output.pptx')
+        presentation = Presentation(output, 'PYTHON-Course.template')
+        calls = []
+        presentation.registerSlideType('quote', lambda generator, layout, dat: calls.append(dat), 'Blank')
+        config = io.StringIO(json.dumps({'presentation': [{'type': 'quote', 'content': 'Asd'}, {'type': 'picture', 'title': 'Missing', 'content': 'missing.png'}]}))
+        with self.assertRaises(ValueError):
+            presentation.generate(config)
+        self.assertEqual(calls, [])
+        self.assertFalse(os.path.exists(output))
+
+    def test_main_check(self):
+        """
+        The --check mode checks every configuration and fails if any of them is wrong
+        """
+        configs = []
+        for n, content in enumerate(('sample.dat', 'missing.dat')):
+            configs.append(os.path.join(self.tmpDir, 'config{0}.json'.format(n)))
+            with open(configs[-1], 'w') as outf:
+                json.dump({'presentation': [{'type': 'plot', 'title': 'Plot', 'content': content, 'configuration': {'x-label': 'x', 'y-label': 'y'}}]}, outf)
+        result = subprocess.run([sys.executable, 'presentation_environment_TW.py', '--check'] + configs, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        self.assertEqual(result.returncode, 1)
+        self.assertIn(b'config1.json: Entry 0', result.stdout)
+        self.assertNotIn(b'config0.json', result.stdout)
@@ -0,0 +1,49 @@
+import io
+import json
+import unittest
+from config_stream_TW import ConfigStream
+
+"""
+Call as Py -3 -m unittest test_config_stream.py
+"""
+
+class TestConfigStream(unittest.TestCase):
+    def test_iter_sampleFile(self):
+        """
+        The entries of the sample file are returned in order, also with tiny chunks
+        """
+        with open('sample.json') as inpf:
+            expected = json.load(inpf)['presentation']
+        for chunkSize in (1, 7, 1 << 16):
+            with open('sample.json') as inpf:
+                self.assertEqual(list(ConfigStream(inpf, chunkSize)), expected)
+
+    def test_iter_jsonLines(self):
+        """
+        One slide entry per line
+        """
+        stream = io.StringIO('{"type": "title", "title": "A", "content": "B"}\n{"type": "text", "title": "C", "content": 12}\n')
+        self.assertEqual(list(ConfigStream(stream, 3)), [{'type': 'title', 'title': 'A', 'content': 'B'},
+                                                         {'type': 'text', 'title': 'C', 'content': 12}])
+
+    def test_iter_otherKeys(self):
+        """
+        The other keys of the document are skipped
+        """
+        stream = io.StringIO('{"author": {"name": "X"}, "presentation": [], "version": 1}')
+        self.assertEqual(list(ConfigStream(stream)), [])
+
+    def test_iter_badData(self):
+        """
+        ValueError for truncated document
+        """
+        stream = io.StringIO('{"presentation": [{"type": "title"}, {"type"')
+        with self.assertRaises(ValueError):
+            result = list(ConfigStream(stream))
+
+    def test_iter_missingPresentation(self):
+        """
+        ValueError for a document without presentation and type
+        """
+        with self.assertRaises(ValueError):
+            result = list(ConfigStream(io.StringIO('{"slides": []}')))
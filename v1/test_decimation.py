@@ -0,0 +1,62 @@
+import unittest
+import decimation_TW
+import numpy as np
+
+"""
+Call as Py -3 -m unittest test_decimation.py
+"""
+
+class TestDecimation(unittest.TestCase):
+    def setUp(self):
+        self.x = np.arange(10000, dtype=np.float64)
+        self.y = np.sin(self.x / 100.0)
+        self.y[1234] = 5.0
+
+    def test_lttb_keepsEndsAndPeak(self):
+        """
+        lttb keeps the first, the last point and the outstanding peak
+        """
+        x, y = decimation_TW.lttb(self.x, self.y, 500)
+        self.assertEqual(len(x), 500)
+        self.assertEqual(x[0], 0)
+        self.assertEqual(x[-1], 9999)
+        self.assertIn(1234, x)
+        self.assertTrue(np.all(np.diff(x) > 0))
+
+    def test_lttb_shortSeries(self):
+        """
+        lttb returns short series unchanged
+        """
+        x, y = decimation_TW.lttb(self.x[:100], self.y[:100], 500)
+        self.assertEqual(len(x), 100)
+
+    def test_minMax_keepsEnvelope(self):
+        """
+        minMax keeps the minimum and maximum of the series
+        """
+        x, y = decimation_TW.minMax(self.x, self.y, 300)
+        self.assertLessEqual(len(x), 2 * 300 + 4)
+        self.assertEqual(y.max(), self.y.max())
+        self.assertEqual(y.min(), self.y.min())
+        self.assertTrue(np.all(np.diff(x) > 0))
+
+    def test_decimate_noSetting(self):
+        """
+        No downsampling without setting
+        """
+        x, y = decimation_TW.decimate(self.x, self.y, None, 640)
+        self.assertIs(x, self.x)
+
+    def test_decimate_methodName(self):
+        """
+        The method name alone uses the default number of points
+        """
+        x, y = decimation_TW.decimate(self.x, self.y, 'lttb', 640)
+        self.assertEqual(len(x), 640)
+
+    def test_decimate_badMethod(self):
+        """
+        ValueError for unknown method
+        """
+        with self.assertRaises(ValueError):
+            result = decimation_TW.decimate(self.x, self.y, {'method': 'XXX'}, 640)
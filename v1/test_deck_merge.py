@@ -0,0 +1,88 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+from pptx import Presentation as PptxPresentation
+from deck_merge_TW import mergeDecks
+from presentation_environment_TW import BuildOptions, Presentation
+
+"""
+Call as Py -3 -m unittest test_deck_merge.py
+"""
+
+class TestDeckMerge(unittest.TestCase):
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+        with open('sample.json') as inpf:
+            self.slides = json.load(inpf)['presentation'] * 3
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir)
+
+    def build(self, name, slides, **kwargs):
+        config = os.path.join(self.tmpDir, 'config.json')
+        with open(config, 'w') as outf:
+            json.dump({'presentation': slides}, outf)
+        output = os.path.join(self.tmpDir, name)
+        self.assertTrue(Presentation(output, 'PYTHON-Course.template', BuildOptions(**kwargs)).generate(config))
+        return output
+
+    def assertSameDeck(self, first, second):
+        first = zipfile.ZipFile(first)
+        second = zipfile.ZipFile(second)
+        self.assertEqual(sorted(first.namelist()), sorted(second.namelist()))
+        for name in first.namelist():
+            self.assertEqual(first.read(name), second.read(name), name)
+
+    def test_merge_sameAsOneDeck(self):
+        """
+        The merged shards give the same package as the deck built at once
+        """
+        parts = [self.build('part0.pptx', self.slides[:4]), self.build('part1.pptx', self.slides[4:11]), self.build('part2.pptx', self.slides[11:])]
+        merged = os.path.join(self.tmpDir, 'merged.pptx')
+        self.assertEqual(mergeDecks(parts, merged), len(self.slides))
+        self.assertSameDeck(self.build('full.pptx', self.slides), merged)
+
+    def test_merge_sharedMedia(self):
+        """
+        A picture of several shards is stored once
+        """
+        parts = [self.build('part{0}.pptx'.format(n), [self.slides[3]]) for n in range(3)]
+        merged = os.path.join(self.tmpDir, 'merged.pptx')
+        mergeDecks(parts, merged)
+        slides = PptxPresentation(merged).slides
+        self.assertEqual(len(slides), 3)
+        self.assertEqual(len(set(slide.shapes[1].image.filename for slide in slides)), 1)
+
+    def test_merge_badDeck(self):
+        """
+        A file which is not a presentation
+        """
+        with self.assertRaises(IOError):
+            mergeDecks([self.build('part0.pptx', self.slides[:2]), 'sample.json'], os.path.join(self.tmpDir, 'merged.pptx'))
+        self.assertEqual(sorted(os.listdir(self.tmpDir)), ['config.json', 'part0.pptx'])
+
+    def test_generate_shards(self):
+        """
+        The sharded build gives the same package as the build in one process
+        """
+        self.assertSameDeck(self.build('full.pptx', self.slides), self.build('sharded.pptx', self.slides, shards=3))
+        self.assertEqual(sorted(os.listdir(self.tmpDir)), ['config.json', 'full.pptx', 'sharded.pptx'])
+
+    def test_shards_incremental(self):
+        """
+        The sharded build can not be incremental
+        """
+        with self.assertRaises(ValueError):
+            result = Presentation(os.path.join(self.tmpDir, 'output.pptx'), 'PYTHON-Course.template', BuildOptions(incremental=True, shards=2))
+
+    def test_shardRanges_balanced(self):
+        """
+        The shards are contiguous and balanced by the cost of the slides
+        """
+        presentation = Presentation(os.path.join(self.tmpDir, 'output.pptx'), 'PYTHON-Course.template')
+        plans = presentation._compiler.compile([self.slides[4]] * 4 + [self.slides[1]] * 40)
+        self.assertEqual(Presentation._shardRanges(plans, 2), [(0, 4), (4, 44)])
+        self.assertEqual(Presentation._shardRanges(plans[:1], 4), [(0, 1)])
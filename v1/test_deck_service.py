@@ -0,0 +1,155 @@
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+import io
+from deck_service_TW import DeckService
+
+"""
+Call as Py -3 -m unittest test_deck_service.py
+"""
+
+CONFIG = json.dumps({'presentation': [{'type': 'title', 'title': 'Title', 'content': 'Sub-Title'},
+                                      {'type': 'text', 'title': 'Text', 'content': 'The Long Text'}]})
+
+
+class TestDeckService(unittest.TestCase):
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir)
+
+    def run_service(self, scenario, queueSize=10, resultTtl=3600):
+        async def main():
+            service = DeckService('PYTHON-Course.template', self.tmpDir, 1, queueSize, resultTtl=resultTtl)
+            await service.start()
+            server = await asyncio.start_server(service.handle, '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            try:
+                return await scenario(service, port)
+            finally:
+                server.close()
+                await server.wait_closed()
+                await service.stop()
+        return asyncio.run(main())
+
+    @staticmethod
+    async def request(port, method, path, body=b''):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write('{0} {1} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {2}\r\n\r\n'.format(method, path, len(body)).encode('ascii') + body)
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        head, _, content = response.partition(b'\r\n\r\n')
+        return (int(head.split()[1]), content)
+
+    async def finish(self, service, port, config=CONFIG):
+        status, content = await self.request(port, 'POST', '/jobs', config.encode('utf-8'))
+        job = service.job(json.loads(content)['id'])
+        while job['status'] in ('queued', 'running'):
+            await asyncio.sleep(0.05)
+        return job
+
+    def test_init_badConcurrency(self):
+        """
+        concurrency is not positive
+        """
+        with self.assertRaises(ValueError):
+            result = DeckService('PYTHON-Course.template', self.tmpDir, 0)
+
+    def test_job_built(self):
+        """
+        A posted configuration is built and the pptx can be downloaded
+        """
+        async def scenario(service, port):
+            status, content = await self.request(port, 'POST', '/jobs', CONFIG.encode('utf-8'))
+            self.assertEqual(status, 202)
+            jobId = json.loads(content)['id']
+            while True:
+                status, content = await self.request(port, 'GET', '/jobs/' + jobId)
+                if json.loads(content)['status'] in ('done', 'failed'):
+                    break
+                await asyncio.sleep(0.05)
+            self.assertEqual(json.loads(content)['status'], 'done')
+            return await self.request(port, 'GET', '/jobs/{0}/result'.format(jobId))
+        status, content = self.run_service(scenario)
+        self.assertEqual(status, 200)
+        names = zipfile.ZipFile(io.BytesIO(content)).namelist()
+        self.assertIn('ppt/slides/slide2.xml', names)
+
+    def test_job_failed(self):
+        """
+        A configuration with wrong data gives a failed job
+        """
+        async def scenario(service, port):
+            status, content = await self.request(port, 'POST', '/jobs', b'{"presentation": [1, 2')
+            jobId = json.loads(content)['id']
+            while service.job(jobId)['status'] in ('queued', 'running'):
+                await asyncio.sleep(0.05)
+            return await self.request(port, 'GET', '/jobs/{0}/result'.format(jobId))
+        status, content = self.run_service(scenario)
+        self.assertEqual(status, 409)
+        self.assertEqual(json.loads(content)['status'], 'failed')
+        self.assertIn('Entry 0: the entry must be an object.', json.loads(content)['error'])
+
+    def test_result_missing(self):
+        """
+        The result of a done job whose file is removed is not found, and the connection is answered
+        """
+        async def scenario(service, port):
+            status, content = await self.request(port, 'POST', '/jobs', CONFIG.encode('utf-8'))
+            jobId = json.loads(content)['id']
+            while service.job(jobId)['status'] in ('queued', 'running'):
+                await asyncio.sleep(0.05)
+            self.assertIsNone(service.job(jobId)['error'])
+            os.remove(service.resultName(jobId))
+            return await self.request(port, 'GET', '/jobs/{0}/result'.format(jobId))
+        status, content = self.run_service(scenario)
+        self.assertEqual(status, 404)
+
+    def test_job_unknown(self):
+        """
+        An unknown job is not found
+        """
+        async def scenario(service, port):
+            return await self.request(port, 'GET', '/jobs/123')
+        self.assertEqual(self.run_service(scenario)[0], 404)
+
+    def test_submit_queueFull(self):
+        """
+        The job is refused if the queue is full
+        """
+        async def scenario(service, port):
+            results = []
+            for n in range(3):
+                results.append((await self.request(port, 'POST', '/jobs', CONFIG.encode('utf-8')))[0])
+            return results
+        self.assertIn(503, self.run_service(scenario, queueSize=1))
+
+    def test_worker_died(self):
+        """
+        Only the job of a dead worker process fails, the next job is built by the restarted workers
+        """
+        async def scenario(service, port):
+            for process in list(service._executor._processes.values()):
+                process.kill()
+            return [(await self.finish(service, port))['status'] for n in range(2)]
+        self.assertEqual(self.run_service(scenario), ['failed', 'done'])
+
+    def test_job_expired(self):
+        """
+        A finished job and its pptx file are forgotten after the time limit, and the ids are not reused
+        """
+        async def scenario(service, port):
+            first = await self.finish(service, port)
+            second = await self.finish(service, port)
+            return (first, second, service.job(first['id']), os.listdir(self.tmpDir))
+        first, second, expired, files = self.run_service(scenario, resultTtl=0)
+        self.assertEqual((first['status'], second['status']), ('done', 'done'))
+        self.assertNotEqual(first['id'], second['id'])
+        self.assertIsNone(expired)
+        self.assertEqual(files, [])
@@ -0,0 +1,92 @@
+import os
+import shutil
+import tempfile
+import unittest
+from image_pipeline_TW import ImagePipeline, EMU_PER_INCH
+from presentation_generator_TW import PresentationGenerator
+from PIL import Image
+from pptx import Presentation
+import numpy as np
+
+"""
+Call as Py -3 -m unittest test_image_pipeline.py
+"""
+
+class TestImagePipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+        self.photo = os.path.join(self.tmpDir, 'photo.png')
+        pixels = np.random.default_rng(0).integers(0, 256, (900, 1200, 3), dtype=np.uint8)
+        Image.fromarray(pixels).save(self.photo, dpi=(300, 300))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir)
+
+    def test_quality_badValue(self):
+        """
+        quality out of range
+        """
+        with self.assertRaises(ValueError):
+            result = ImagePipeline(quality=0)
+
+    def test_prepare_downscale(self):
+        """
+        The photo is shown at its native size and downscaled to the given resolution
+        """
+        image, width, height = ImagePipeline(dpi=100).prepare(self.photo, 10 * EMU_PER_INCH, 10 * EMU_PER_INCH)
+        self.assertAlmostEqual(width, 1200 / 300 * EMU_PER_INCH, delta=EMU_PER_INCH / 1000)
+        self.assertAlmostEqual(height, 900 / 300 * EMU_PER_INCH, delta=EMU_PER_INCH / 1000)
+        with Image.open(image) as picture:
+            self.assertEqual(picture.size, (400, 300))
+            self.assertEqual(picture.format, 'JPEG')
+
+    def test_prepare_downscaleJpeg(self):
+        """
+        A JPEG photo is decoded at a reduced size and downscaled to the given resolution
+        """
+        photo = os.path.join(self.tmpDir, 'photo.jpg')
+        with Image.open(self.photo) as picture:
+            picture.save(photo, dpi=(300, 300))
+        image, width, height = ImagePipeline(dpi=100).prepare(photo, 10 * EMU_PER_INCH, 10 * EMU_PER_INCH)
+        self.assertAlmostEqual(width, 1200 / 300 * EMU_PER_INCH, delta=EMU_PER_INCH / 1000)
+        with Image.open(image) as picture:
+            self.assertEqual(picture.size, (400, 300))
+
+    def test_prepare_boundedCache(self):
+        """
+        The kept images do not exceed the size limit, the least recently used one is dropped
+        """
+        pipeline = ImagePipeline(dpi=100)
+        first, width, height = pipeline.prepare(self.photo, 10 * EMU_PER_INCH, 10 * EMU_PER_INCH)
+        size = len(first.getvalue())
+        pipeline = ImagePipeline(dpi=100, cacheBytes=2 * size)
+        for n in (10, 9, 10, 8):
+            pipeline.prepare(self.photo, n * EMU_PER_INCH, n * EMU_PER_INCH)
+        self.assertLessEqual(pipeline._imageBytes, 2 * size)
+        self.assertEqual([key[1] for key in pipeline._images], [10 * EMU_PER_INCH, 8 * EMU_PER_INCH])
+
+    def test_prepare_fitArea(self):
+        """
+        A picture larger than the free area is shrunk to fit
+        """
+        image, width, height = ImagePipeline().prepare(self.photo, 2 * EMU_PER_INCH, 10 * EMU_PER_INCH)
+        self.assertEqual(width, 2 * EMU_PER_INCH)
+        self.assertAlmostEqual(height, 1.5 * EMU_PER_INCH, delta=10)
+
+    def test_addImage_sharedPart(self):
+        """
+        The same picture on many slides is embedded once and the output is smaller
+        """
+        outputs = []
+        for pipeline in (None, ImagePipeline()):
+            outputFileName = os.path.join(self.tmpDir, 'a{0}.pptx'.format(len(outputs)))
+            dummyPres = PresentationGenerator(outputFileName, 'PYTHON-Course.template', imagePipeline=pipeline)
+            for n in range(3):
+                dummyPres.addImage(5, "Asd", self.photo)
+            dummyPres.finalize()
+            outputs.append(os.path.getsize(outputFileName))
+        pictures = set(shape.image.sha1 for slide in Presentation(outputFileName).slides for shape in slide.shapes if shape.shape_type == 13)
+        parts = set(rel.target_part.partname for slide in Presentation(outputFileName).slides for rel in slide.part.rels.values() if rel.reltype.endswith('/image'))
+        self.assertEqual(len(pictures), 1)
+        self.assertEqual(len(parts), 1)
+        self.assertLess(outputs[1], outputs[0])
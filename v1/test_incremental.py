@@ -0,0 +1,106 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from pptx import Presentation as PptxPresentation
+from incremental_TW import IncrementalBuild, manifestName
+from instrumentation_TW import Metrics
+from presentation_environment_TW import BuildOptions, Presentation
+
+"""
+Call as Py -3 -m unittest test_incremental.py
+"""
+
+class TestIncrementalBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+        self.output = os.path.join(self.tmpDir, 'output.pptx')
+        self.config = os.path.join(self.tmpDir, 'config.json')
+        self.picture = os.path.join(self.tmpDir, 'picture.png')
+        shutil.copy('picture.png', self.picture)
+        self.slides = [
+            {'type': 'title', 'title': 'Title', 'content': 'Sub-Title'},
+            {'type': 'text', 'title': 'Text', 'content': 'The Long Text'},
+            {'type': 'picture', 'title': 'Picture', 'content': self.picture},
+            {'type': 'plot', 'title': 'Plot', 'content': 'sample.dat', 'configuration': {'x-label': 'x', 'y-label': 'y'}},
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir)
+
+    def build(self):
+        with open(self.config, 'w') as outf:
+            json.dump({'presentation': self.slides}, outf)
+        metrics = Metrics()
+        result = Presentation(self.output, 'PYTHON-Course.template', BuildOptions(metrics=metrics, incremental=True)).generate(self.config)
+        self.assertTrue(result)
+        return sum(1 for record in metrics.records if record['stage'] == 'reuse')
+
+    def titles(self):
+        return [slide.shapes.title.text for slide in PptxPresentation(self.output).slides]
+
+    def test_key_dependsOnFile(self):
+        """
+        The key of a picture slide changes with the content of the picture
+        """
+        build = IncrementalBuild(self.output, 'PYTHON-Course.template')
+        key = build.key(self.slides[2])
+        self.assertEqual(key, IncrementalBuild(self.output, 'PYTHON-Course.template').key(self.slides[2]))
+        with open(self.picture, 'ab') as outf:
+            outf.write(b'\0')
+        self.assertNotEqual(key, IncrementalBuild(self.output, 'PYTHON-Course.template').key(self.slides[2]))
+
+    def test_build_firstFull(self):
+        """
+        The first build builds every slide and writes the manifest
+        """
+        self.assertEqual(self.build(), 0)
+        self.assertTrue(os.path.isfile(manifestName(self.output)))
+
+    def test_build_unchangedKept(self):
+        """
+        Every slide is kept if nothing is changed
+        """
+        self.build()
+        self.assertEqual(self.build(), 4)
+        self.assertEqual(self.titles(), ['Title', 'Text', 'Picture', 'Plot'])
+
+    def test_build_changedRebuilt(self):
+        """
+        Only the changed slide is built, the order of the slides follows the configuration
+        """
+        self.build()
+        self.slides[1]['title'] = 'Changed'
+        self.slides.insert(0, self.slides.pop())
+        self.assertEqual(self.build(), 3)
+        self.assertEqual(self.titles(), ['Plot', 'Title', 'Changed', 'Picture'])
+        self.assertEqual(self.build(), 4)
+
+    def test_build_continuedList(self):
+        """
+        A list continued on several slides is kept with all of its slides
+        """
+        self.slides.insert(2, {'type': 'list', 'title': 'List', 'content': [{'level': 1, 'text': 'Line'}] * 5, 'lines-per-slide': 2})
+        self.build()
+        self.slides[0]['title'] = 'Changed'
+        self.assertEqual(self.build(), 4)
+        self.assertEqual(self.titles(), ['Changed', 'Text', 'List', 'List (cont.)', 'List (cont.)', 'Picture', 'Plot'])
+
+    def test_build_removedSlide(self):
+        """
+        The slide removed from the configuration is removed from the output
+        """
+        self.build()
+        del self.slides[2]
+        self.assertEqual(self.build(), 3)
+        self.assertEqual(self.titles(), ['Title', 'Text', 'Plot'])
+
+    def test_build_modifiedOutput(self):
+        """
+        Every slide is built if the previous output is modified
+        """
+        self.build()
+        with open(self.output, 'ab') as outf:
+            outf.write(b'\0')
+        self.assertEqual(self.build(), 0)
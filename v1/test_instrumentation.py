@@ -0,0 +1,63 @@
+import os
+import shutil
+import tempfile
+import unittest
+from instrumentation_TW import Metrics, NULL_METRICS
+from presentation_environment_TW import BuildOptions, Presentation
+
+"""
+Call as Py -3 -m unittest test_instrumentation.py
+"""
+
+class TestMetrics(unittest.TestCase):
+    def test_stage_record(self):
+        """
+        A stage produces a record with the bytes and is passed to the callback
+        """
+        calls = []
+        metrics = Metrics(callback=calls.append)
+        with metrics.slideStage(3, 'plot'):
+            with metrics.stage('data', 10) as record:
+                record['bytes'] += 5
+        self.assertEqual([r['stage'] for r in calls], ['data', 'slide'])
+        self.assertEqual(calls[0]['bytes'], 15)
+        self.assertEqual(calls[0]['slide'], 3)
+        self.assertEqual(calls[0]['type'], 'plot')
+        self.assertGreaterEqual(calls[1]['wall'], calls[0]['wall'])
+
+    def test_summary_aggregate(self):
+        """
+        summary adds up the records of the same stage
+        """
+        metrics = Metrics()
+        for n in range(3):
+            with metrics.stage('render', 2):
+                pass
+        self.assertEqual(metrics.summary()['render']['count'], 3)
+        self.assertEqual(metrics.summary()['render']['bytes'], 6)
+
+    def test_nullMetrics_noRecord(self):
+        """
+        The disabled metrics accepts the same calls and keeps nothing
+        """
+        with NULL_METRICS.stage('data') as record:
+            record['bytes'] = 5
+        self.assertEqual(record, {})
+
+    def test_generate_stages(self):
+        """
+        generate measures every slide and the stages of the plot slide
+        """
+        tmpDir = tempfile.mkdtemp()
+        try:
+            profileFile = os.path.join(tmpDir, 'generate.prof')
+            metrics = Metrics(profileFile=profileFile)
+            presentation = Presentation(os.path.join(tmpDir, 'a.pptx'), 'PYTHON-Course.template', BuildOptions(metrics=metrics))
+            self.assertTrue(presentation.generate('sample.json'))
+            summary = metrics.summary()
+            self.assertEqual(summary['slide']['count'], 5)
+            for stage in ('config', 'data', 'render', 'embed', 'finalize'):
+                self.assertIn(stage, summary)
+            self.assertTrue(os.path.isfile(profileFile))
+        finally:
+            shutil.rmtree(tmpDir)
@@ -0,0 +1,104 @@
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+import numpy as np
+from PIL import Image
+from pptx import Presentation as PptxPresentation
+import package_optimizer_TW
+from presentation_generator_TW import PresentationGenerator
+
+"""
+Call as Py -3 -m unittest test_package_optimizer.py
+"""
+
+class TestPackageOptimizer(unittest.TestCase):
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir)
+
+    def build(self, name, **kwargs):
+        output = os.path.join(self.tmpDir, name)
+        generator = PresentationGenerator(output, 'PYTHON-Course.template', **kwargs)
+        generator.addTitle(0, 'Title', 'Subtitle')
+        generator.addImage(5, 'Picture', 'picture.png')
+        generator.finalize()
+        return output
+
+    def test_compressType_parts(self):
+        """
+        The XML is deflated, the JPEG pictures and the pictures which do not compress are stored
+        """
+        noise = os.path.join(self.tmpDir, 'noise.png')
+        Image.fromarray(np.random.default_rng(0).integers(0, 256, (64, 64, 3), dtype=np.uint8)).save(noise)
+        with open(noise, 'rb') as inpf:
+            noiseData = inpf.read()
+        self.assertEqual(package_optimizer_TW.compressType('application/xml', b'<a/>'), zipfile.ZIP_DEFLATED)
+        self.assertEqual(package_optimizer_TW.compressType('image/jpeg', b'\xff\xd8'), zipfile.ZIP_STORED)
+        self.assertEqual(package_optimizer_TW.compressType('image/png', noiseData), zipfile.ZIP_STORED)
+        self.assertEqual(package_optimizer_TW.compressType('image/png', b'\x89PNG' + b'\x00' * 1000), zipfile.ZIP_DEFLATED)
+
+    def test_finalize_pruned(self):
+        """
+        Only the used layouts are written, and the output can be opened
+        """
+        presentation = PptxPresentation(self.build('optimized.pptx', optimize=True))
+        self.assertEqual([layout.name for layout in presentation.slide_layouts],
+                         [slide.slide_layout.name for slide in presentation.slides])
+        self.assertEqual(presentation.slides[1].shapes[1].image.sha1, PptxPresentation(self.build('default.pptx')).slides[1].shapes[1].image.sha1)
+
+    def test_finalize_keepTemplate(self):
+        """
+        The layouts are kept for an incremental build
+        """
+        presentation = PptxPresentation(self.build('optimized.pptx', optimize=True, keepTemplate=True))
+        self.assertEqual(len(presentation.slide_layouts), len(PptxPresentation('PYTHON-Course.template').slide_layouts))
+
+    def test_finalize_streaming(self):
+        """
+        The streaming mode writes the same optimized output
+        """
+        saved = zipfile.ZipFile(self.build('saved.pptx', optimize=True))
+        streamed = zipfile.ZipFile(self.build('streamed.pptx', optimize=True, streaming=True))
+        self.assertEqual(sorted(saved.namelist()), sorted(streamed.namelist()))
+        for info in saved.infolist():
+            self.assertEqual((saved.read(info), info.compress_type), (streamed.read(info.filename), streamed.getinfo(info.filename).compress_type))
+
+    def test_optimizeFile_noSlides(self):
+        """
+        A presentation without slides keeps its template
+        """
+        output = os.path.join(self.tmpDir, 'empty.pptx')
+        PresentationGenerator(output, 'PYTHON-Course.template').finalize()
+        result = package_optimizer_TW.optimizeFile(output)
+        self.assertEqual((result['layouts'], result['masters'], result['parts']), (0, 0, 0))
+        self.assertEqual(len(PptxPresentation(output).slide_layouts), len(PptxPresentation('PYTHON-Course.template').slide_layouts))
+
+    def test_optimizeFile_savedBytes(self):
+        """
+        The optimization of a saved file reports the pruned layouts and the saved bytes
+        """
+        output = self.build('default.pptx')
+        size = os.path.getsize(output)
+        result = package_optimizer_TW.optimizeFile(output)
+        self.assertEqual(result['layouts'], len(PptxPresentation('PYTHON-Course.template').slide_layouts) - 2)
+        self.assertEqual(result['savedBytes'], size - os.path.getsize(output))
+        self.assertGreater(result['savedBytes'], 0)
+
+    def test_pruneTemplate_savedBytes(self):
+        """
+        The estimated saving of the pruning is the difference of the written files
+        """
+        output = self.build('default.pptx')
+        kept = os.path.join(self.tmpDir, 'kept.pptx')
+        pruned = os.path.join(self.tmpDir, 'pruned.pptx')
+        package_optimizer_TW.writePackage(PptxPresentation(output), kept)
+        presentation = PptxPresentation(output)
+        result = package_optimizer_TW.pruneTemplate(presentation)
+        package_optimizer_TW.writePackage(presentation, pruned)
+        saved = os.path.getsize(kept) - os.path.getsize(pruned)
+        self.assertLess(result['savedBytes'], result['bytes'])
+        self.assertAlmostEqual(result['savedBytes'], saved, delta=saved * 0.05)
@@ -0,0 +1,74 @@
+import os
+import shutil
+import tempfile
+import unittest
+import plotter_TW
+from plot_cache_TW import PlotCache
+
+"""
+Call as Py -3 -m unittest test_plot_cache.py
+"""
+
+class TestPlotCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+        with open('picture.png', 'rb') as inpf:
+            self.image = inpf.read()
+        self.cacheDir = os.path.join(self.tmpDir, 'cache')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir)
+
+    def test_cacheDir_badType(self):
+        """
+        cacheDir wrong type
+        """
+        with self.assertRaises(TypeError):
+            result = PlotCache(123)
+
+    def test_key_dependsOnSettings(self):
+        """
+        Different labels give different keys, the same ones the same key
+        """
+        cache = PlotCache(self.cacheDir)
+        key1 = cache.key('sample.dat', {'x-label': 'a'})
+        self.assertEqual(key1, cache.key('sample.dat', {'x-label': 'a'}))
+        self.assertNotEqual(key1, cache.key('sample.dat', {'x-label': 'b'}))
+
+    def test_get_missAndHit(self):
+        """
+        get returns None before put and the cached file after it
+        """
+        cache = PlotCache(self.cacheDir)
+        key = cache.key('sample.dat', {})
+        self.assertIsNone(cache.get(key))
+        cachedFile = cache.put(key, self.image)
+        self.assertEqual(cache.get(key), cachedFile)
+        self.assertTrue(os.path.isfile(cachedFile))
+
+    def test_evict_leastRecentlyUsed(self):
+        """
+        The least recently used image is evicted when the cache is full
+        """
+        size = len(self.image)
+        cache = PlotCache(self.cacheDir, 2 * size)
+        first = cache.put('a', self.image)
+        os.utime(first, (1, 1))
+        second = cache.put('b', self.image)
+        os.utime(second, (2, 2))
+        cache.get('a')
+        cache.put('c', self.image)
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('c'))
+
+    def test_generatePlot_hitWithoutRenderer(self):
+        """
+        A cache hit returns the cached image without creating the chart renderer
+        """
+        cache = PlotCache(self.cacheDir)
+        plotter = plotter_TW.Plotter('sample.dat')
+        plotter.generatePlot('sample.dat', 'x', 'y', cache=cache)
+        plotter_TW._renderer = None
+        self.assertTrue(os.path.isfile(plotter.generatePlot('sample.dat', 'x', 'y', cache=cache)))
+        self.assertIsNone(plotter_TW._renderer)
@@ -0,0 +1,115 @@
+import os
+import shutil
+import tempfile
+import unittest
+import xy_binary_TW
+from prefetch_TW import AssetPrefetcher
+from plotter_TW import Plotter
+
+"""
+Call as Py -3 -m unittest test_prefetch.py
+"""
+
+class TestAssetPrefetcher(unittest.TestCase):
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+        self.prefetcher = AssetPrefetcher(2, 4)
+
+    def tearDown(self):
+        self.prefetcher.close()
+        shutil.rmtree(self.tmpDir)
+
+    def test_init_badWindow(self):
+        """
+        window is not positive
+        """
+        with self.assertRaises(ValueError):
+            result = AssetPrefetcher(2, 0)
+
+    def test_take_picture(self):
+        """
+        The content of a scheduled picture is returned
+        """
+        with open('picture.png', 'rb') as inpf:
+            image = inpf.read()
+        self.prefetcher.schedule('picture', 'picture.png')
+        self.assertEqual(self.prefetcher.take('picture', 'picture.png'), image)
+
+    def test_take_notScheduled(self):
+        """
+        None is returned for a file which is not scheduled
+        """
+        self.assertIsNone(self.prefetcher.take('picture', 'picture.png'))
+
+    def test_take_missingFile(self):
+        """
+        None is returned if the file can not be read
+        """
+        self.prefetcher.schedule('picture', os.path.join(self.tmpDir, 'missing.png'))
+        self.assertIsNone(self.prefetcher.take('picture', os.path.join(self.tmpDir, 'missing.png')))
+
+    def test_take_sharedFile(self):
+        """
+        A file referenced twice is read once and can be taken twice
+        """
+        self.prefetcher.schedule('picture', 'picture.png')
+        self.prefetcher.schedule('picture', 'picture.png')
+        self.assertIsNotNone(self.prefetcher.take('picture', 'picture.png'))
+        self.assertIsNotNone(self.prefetcher.take('picture', 'picture.png'))
+        self.assertIsNone(self.prefetcher.take('picture', 'picture.png'))
+
+    def test_lookahead_order(self):
+        """
+        The entries are yielded in their original order and the files of the window are scheduled
+        """
+        slides = [{'type': 'picture', 'title': str(n), 'content': 'picture.png'} for n in range(10)]
+        result = []
+        for dat in self.prefetcher.lookahead(slides):
+            self.assertIsNotNone(self.prefetcher.take('picture', dat['content']))
+            result.append(dat['title'])
+        self.assertEqual(result, [str(n) for n in range(10)])
+
+    def test_lookahead_noData(self):
+        """
+        The data files of the plots are not scheduled if prefetchData is False
+        """
+        slides = [{'type': 'plot', 'title': 'a', 'content': 'sample.dat', 'configuration': {}}]
+        for dat in self.prefetcher.lookahead(slides, prefetchData=False):
+            self.assertIsNone(self.prefetcher.take('data', dat['content']))
+
+    def test_data_sameAsFile(self):
+        """
+        The prefetched text and binary data give the same arrays as reading the file
+        """
+        x, y = Plotter('sample.dat').readXYData('sample.dat')
+        binaryFile = os.path.join(self.tmpDir, 'sample.xyb')
+        xy_binary_TW.writeXYBinary(binaryFile, x, y)
+        for fileName in ('sample.dat', binaryFile):
+            self.prefetcher.schedule('data', fileName)
+            data = self.prefetcher.take('data', fileName)
+            # the binary file is not read ahead, it is mapped into memory
+            self.assertEqual(data is None, fileName == binaryFile)
+            resultX, resultY = Plotter(fileName).readXYData(fileName, data)
+            self.assertEqual(list(resultX), list(x))
+            self.assertEqual(list(resultY), list(y))
+
+    def test_lookahead_maxBytes(self):
+        """
+        No more entries are scanned while the files read ahead exceed the size limit
+        """
+        size = os.path.getsize('picture.png')
+        prefetcher = AssetPrefetcher(2, 10, maxBytes=2 * size)
+        slides = []
+        for n in range(6):
+            fileName = os.path.join(self.tmpDir, 'picture{0}.png'.format(n))
+            shutil.copy('picture.png', fileName)
+            slides.append({'type': 'picture', 'title': str(n), 'content': fileName})
+        try:
+            pending = []
+            for dat in prefetcher.lookahead(slides):
+                pending.append(prefetcher.pendingBytes)
+                self.assertIsNotNone(prefetcher.take('picture', dat['content']))
+            self.assertEqual(max(pending), 2 * size)
+            self.assertEqual(prefetcher.pendingBytes, 0)
+        finally:
+            prefetcher.close()
@@ -1,6 +1,18 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
 import unittest
 import flexmock
+from pptx import Presentation as PptxPresentation
+from pptx.enum.shapes import MSO_SHAPE_TYPE
 import presentation_environment_TW
+from plot_cache_TW import PlotCache
+from plotter_TW import renderPlot
 
 
 """
@@ -71,4 +83,148 @@ class TestPresentation(unittest.TestCase):
         """
         flexmock(presentation_environment_TW.presentation_generator_TW.PresentationGenerator).should_receive('__new__').once()
         dummyPres = presentation_environment_TW.Presentation('PYTHON-Environment.pptx','PYTHON-Course.template')
-        self.assertEqual(dummyPres.layoutSelect('text'), 5)
\ No newline at end of file
+        self.assertEqual(dummyPres.layoutSelect('text'), 5)
+
+class TestSlideRegistry(unittest.TestCase):
+    def test_resolveLayout_byName(self):
+        """
+        resolveLayout finds the layouts of the template by name
+        """
+        dummyPres = presentation_environment_TW.Presentation('PYTHON-Environment.pptx','PYTHON-Course.template')
+        self.assertEqual(dummyPres.resolveLayout('title'), 0)
+        self.assertEqual(dummyPres.resolveLayout('list'), 1)
+        self.assertEqual(dummyPres.resolveLayout('plot'), 5)
+
+    def test_resolveLayout_badValue(self):
+        """
+        resolveLayout wrong slide type
+        """
+        dummyPres = presentation_environment_TW.Presentation('PYTHON-Environment.pptx','PYTHON-Course.template')
+        with self.assertRaises(ValueError):
+            result = dummyPres.resolveLayout('XXX')
+
+    def test_registerSlideType_badType(self):
+        """
+        registerSlideType with a handler which is not callable
+        """
+        dummyPres = presentation_environment_TW.Presentation('PYTHON-Environment.pptx','PYTHON-Course.template')
+        with self.assertRaises(TypeError):
+            dummyPres.registerSlideType('quote', 'XXX', 'Title Only')
+
+    def test_registerSlideType_missingLayout(self):
+        """
+        registerSlideType with a layout name which is not in the template
+        """
+        dummyPres = presentation_environment_TW.Presentation('PYTHON-Environment.pptx','PYTHON-Course.template')
+        with self.assertRaisesRegex(ValueError, 'XXX'):
+            dummyPres.registerSlideType('quote', lambda generator, layout, dat: None, 'XXX')
+        self.assertEqual(dummyPres.check(io.StringIO(json.dumps({'presentation': [{'type': 'quote', 'content': 'Asd'}]}))), ["Entry 0: unknown slide type 'quote'."])
+
+    def test_registerSlideType_customHandler(self):
+        """
+        A registered slide type is dispatched to its handler with the resolved layout
+        """
+        dummyPres = presentation_environment_TW.Presentation('PYTHON-Environment.pptx','PYTHON-Course.template')
+        calls = []
+        dummyPres.registerSlideType('quote', lambda generator, layout, dat: calls.append((layout, dat['content'])), 'Blank')
+        dummyPres._addSlides(dummyPres._compiler.compile([{'type': 'quote', 'content': 'Asd'}]))
+        self.assertEqual(calls, [(6, 'Asd')])
+
+
+class TestStartup(unittest.TestCase):
+    def test_import_noHeavyModules(self):
+        """
+        numpy and matplotlib are not imported until the first plot
+        """
+        probe = 'import json, sys, presentation_environment_TW; print(json.dumps([m for m in ("numpy", "matplotlib") if m in sys.modules]))'
+        output = subprocess.run([sys.executable, '-c', probe], check=True, stdout=subprocess.PIPE).stdout
+        self.assertEqual(json.loads(output), [])
+
+
+class TestPlotWorkers(unittest.TestCase):
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+        self.output = os.path.join(self.tmpDir, 'output.pptx')
+        self.config = os.path.join(self.tmpDir, 'config.json')
+        self.cache = PlotCache(os.path.join(self.tmpDir, 'cache'))
+        slides = [
+            {'type': 'title', 'title': 'Title', 'content': 'Sub-Title'},
+            {'type': 'plot', 'title': 'Image', 'content': 'sample.dat', 'configuration': {'x-label': 'x', 'y-label': 'image'}},
+            {'type': 'plot', 'title': 'Native', 'content': 'sample.dat', 'configuration': {'x-label': 'x', 'y-label': 'native', 'chart': 'native'}},
+            {'type': 'text', 'title': 'Text', 'content': 'The Long Text'},
+            {'type': 'plot', 'title': 'Cached', 'content': 'sample.dat', 'configuration': {'x-label': 'x', 'y-label': 'cached'}},
+            {'type': 'picture', 'title': 'Picture', 'content': 'picture.png'},
+        ]
+        with open(self.config, 'w') as outf:
+            json.dump({'presentation': slides}, outf)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir)
+
+    def test_generate_plotWorkers(self):
+        """
+        The image, native and cached plots rendered by two worker processes are added in the order of the configuration
+        """
+        cachedSha1 = hashlib.sha1(renderPlot('sample.dat', 'x', 'cached', cache=self.cache)).hexdigest()
+        self.assertEqual(type(renderPlot('sample.dat', 'x', 'cached', cache=self.cache)), str)
+        presentation = presentation_environment_TW.Presentation(self.output, 'PYTHON-Course.template', presentation_environment_TW.BuildOptions(self.cache, plotWorkers=2))
+        self.assertTrue(presentation.generate(self.config))
+        slides = PptxPresentation(self.output).slides
+        self.assertEqual([slide.shapes.title.text for slide in slides], ['Title', 'Image', 'Native', 'Text', 'Cached', 'Picture'])
+        content = [[shape for shape in slide.shapes if not shape.is_placeholder] for slide in slides]
+        self.assertEqual([shape.shape_type for shape in content[1]], [MSO_SHAPE_TYPE.PICTURE])
+        self.assertEqual([shape.has_chart for shape in content[2]], [True])
+        self.assertEqual(content[2][0].chart.value_axis.axis_title.text_frame.text, 'native')
+        self.assertEqual([shape.shape_type for shape in content[4]], [MSO_SHAPE_TYPE.PICTURE])
+        self.assertEqual(content[4][0].image.sha1, cachedSha1)
+        self.assertEqual([shape.shape_type for shape in content[5]], [MSO_SHAPE_TYPE.PICTURE])
+        self.assertNotEqual(content[1][0].image.sha1, cachedSha1)
+
+
+class TestConfigPasses(unittest.TestCase):
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+        self.output = os.path.join(self.tmpDir, 'output.pptx')
+        self.config = os.path.join(self.tmpDir, 'config.json')
+        self.slides = [{'type': 'text', 'title': str(n), 'content': 'The Long Text'} for n in range(5)]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir)
+
+    def write(self):
+        with open(self.config, 'w') as outf:
+            json.dump({'presentation': self.slides}, outf)
+
+    def test_readPlans_fileStreamed(self):
+        """
+        The plans of a configuration file are compiled one by one, the plans of a stream are buffered
+        """
+        self.write()
+        dummyPres = presentation_environment_TW.Presentation(self.output, 'PYTHON-Course.template')
+        plans, entries = dummyPres._readPlans(self.config)
+        self.assertIsNone(entries)
+        self.assertEqual(next(plans).title, '0')
+        self.assertEqual([plan.title for plan in plans], ['1', '2', '3', '4'])
+        with open(self.config) as inpf:
+            plans, entries = dummyPres._readPlans(io.StringIO(inpf.read()))
+        self.assertEqual([plan.title for plan in plans], ['0', '1', '2', '3', '4'])
+
+    def test_generate_checkedFirst(self):
+        """
+        A wrong entry at the end of a configuration file is reported before any slide is built
+        """
+        self.slides.append({'type': 'text', 'title': 'Wrong'})
+        self.write()
+        dummyPres = presentation_environment_TW.Presentation(self.output, 'PYTHON-Course.template')
+        with self.assertRaisesRegex(ValueError, 'Entry 5'):
+            dummyPres.generate(self.config)
+        self.assertEqual(dummyPres._generator.slideCount(), 0)
+        self.assertFalse(os.path.exists(self.output))
+
+    def test_generate_shardedStream(self):
+        """
+        The entries of a stream are buffered for the shards
+        """
+        dummyPres = presentation_environment_TW.Presentation(self.output, 'PYTHON-Course.template', presentation_environment_TW.BuildOptions(shards=2))
+        self.assertTrue(dummyPres.generate(io.StringIO(json.dumps({'presentation': self.slides}))))
+        self.assertEqual([slide.shapes.title.text for slide in PptxPresentation(self.output).slides], ['0', '1', '2', '3', '4'])
@@ -58,6 +58,43 @@ class TestPresentationGenerator(unittest.TestCase):
         dummyPres = PresentationGenerator('PYTHON-Environment.pptx','PYTHON-Course.template')
         self.assertTrue(dummyPres.addList(1, "Asd",  np.array([1, 1, 2]),np.array(['lvl1', 'lvl1', 'lvl2'])))
 
+    def test_addList_sameXml(self):
+        """
+        The lines are written as python-pptx writes them paragraph by paragraph
+        """
+        dummyPres = PresentationGenerator('PYTHON-Environment.pptx','PYTHON-Course.template')
+        dummyPres.addList(1, "Asd", [0, 1, 2], ['lvl0 & <b>', 'lvl1\nbreak', '\x07'], 0)
+        textFrame = dummyPres._presentation.slides[0].shapes.placeholders[1].text_frame
+        self.assertEqual([(paragraph.level, paragraph.text) for paragraph in textFrame.paragraphs],
+                         [(0, ''), (0, 'lvl0 & <b>'), (1, 'lvl1\vbreak'), (2, '_x0007_')])
+
+    def test_addList_badLevel(self):
+        """
+        addList with a level out of range
+        """
+        dummyPres = PresentationGenerator('PYTHON-Environment.pptx','PYTHON-Course.template')
+        with self.assertRaises(SystemError):
+            result = dummyPres.addList(1, "Asd", [9], ['lvl9'])
+
+    def test_addList_continued(self):
+        """
+        A long list is continued on new slides
+        """
+        dummyPres = PresentationGenerator('PYTHON-Environment.pptx','PYTHON-Course.template')
+        self.assertTrue(dummyPres.addList(1, "Asd", [1] * 100, ['Line'] * 100))
+        slides = dummyPres._presentation.slides
+        self.assertGreater(len(slides), 1)
+        self.assertEqual(slides[1].shapes.title.text, 'Asd (cont.)')
+        self.assertEqual(sum(len(slide.shapes.placeholders[1].text_frame.paragraphs) - 1 for slide in slides), 100)
+
+    def test_addList_linesPerSlide(self):
+        """
+        The number of lines on a slide is given
+        """
+        dummyPres = PresentationGenerator('PYTHON-Environment.pptx','PYTHON-Course.template')
+        dummyPres.addList(1, "Asd", [1] * 25, ['Line'] * 25, 10)
+        self.assertEqual(dummyPres.slideCount(), 3)
+
     def test_addImage_returnTrue(self):
         """
         True addImage  in case of correctly supplied data
@@ -65,6 +102,31 @@ class TestPresentationGenerator(unittest.TestCase):
         dummyPres = PresentationGenerator('PYTHON-Environment.pptx','PYTHON-Course.template')
         self.assertTrue(dummyPres.addImage(5, "Asd", 'picture.png'))
 
+    def test_addChart_series(self):
+        """
+        The native chart contains the series, the axis titles and a legend for the named series
+        """
+        dummyPres = PresentationGenerator('PYTHON-Environment.pptx','PYTHON-Course.template')
+        x = np.arange(5.0)
+        dummyPres.addChart(5, "Asd", [('a', x, x), ('b', x, -x)], 'time', 'value')
+        chart = dummyPres._presentation.slides[-1].shapes[1].chart
+        self.assertEqual([series.name for series in chart.plots[0].series], ['a', 'b'])
+        self.assertEqual(list(chart.plots[0].series[1].values), [0.0, -1.0, -2.0, -3.0, -4.0])
+        self.assertEqual(chart.category_axis.axis_title.text_frame.text, 'time')
+        self.assertTrue(chart.has_legend)
+
+    def test_addChart_sameWorkbook(self):
+        """
+        The same chart gives the same embedded workbook in every build
+        """
+        x = np.arange(5.0)
+        blobs = []
+        for n in range(2):
+            dummyPres = PresentationGenerator('PYTHON-Environment.pptx','PYTHON-Course.template')
+            dummyPres.addChart(5, "Asd", [(None, x, x)], 'x', 'y')
+            blobs.append(dummyPres._presentation.slides[-1].shapes[1].chart.part.chart_workbook.xlsx_part.blob)
+        self.assertEqual(blobs[0], blobs[1])
+
     
     def test_addText_returnTrue(self):
         """
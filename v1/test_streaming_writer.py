@@ -0,0 +1,109 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+from unittest import mock
+from pptx import Presentation as PptxPresentation
+from presentation_environment_TW import BuildOptions, Presentation
+import streaming_writer_TW
+
+"""
+Call as Py -3 -m unittest test_streaming_writer.py
+"""
+
+class TestStreamingWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+        self.config = os.path.join(self.tmpDir, 'config.json')
+        self.slides = []
+        for n in range(3):
+            self.slides.append({'type': 'picture', 'title': 'Picture {0}'.format(n), 'content': 'picture.png'})
+            self.slides.append({'type': 'list', 'title': 'List {0}'.format(n), 'content': [{'level': 1, 'text': 'Line'}]})
+        self.slides.append({'type': 'plot', 'title': 'Plot', 'content': 'sample.dat', 'configuration': {'x-label': 'x', 'y-label': 'y'}})
+        with open(self.config, 'w') as outf:
+            json.dump({'presentation': self.slides}, outf)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir)
+
+    def build(self, name, streaming, **kwargs):
+        output = os.path.join(self.tmpDir, name)
+        self.assertTrue(Presentation(output, 'PYTHON-Course.template', BuildOptions(streaming=streaming, **kwargs)).generate(self.config))
+        return output
+
+    def test_finalize_sameContent(self):
+        """
+        The streamed output contains the same parts as the saved one
+        """
+        saved = zipfile.ZipFile(self.build('saved.pptx', False))
+        streamed = zipfile.ZipFile(self.build('streamed.pptx', True))
+        self.assertEqual(sorted(saved.namelist()), sorted(streamed.namelist()))
+        for name in saved.namelist():
+            self.assertEqual(saved.read(name), streamed.read(name), name)
+
+    def test_finalize_sharedImage(self):
+        """
+        A picture used on several slides is written once
+        """
+        names = zipfile.ZipFile(self.build('streamed.pptx', True)).namelist()
+        self.assertEqual(len(names), len(set(names)))
+        slides = PptxPresentation(os.path.join(self.tmpDir, 'streamed.pptx')).slides
+        self.assertEqual(len(slides), len(self.slides))
+        self.assertEqual(len(set(slides[n].shapes[1].image.sha1 for n in (0, 2, 4))), 1)
+
+    def test_generate_incremental(self):
+        """
+        The streaming mode keeps the unchanged slides of an incremental build
+        """
+        self.build('streamed.pptx', True, incremental=True)
+        self.slides[1]['title'] = 'Changed'
+        with open(self.config, 'w') as outf:
+            json.dump({'presentation': self.slides}, outf)
+        output = self.build('streamed.pptx', True, incremental=True)
+        titles = [slide.shapes.title.text for slide in PptxPresentation(output).slides]
+        self.assertEqual(titles, [dat['title'] for dat in self.slides])
+
+    def test_finalize_nativeChart(self):
+        """
+        The native charts and their workbooks are streamed the same as they are saved
+        """
+        self.slides.append({'type': 'plot', 'title': 'Chart', 'content': 'sample.dat', 'configuration': {'x-label': 'x', 'y-label': 'y', 'chart': 'native'}})
+        with open(self.config, 'w') as outf:
+            json.dump({'presentation': self.slides}, outf)
+        saved = zipfile.ZipFile(self.build('saved.pptx', False))
+        streamed = zipfile.ZipFile(self.build('streamed.pptx', True))
+        self.assertIn('ppt/embeddings/Microsoft_Excel_Sheet1.xlsx', streamed.namelist())
+        self.assertEqual(sorted(saved.namelist()), sorted(streamed.namelist()))
+        for name in saved.namelist():
+            self.assertEqual(saved.read(name), streamed.read(name), name)
+
+    def test_generate_failedNoOutput(self):
+        """
+        No output and no partial file is left behind if the generation fails
+        """
+        with open(os.path.join(self.tmpDir, 'broken.png'), 'wb') as outf:
+            outf.write(b'not a picture')
+        self.slides.append({'type': 'picture', 'title': 'Broken', 'content': os.path.join(self.tmpDir, 'broken.png')})
+        with open(self.config, 'w') as outf:
+            json.dump({'presentation': self.slides}, outf)
+        with self.assertRaises(SystemError):
+            Presentation(os.path.join(self.tmpDir, 'streamed.pptx'), 'PYTHON-Course.template', BuildOptions(streaming=True)).generate(self.config)
+        self.assertEqual(sorted(os.listdir(self.tmpDir)), ['broken.png', 'config.json'])
+
+    def test_isSupported(self):
+        """
+        The private details of python-pptx the streaming writer relies on are available (fails if python-pptx changes them)
+        """
+        self.assertTrue(streaming_writer_TW.isSupported())
+
+    def test_generate_unsupported(self):
+        """
+        Without the private details of python-pptx the presentation is saved at the end
+        """
+        saved = zipfile.ZipFile(self.build('saved.pptx', False))
+        with mock.patch.object(streaming_writer_TW._Internals, 'isSupported', return_value=False), \
+             mock.patch.object(streaming_writer_TW, 'StreamingWriter', side_effect=AssertionError):
+            streamed = zipfile.ZipFile(self.build('streamed.pptx', True))
+        self.assertEqual(sorted(saved.namelist()), sorted(streamed.namelist()))
@@ -0,0 +1,87 @@
+import os
+import shutil
+import tempfile
+import unittest
+import xy_binary_TW
+import numpy as np
+from plotter_TW import Plotter
+from xy_reader_TW import XYReader
+
+"""
+Call as Py -3 -m unittest test_xy_binary.py
+"""
+
+class TestXYBinary(unittest.TestCase):
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir)
+
+    def test_convert_roundTrip(self):
+        """
+        The converted sample file contains the same data
+        """
+        dataFile = os.path.join(self.tmpDir, 'sample.dat')
+        shutil.copy('sample.dat', dataFile)
+        binaryFile = xy_binary_TW.convertTextToBinary(dataFile)
+        self.assertEqual(binaryFile, dataFile + '.xyb')
+        x, y = xy_binary_TW.openXYBinary(binaryFile)
+        self.assertIsInstance(x, np.memmap)
+        np.testing.assert_array_equal(x, [1, 3, 5.6, 8.9])
+        np.testing.assert_array_equal(y, [2, 4, 6.7, 9.1])
+
+    def test_findBinary_sidecar(self):
+        """
+        An up-to-date sidecar is found, a stale one is ignored
+        """
+        dataFile = os.path.join(self.tmpDir, 'sample.dat')
+        shutil.copy('sample.dat', dataFile)
+        self.assertIsNone(xy_binary_TW.findBinary(dataFile))
+        binaryFile = xy_binary_TW.convertTextToBinary(dataFile)
+        self.assertEqual(xy_binary_TW.findBinary(dataFile), binaryFile)
+        self.assertEqual(xy_binary_TW.findBinary(binaryFile), binaryFile)
+        with open(dataFile, 'a') as outf:
+            outf.write('(10,11)')
+        self.assertIsNone(xy_binary_TW.findBinary(dataFile))
+
+    def test_findBinary_olderReplacement(self):
+        """
+        A data file replaced by an older one with the same size (e.g. cp -p) does not use the sidecar
+        """
+        dataFile = os.path.join(self.tmpDir, 'sample.dat')
+        shutil.copy('sample.dat', dataFile)
+        binaryFile = xy_binary_TW.convertTextToBinary(dataFile)
+        with open(dataFile, 'r+b') as outf:
+            outf.write(b'(9')
+        info = os.stat(binaryFile)
+        os.utime(dataFile, ns=(info.st_atime_ns, info.st_mtime_ns - 10 ** 9))
+        self.assertIsNone(xy_binary_TW.findBinary(dataFile))
+
+    def test_readXYData_truncatedSidecar(self):
+        """
+        A truncated sidecar with an up-to-date stamp is ignored and the text file is parsed
+        """
+        dataFile = os.path.join(self.tmpDir, 'sample.dat')
+        shutil.copy('sample.dat', dataFile)
+        binaryFile = xy_binary_TW.convertTextToBinary(dataFile)
+        os.truncate(binaryFile, os.path.getsize(binaryFile) - 8)
+        self.assertEqual(xy_binary_TW.findBinary(dataFile), binaryFile)
+        x, y = Plotter(dataFile).readXYData(dataFile)
+        expectedX, expectedY = XYReader().read(dataFile)
+        np.testing.assert_array_equal(x, expectedX)
+        np.testing.assert_array_equal(y, expectedY)
+
+    def test_openXYBinary_badFile(self):
+        """
+        ValueError for a text file
+        """
+        with self.assertRaises(ValueError):
+            result = xy_binary_TW.openXYBinary('sample.dat')
+
+    def test_writeXYBinary_badShape(self):
+        """
+        ValueError for x and y with different length
+        """
+        with self.assertRaises(ValueError):
+            xy_binary_TW.writeXYBinary(os.path.join(self.tmpDir, 'a.xyb'), [1, 2], [1])
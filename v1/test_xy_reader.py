@@ -0,0 +1,55 @@
+import io
+import unittest
+from xy_reader_TW import XYReader
+import numpy as np
+
+"""
+Call as Py -3 -m unittest test_xy_reader.py
+"""
+
+class TestXYReader(unittest.TestCase):
+    def test_chunkSize_badValue(self):
+        """
+        chunkSize must be positive
+        """
+        with self.assertRaises(ValueError):
+            result = XYReader(0)
+
+    def test_read_sampleFile(self):
+        """
+        One-line layout of the sample file
+        """
+        x, y = XYReader().read('sample.dat')
+        np.testing.assert_array_equal(x, [1, 3, 5.6, 8.9])
+        np.testing.assert_array_equal(y, [2, 4, 6.7, 9.1])
+
+    def test_readStream_pairPerLine(self):
+        """
+        One pair per line, with a chunk size splitting the numbers
+        """
+        x, y = XYReader(3).readStream(io.BytesIO(b'1 2\n-3.5 4e1\n+5 6\n'))
+        np.testing.assert_array_equal(x, [1, -3.5, 5])
+        np.testing.assert_array_equal(y, [2, 40, 6])
+
+    def test_readStream_strayCharacters(self):
+        """
+        Header text and lone signs are skipped
+        """
+        x, y = XYReader().readStream(io.BytesIO(b'time value\n1 2\n3 - 4\n'))
+        np.testing.assert_array_equal(x, [1, 3])
+        np.testing.assert_array_equal(y, [2, 4])
+
+    def test_readStream_float64Arrays(self):
+        """
+        The result is a pair of contiguous float64 arrays
+        """
+        x, y = XYReader().readStream(io.BytesIO(b'(1,2)(3,4)'))
+        self.assertEqual(x.dtype, np.float64)
+        self.assertTrue(x.flags['C_CONTIGUOUS'] and y.flags['C_CONTIGUOUS'])
+
+    def test_read_missingFile(self):
+        """
+        IOError for a missing file
+        """
+        with self.assertRaises(IOError):
+            result = XYReader().read('missing.dat')
@@ -0,0 +1,277 @@
+import argparse
+import logging
+import os
+import struct
+
+import numpy as np
+
+from atomic_file_TW import AtomicFile
+from xy_reader_TW import XYReader
+
+# Layout of the binary x,y file:
+#   header  : magic (8 bytes), version (uint32), flags (uint32), number of points (uint64),
+#             size (uint64) and modification time in ns (int64) of the source text file
+#   x column: number of points little-endian float64 values
+#   y column: number of points little-endian float64 values
+MAGIC = b'XYF64\x00\r\n'
+VERSION = 1
+SIDECAR_EXTENSION = '.xyb'
+# flag: the header contains the size and the modification time of the source file
+FLAG_SOURCE = 1
+_HEADER = struct.Struct('<8sIIQQq')
+HEADER_SIZE = _HEADER.size
+
+_logger = logging.getLogger('XYBinary')
+
+
+def sidecarName(inputFile):
+    """Return the name of the binary sidecar file belonging to a text data file.
+
+    Parameters
+    ----------
+    inputFile : str
+        The name of the text data file.
+
+    Returns
+    -------
+    str
+        The name of the sidecar file.
+    """
+    return inputFile + SIDECAR_EXTENSION
+
+
+def isXYBinary(fileName):
+    """Check the magic bytes of a file.
+
+    Parameters
+    ----------
+    fileName : str
+        The name of the file.
+
+    Returns
+    -------
+    bool
+        True if the file is a binary x,y file, False otherwise (also if it can not be read).
+    """
+    try:
+        with open(fileName, 'rb') as inpf:
+            return inpf.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def sourceStamp(fileName):
+    """Return the stamp of a source text file which is stored in the header of its sidecar.
+
+    Parameters
+    ----------
+    fileName : str
+        The name of the text data file.
+
+    Returns
+    -------
+    size, mtime
+        A tuple contains the size and the modification time (in ns) of the file.
+
+    Raises
+    ----------
+    OSError
+        If the file does not exist.
+    """
+    info = os.stat(fileName)
+    return (info.st_size, info.st_mtime_ns)
+
+
+def _unpackHeader(data):
+    """Unpack the header of a binary x,y file.
+
+    Returns
+    -------
+    count, source
+        A tuple contains the number of points and the stamp of the source file (see sourceStamp), None if the header
+        does not contain it.
+
+    Raises
+    ----------
+    ValueError
+        If the data is not a binary x,y file or its header is truncated.
+    """
+    if len(data) < HEADER_SIZE:
+        _logger.error('The binary data is truncated.')
+        raise ValueError
+    magic, version, flags, count, sourceSize, sourceMtime = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        _logger.error('The data is not in the binary x,y format.')
+        raise ValueError
+    return (count, (sourceSize, sourceMtime) if flags & FLAG_SOURCE else None)
+
+
+def findBinary(inputFile):
+    """Find the binary representation of a data file.
+
+    A sidecar is up-to-date if its header contains exactly the size and the modification time of the data file, so
+    a data file replaced by an older one (e.g. cp -p, rsync -t or tar) does not use the sidecar of the previous one.
+    The reader must still treat a sidecar which can not be opened (e.g. truncated) as stale.
+
+    Parameters
+    ----------
+    inputFile : str
+        The name of the data file.
+
+    Returns
+    -------
+    str or None
+        The inputFile itself if it is binary, its sidecar if the sidecar is up-to-date, None otherwise.
+    """
+    if isXYBinary(inputFile):
+        return inputFile
+    sidecar = sidecarName(inputFile)
+    try:
+        with open(sidecar, 'rb') as inpf:
+            count, source = _unpackHeader(inpf.read(HEADER_SIZE))
+        if source is not None and source == sourceStamp(inputFile):
+            return sidecar
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def writeXYBinary(fileName, x, y, source=None):
+    """Write the x,y data in the binary format.
+
+    The file is written next to its final place first and renamed afterwards, so a reader never sees a partial file.
+
+    Parameters
+    ----------
+    fileName : str
+        The name of the binary file.
+    x : numpy array
+        The x data.
+    y : numpy array
+        The y data.
+    source : tuple
+        The stamp of the source text file (see sourceStamp), None if the file is not a sidecar.
+
+    Raises
+    ----------
+    ValueError
+        If the length of x and y differs.
+
+    IOError
+        If the file can not be written.
+    """
+    x = np.asarray(x, dtype='<f8')
+    y = np.asarray(y, dtype='<f8')
+    if x.shape != y.shape or x.ndim != 1:
+        _logger.error('The x and y data must be one dimensional with the same length.')
+        raise ValueError
+    try:
+        with AtomicFile(fileName) as outf:
+            sourceSize, sourceMtime = (0, 0) if source is None else source
+            outf.write(_HEADER.pack(MAGIC, VERSION, 0 if source is None else FLAG_SOURCE, x.size, sourceSize, sourceMtime))
+            x.tofile(outf)
+            y.tofile(outf)
+    except OSError:
+        _logger.error('The binary file can not be written.')
+        raise IOError
+
+
+def openXYBinary(fileName):
+    """Open a binary x,y file without copying the data.
+
+    Parameters
+    ----------
+    fileName : str
+        The name of the binary file.
+
+    Returns
+    -------
+    x,y
+        A tuple contains the x,y data as read-only numpy.memmap arrays.
+
+    Raises
+    ----------
+    ValueError
+        If the file is not a binary x,y file or it is truncated.
+
+    IOError
+        If the file can not be read.
+    """
+    try:
+        with open(fileName, 'rb') as inpf:
+            header = inpf.read(HEADER_SIZE)
+        fileSize = os.path.getsize(fileName)
+    except OSError:
+        _logger.error('The binary file can not be read.')
+        raise IOError
+    count, source = _unpackHeader(header)
+    if fileSize < HEADER_SIZE + 16 * count:
+        _logger.error('The binary file is truncated.')
+        raise ValueError
+    if count == 0:
+        return (np.empty(0, dtype='<f8'), np.empty(0, dtype='<f8'))
+    columns = np.memmap(fileName, dtype='<f8', mode='r', offset=HEADER_SIZE, shape=(2, count))
+    return (columns[0], columns[1])
+
+
+def loadXYBinary(data):
+    """Read the x,y data from the content of a binary x,y file without copying it.
+
+    Parameters
+    ----------
+    data : bytes
+        The content of the binary file.
+
+    Returns
+    -------
+    x,y
+        A tuple contains the x,y data as read-only numpy arrays over the given bytes.
+
+    Raises
+    ----------
+    ValueError
+        If the content is not a binary x,y file or it is truncated.
+    """
+    count, source = _unpackHeader(data)
+    if len(data) < HEADER_SIZE + 16 * count:
+        _logger.error('The binary data is truncated.')
+        raise ValueError
+    columns = np.frombuffer(data, dtype='<f8', count=2 * count, offset=HEADER_SIZE).reshape(2, count)
+    return (columns[0], columns[1])
+
+
+def convertTextToBinary(inputFile, outputFile=None):
+    """Convert a text data file to the binary format.
+
+    Parameters
+    ----------
+    inputFile : str
+        The name of the text data file.
+    outputFile : str
+        The name of the binary file. The default is the sidecar name of the inputFile.
+
+    Returns
+    -------
+    str
+        The name of the binary file.
+    """
+    if outputFile is None:
+        outputFile = sidecarName(inputFile)
+    # the stamp is taken before reading, so a file changed meanwhile does not match it
+    try:
+        source = sourceStamp(inputFile)
+    except OSError:
+        _logger.error('The data file can not be read.')
+        raise IOError
+    x, y = XYReader().read(inputFile)
+    writeXYBinary(outputFile, x, y, source)
+    _logger.info('{0} is converted to {1} ({2} points).'.format(inputFile, outputFile, x.size))
+    return outputFile
+
+
+if __name__ == "__main__":
+    logging.basicConfig(format="%(asctime)s %(levelname)s %(message)s", level = logging.INFO)
+    parser = argparse.ArgumentParser(description='Convert text x,y data files to the binary sidecar format.')
+    parser.add_argument('inputFiles', nargs='+', help='the text data files')
+    for inputFile in parser.parse_args().inputFiles:
+        convertTextToBinary(inputFile)
@@ -0,0 +1,163 @@
+import logging
+import os
+import re
+import warnings
+
+import numpy as np
+
+import compressed_TW
+
+# Every byte which can not be part of a number is mapped to a space.
+_SEPARATOR_TABLE = bytes(b if b in b'0123456789+-.eE' else 32 for b in range(256))
+_NUMBER_PATTERN = re.compile(rb'[+-]?\d+\.?\d*(?:[eE][+-]?\d+)?')
+
+
+class XYReader:
+    """Streaming reader for the x,y data files.
+
+    The file is read in fixed size chunks. Every byte which can not be part of a number is replaced by a space,
+    so the one-line layout ((1,2)(3,4)...) and the one-pair-per-line layout (1 2 newline 3 4 ...) are parsed the same way.
+    The numbers are converted by numpy and written directly into preallocated float64 arrays.
+    A gzip, xz or zstd compressed file (detected by its magic bytes) is decompressed chunk by chunk while it is parsed.
+    """
+
+    CHUNK_SIZE = 1 << 22
+
+    def __init__(self, chunkSize=None):
+        """Initialization.
+
+        Set up the logger and the size of the chunks.
+
+        Parameters
+        ----------
+        chunkSize : int
+            The number of bytes read at once. The default is CHUNK_SIZE.
+
+        Raises
+        ----------
+        ValueError
+            If the chunkSize is not positive.
+        """
+        self._logger = logging.getLogger(self.__class__.__name__)
+        if chunkSize is None:
+            chunkSize = self.CHUNK_SIZE
+        if chunkSize <= 0:
+            self._logger.error('The chunk size must be positive.')
+            raise ValueError
+        self._chunkSize = chunkSize
+
+    def read(self, inputFile):
+        """Read the x,y data from a file.
+
+        Parameters
+        ----------
+        inputFile : str
+            The name of the input file. It can be compressed (see compressed_TW).
+
+        Returns
+        -------
+        x,y
+            A tuple contains the x,y data as contiguous float64 numpy arrays.
+
+        Raises
+        ----------
+        IOError
+            If the file can not be read, or its compression is not supported or broken.
+        """
+        try:
+            fileSize = os.path.getsize(inputFile)
+            with open(inputFile, 'rb') as inpf, compressed_TW.decompressingStream(inpf) as stream:
+                # the size of the decompressed content is not known up front, the arrays grow while it is parsed
+                return self.readStream(stream, fileSize if stream is inpf else 0)
+        except OSError:
+            self._logger.error('Input file can not be read.')
+            raise IOError
+
+    def readStream(self, stream, sizeHint=0):
+        """Read the x,y data from a binary stream.
+
+        Parameters
+        ----------
+        stream : file object
+            The stream opened in binary mode.
+        sizeHint : int
+            The expected number of bytes. It is only used to size the arrays up front.
+
+        Returns
+        -------
+        x,y
+            A tuple contains the x,y data as contiguous float64 numpy arrays.
+        """
+        x = None
+        y = None
+        count = 0
+        carry = b''
+        pending = None
+        while True:
+            chunk = stream.read(self._chunkSize)
+            if not chunk:
+                values = self._parse(carry)
+            else:
+                chunk = carry + chunk.translate(_SEPARATOR_TABLE)
+                cut = chunk.rfind(b' ') + 1
+                carry = chunk[cut:]
+                values = self._parse(chunk[:cut])
+            if pending is not None:
+                values = np.concatenate(([pending], values))
+                pending = None
+            if values.size % 2:
+                pending = values[-1]
+                values = values[:-1]
+            pairs = values.size // 2
+            if pairs:
+                if x is None:
+                    capacity = self._estimateCapacity(pairs, len(chunk), sizeHint)
+                    x = np.empty(capacity, dtype=np.float64)
+                    y = np.empty(capacity, dtype=np.float64)
+                if count + pairs > x.size:
+                    capacity = max(2 * x.size, count + pairs)
+                    x = self._grow(x, count, capacity)
+                    y = self._grow(y, count, capacity)
+                x[count:count + pairs] = values[0::2]
+                y[count:count + pairs] = values[1::2]
+                count += pairs
+            if not chunk:
+                break
+        if pending is not None:
+            self._logger.warning('The data contains an odd number of values, the last one is ignored.')
+        if x is None:
+            return (np.empty(0, dtype=np.float64), np.empty(0, dtype=np.float64))
+        if count < x.size:
+            x = x[:count].copy()
+            y = y[:count].copy()
+        return (x, y)
+
+    def _parse(self, text):
+        """Convert the space separated numbers of a chunk to a float64 array.
+
+        The fast path is numpy's text parser. If the chunk contains a token which is not a valid number (e.g. a lone sign),
+        the chunk is parsed again with a regular expression which skips the stray characters.
+        """
+        if not text.strip():
+            return np.empty(0, dtype=np.float64)
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', DeprecationWarning)
+            try:
+                return np.fromstring(text, dtype=np.float64, sep=' ')
+            except (DeprecationWarning, ValueError):
+                pass
+        return np.array(_NUMBER_PATTERN.findall(text), dtype=np.float64)
+
+    @staticmethod
+    def _estimateCapacity(pairs, chunkBytes, sizeHint):
+        """Estimate the number of pairs of the whole file from the first chunk."""
+        if sizeHint <= chunkBytes or chunkBytes == 0:
+            return pairs
+        return int(pairs * sizeHint / chunkBytes * 1.05) + 1
+
+    @staticmethod
+    def _grow(array, count, capacity):
+        """Return a larger array which starts with the first count elements of the given one."""
+        grown = np.empty(capacity, dtype=array.dtype)
+        grown[:count] = array[:count]
+        return grown